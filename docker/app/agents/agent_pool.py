@@ -0,0 +1,151 @@
+"""
+Bounded agent pool for the AI Data Explorer multi-agent system.
+
+Keeps constructed agents alive between requests so that the tool registry,
+hooks, guardrail client and memory lookup are only paid for once per key.
+Entries are evicted least-recently-used when the pool is full and after an
+idle timeout. Every entry carries its own asyncio lock so that concurrent
+requests for the same key are serialized instead of invoking one agent twice;
+entries with a lease held or waiting are never evicted, so every request for a
+key queues on the same lock.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolEntry:
+    """A pooled agent together with its lock, lease count and last-use time"""
+
+    __slots__ = ("agent", "lock", "leases", "last_used")
+
+    def __init__(self):
+        self.agent = None
+        self.lock = asyncio.Lock()
+        self.leases = 0  # Leases holding or waiting for the lock
+        self.last_used = time.monotonic()
+
+    @property
+    def in_use(self) -> bool:
+        return self.leases > 0 or self.lock.locked()
+
+
+class AgentPool:
+    """LRU pool of agents with idle eviction and per-entry locking"""
+
+    def __init__(self, max_size: int = 64, idle_ttl_seconds: float = 1800):
+        self.max_size = max(1, max_size)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._entries: "OrderedDict[Hashable, _PoolEntry]" = OrderedDict()
+        self._mutex = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry(self, key: Hashable) -> _PoolEntry:
+        """Get or create the entry for key and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PoolEntry()
+            self._entries[key] = entry
+        else:
+            self._entries.move_to_end(key)
+        entry.last_used = time.monotonic()
+        self._evict()
+        return entry
+
+    def _evict(self):
+        """Drop idle entries and trim the pool to max_size (caller holds the mutex)"""
+        now = time.monotonic()
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if now - entry.last_used > self.idle_ttl_seconds and not entry.in_use:
+                del self._entries[key]
+                self.evictions += 1
+                logger.debug(f"♻️ Evicted idle agent {key}")
+
+        # Oldest entries first; never evict an entry that is serving or queueing a request
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_size:
+                break
+            if not self._entries[key].in_use:
+                del self._entries[key]
+                self.evictions += 1
+                logger.debug(f"♻️ Evicted least recently used agent {key}")
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the pooled agent for key, building it with factory on a miss"""
+        with self._mutex:
+            entry = self._entry(key)
+            if entry.agent is not None:
+                self.hits += 1
+                return entry.agent
+
+        # Build outside the mutex so a slow construction does not block other keys
+        agent = factory()
+        with self._mutex:
+            entry = self._entry(key)
+            if entry.agent is None:
+                entry.agent = agent
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry.agent
+
+    @asynccontextmanager
+    async def lease(self, key: Hashable, factory: Callable[[], Any]):
+        """Hold the entry lock for key while yielding its agent"""
+        with self._mutex:
+            entry = self._entry(key)
+            entry.leases += 1
+        try:
+            async with entry.lock:
+                yield self.get(key, factory)
+        finally:
+            with self._mutex:
+                entry.leases -= 1
+
+    def discard(self, predicate: Optional[Callable[[Hashable], bool]] = None):
+        """Remove entries whose key matches predicate (all entries if omitted)"""
+        with self._mutex:
+            for key in list(self._entries):
+                if predicate is None or predicate(key):
+                    del self._entries[key]
+
+    def clear(self):
+        """Remove every pooled agent"""
+        self.discard()
+
+    def stats(self) -> dict:
+        """Pool size and hit/miss/eviction counters"""
+        with self._mutex:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        entry = self._entries.get(key)
+        return entry is not None and entry.agent is not None
+
+
+def pool_from_env(prefix: str, default_size: int = 64, default_idle_ttl: float = 1800) -> AgentPool:
+    """Create a pool sized from <prefix>_POOL_MAX_SIZE and <prefix>_POOL_IDLE_TTL"""
+    return AgentPool(
+        max_size=int(os.getenv(f"{prefix}_POOL_MAX_SIZE", str(default_size))),
+        idle_ttl_seconds=float(os.getenv(f"{prefix}_POOL_IDLE_TTL", str(default_idle_ttl))),
+    )
@@ -0,0 +1,250 @@
+"""
+Caches for Neptune openCypher translations and results.
+
+Every Neptune question used to go through the QA chain's Cypher-generation
+LLM call, although analysts ask the same few dozen questions all day.
+CypherTranslationCache maps a question to the Cypher generated for it under a
+schema fingerprint (a hash of the Neptune statistics summary); when the
+fingerprint changes, every translation is dropped. Lookups try the normalized
+question first and then a near-duplicate form (filler words dropped, plurals
+made singular, word order kept), so "What are the top suppliers by defect
+rate?" and "top supplier by defect rate" share one entry. Entries expire after
+CYPHER_CACHE_TTL_SECONDS as a backstop for schema changes the fingerprint
+cannot see.
+
+CypherResultCache keeps the rows returned by read-only Cypher statements. The
+graph only changes when data is loaded, so entries belong to a graph
+generation that is bumped when a bulk load finishes or a write statement runs;
+bumping drops every result. Entries are bounded in number, total size and age.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9_]+")
+
+# Words that do not change which Cypher a question needs
+_FILLER_WORDS = {
+    "a", "an", "the", "me", "please", "show", "list", "give", "find", "get", "tell",
+    "what", "which", "who", "are", "is", "was", "were", "do", "does", "can", "you", "all", "of",
+}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, punctuation-free, single-spaced form of question"""
+    return " ".join(_WORD.findall(question.lower()))
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def near_duplicate_key(question: str) -> str:
+    """Key shared by rewordings of question that differ only in filler words and plurals"""
+    return " ".join(_singular(word) for word in normalize_question(question).split() if word not in _FILLER_WORDS)
+
+
+class CypherTranslationCache:
+    """LRU of generated Cypher per question for the current schema fingerprint, with hit-rate counters"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("CYPHER_CACHE_MAX_ENTRIES", "512"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("CYPHER_CACHE_TTL_SECONDS", "86400"))
+        self.enabled = os.getenv("CYPHER_CACHE_ENABLED", "true").lower() == "true"
+        self.fingerprint: Optional[str] = None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # normalized question -> (cypher, stored_at)
+        self._near: Dict[str, str] = {}  # near-duplicate key -> normalized question
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_fingerprint(self, fingerprint: str):
+        if fingerprint != self.fingerprint:
+            if self._entries:
+                logger.info(f"🧹 Graph schema changed, dropping {len(self._entries)} cached Cypher translations")
+                self.invalidations += 1
+            self._entries.clear()
+            self._near.clear()
+            self.fingerprint = fingerprint
+
+    def _remove(self, normalized: str):
+        self._entries.pop(normalized, None)
+        near = near_duplicate_key(normalized)
+        if self._near.get(near) == normalized:
+            del self._near[near]
+
+    def get(self, question: str, fingerprint: str) -> Optional[str]:
+        """Cypher previously generated for question (or a near duplicate) under fingerprint"""
+        if not self.enabled:
+            return None
+        normalized = normalize_question(question)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            exact = normalized in self._entries
+            key = normalized if exact else self._near.get(near_duplicate_key(normalized))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            return entry[0]
+
+    def put(self, question: str, fingerprint: str, cypher: str):
+        """Remember the Cypher generated for question under fingerprint"""
+        if not self.enabled or not cypher.strip():
+            return
+        normalized = normalize_question(question)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._entries[normalized] = (cypher, time.monotonic())
+            self._entries.move_to_end(normalized)
+            self._near[near_duplicate_key(normalized)] = normalized
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, question: str):
+        """Forget the translation for question, e.g. after it failed to execute"""
+        normalized = normalize_question(question)
+        with self._lock:
+            key = normalized if normalized in self._entries else self._near.get(near_duplicate_key(normalized))
+            if key is not None:
+                self._remove(key)
+
+    def invalidate(self):
+        with self._lock:
+            self._check_fingerprint(None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Clauses that change the graph; statements using them are never cached
+_WRITE_CLAUSE = re.compile(r"\b(CREATE|MERGE|DELETE|SET|REMOVE|DROP|LOAD\s+CSV)\b|\bCALL\s+\w+\.\w+\s*\(", re.I)
+_STRING_OR_SPACE = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|\s+""")
+
+
+def normalize_cypher(cypher: str) -> str:
+    """Cypher with runs of whitespace outside string literals collapsed and trailing semicolons removed"""
+    collapsed = _STRING_OR_SPACE.sub(lambda match: match.group(1) or " ", cypher.strip())
+    return collapsed.rstrip("; ")
+
+
+def is_read_only(cypher: str) -> bool:
+    literal_free = _STRING_OR_SPACE.sub(lambda match: " " if match.group(1) is None else "''", cypher)
+    return not _WRITE_CLAUSE.search(literal_free)
+
+
+class CypherResultCache:
+    """Results of read-only Cypher per graph generation, bounded by entries, bytes and age"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("CYPHER_RESULT_CACHE_MAX_ENTRIES", "256"))
+        self.max_bytes = max_bytes or int(os.getenv("CYPHER_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("CYPHER_RESULT_CACHE_TTL_SECONDS", "900"))
+        self.enabled = os.getenv("CYPHER_RESULT_CACHE_ENABLED", "true").lower() == "true"
+        self.generation = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (result, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(cypher: str, params: Optional[dict] = None) -> str:
+        return normalize_cypher(cypher) + ("\n" + json.dumps(params, sort_keys=True, default=str) if params else "")
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, cypher: str, params: Optional[dict] = None) -> Optional[Any]:
+        """Cached result of cypher in the current graph generation"""
+        if not self.enabled:
+            return None
+        key = self.key(cypher, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, cypher: str, result: Any, params: Optional[dict] = None, generation: Optional[int] = None):
+        """Cache result, unless the graph changed since generation (read before running the query)"""
+        if not self.enabled or not is_read_only(cypher):
+            return
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes // 4:
+            return  # One result should not evict most of the cache
+        key = self.key(cypher, params)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def bump_generation(self, reason: str):
+        """Record that the graph changed, dropping every cached result"""
+        with self._lock:
+            self.generation += 1
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        logger.info(f"🧹 Graph generation {self.generation} ({reason}), dropped {dropped} cached Cypher results")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": self.generation,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+cypher_translation_cache = CypherTranslationCache()
+cypher_result_cache = CypherResultCache()
@@ -0,0 +1,149 @@
+"""
+Result-size governor for generated openCypher.
+
+Generated Cypher used to run as written, so `MATCH (n) RETURN n` read the
+whole graph into the task, and only the QA chain's fixed top_K decided what
+the LLM saw. CypherGovernor rewrites the trailing SKIP/LIMIT of read queries
+so Neptune returns one page (CYPHER_PAGE_ROWS rows, plus one row to tell
+whether more exist), and never more than CYPHER_MAX_ROWS rows across pages.
+Each page is then trimmed to CYPHER_CONTEXT_MAX_BYTES of JSON before it
+reaches the LLM. When more rows exist a cursor is opened, so a follow-up can
+fetch the next page of the same query.
+
+Pages use SKIP/LIMIT rather than keyset pagination, because generated Cypher
+has no known unique sort key. Queries whose size cannot be bounded by
+rewriting the tail (UNION, parameterized SKIP/LIMIT, no RETURN) run unchanged;
+their rows are still budgeted before reaching the LLM.
+"""
+
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+try:
+    from .cypher_cache import is_read_only
+except ImportError:
+    from cypher_cache import is_read_only
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_OR_COMMENT = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|//[^\n]*|/\*.*?\*/""", re.S)
+_PAGING_TAIL = re.compile(r"(?:\bSKIP\s+(\$?\w+)\s*)?(?:\bLIMIT\s+(\$?\w+)\s*)?;?\s*$", re.I)
+_RETURN = re.compile(r"\bRETURN\b", re.I)
+_UNION = re.compile(r"\bUNION\b", re.I)
+
+MAX_CURSORS = 256
+
+
+def _strip_comments(cypher: str) -> str:
+    return _LITERAL_OR_COMMENT.sub(lambda match: match.group(1) or " " * len(match.group(0)), cypher)
+
+
+def _mask_literals(cypher: str) -> str:
+    """cypher with the contents of literals blanked out, keeping every position"""
+    return _LITERAL_OR_COMMENT.sub(lambda match: match.group(0)[0] + "_" * (len(match.group(0)) - 2) + match.group(0)[-1],
+                                   cypher)
+
+
+@dataclass
+class GovernedQuery:
+    """A page of a query: source is the Cypher as generated, cypher is what runs"""
+    source: str
+    cypher: str
+    skip: int = 0
+    limit: Optional[int] = None  # Rows the source may return in total; None when it cannot be paged
+
+
+@dataclass
+class ResultPage:
+    rows: Any
+    skip: int
+    has_more: bool = False
+    cursor: Optional[str] = None
+
+    def note(self) -> str:
+        """Markdown line telling the reader (and the LLM) that rows were left out"""
+        if not self.has_more:
+            return ""
+        shown = f"rows {self.skip + 1}-{self.skip + len(self.rows)}"
+        if self.cursor:
+            return f"**Rows:** showing {shown}; more rows are available - pass cursor `{self.cursor}` for the next page"
+        return f"**Rows:** showing {shown}; the result was truncated"
+
+
+class CypherGovernor:
+    """Bounds generated Cypher to a page of rows and a byte budget, with cursors for the next page"""
+
+    def __init__(self, max_rows: Optional[int] = None, page_rows: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.max_rows = max_rows or int(os.getenv("CYPHER_MAX_ROWS", "1000"))
+        self.page_rows = page_rows or int(os.getenv("CYPHER_PAGE_ROWS", "10"))
+        self.max_bytes = max_bytes or int(os.getenv("CYPHER_CONTEXT_MAX_BYTES", "16384"))
+        self.enabled = os.getenv("CYPHER_GOVERNOR_ENABLED", "true").lower() == "true"
+        self._cursors: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # cursor -> (source cypher, skip)
+        self._lock = threading.Lock()
+
+    def govern(self, cypher: str, skip: int = 0) -> GovernedQuery:
+        """The page of cypher starting skip rows into its result, with SKIP/LIMIT added or capped"""
+        if not self.enabled or not is_read_only(cypher):
+            return GovernedQuery(cypher, cypher, skip)
+        clean = _strip_comments(cypher)
+        masked = _mask_literals(clean)
+        tail = _PAGING_TAIL.search(masked)
+        base_skip, limit = tail.group(1), tail.group(2)
+        if (not _RETURN.search(masked) or _UNION.search(masked)
+                or any(value and not value.isdigit() for value in (base_skip, limit))):
+            return GovernedQuery(cypher, cypher, skip)
+
+        limit = min(int(limit), self.max_rows) if limit else self.max_rows
+        fetch = max(min(self.page_rows + 1, limit - skip), 0)
+        offset = int(base_skip or 0) + skip
+        governed = clean[:tail.start()].rstrip() + (f" SKIP {offset}" if offset else "") + f" LIMIT {fetch}"
+        return GovernedQuery(cypher, governed, skip, limit)
+
+    def page(self, query: GovernedQuery, rows: Any) -> ResultPage:
+        """The rows of query's result that fit in one page and the byte budget"""
+        if not isinstance(rows, list):
+            return ResultPage(rows, query.skip)
+        kept: List[Any] = []
+        size = 0
+        for row in rows[:self.page_rows]:
+            encoded = json.dumps(row, default=str)
+            if size + len(encoded) > self.max_bytes:
+                if not kept:
+                    # A single oversized row is cut rather than dropped
+                    kept.append(encoded[:self.max_bytes] + "...")
+                break
+            kept.append(row)
+            size += len(encoded)
+
+        has_more = len(rows) > len(kept)
+        next_skip = query.skip + len(kept)
+        cursor = None
+        if has_more and query.limit is not None and next_skip < query.limit:
+            cursor = self.open_cursor(query.source, next_skip)
+        if has_more:
+            logger.info(f"✂️ Cypher result limited to {len(kept)} rows ({size} bytes) for the LLM")
+        return ResultPage(kept, query.skip, has_more, cursor)
+
+    def open_cursor(self, cypher: str, skip: int) -> str:
+        cursor = secrets.token_hex(4)
+        with self._lock:
+            self._cursors[cursor] = (cypher, skip)
+            while len(self._cursors) > MAX_CURSORS:
+                self._cursors.popitem(last=False)
+        return cursor
+
+    def resume(self, cursor: str) -> Optional[Tuple[str, int]]:
+        """(source cypher, skip) of the page cursor points at, or None if it is unknown or expired"""
+        with self._lock:
+            return self._cursors.get(cursor.strip().strip("`"))
+
+
+cypher_governor = CypherGovernor()
@@ -1,6 +1,8 @@
 from strands import Agent, tool
 from .model_utils import get_current_model
+from .subagent_factory import subagent_factory
 from strands_tools import calculator
+from artifact_store import collect_artifacts, register_artifact
 import os
 import time
 
@@ -68,7 +70,10 @@ def data_extractor(raw_text: str) -> str:
         from .model_utils import get_current_model
         
         print("Routed to Data Extractor")
-        extractor_agent = Agent(
+        with subagent_factory.lease(
+            "data_extractor",
+            Agent,
+            model=get_current_model(),
             system_prompt="""You are a data extraction specialist that converts unstructured text into clean CSV format.
 
 EXTRACTION RULES:
@@ -100,11 +105,9 @@ Output:
 Category,Value
 Q1,100
 Q2,150""",
-            model=get_current_model(),
-        )
-        
-        formatted_query = f"Extract structured data from this text:\n\n{raw_text}"
-        agent_response = extractor_agent(formatted_query)
+        ) as extractor_agent:
+            formatted_query = f"Extract structured data from this text:\n\n{raw_text}"
+            agent_response = extractor_agent(formatted_query)
         csv_data = str(agent_response).strip()
         
         # Save to file
@@ -207,6 +210,7 @@ def chart_tool(data_description: str, chart_title: str = None) -> str:
         plt.tight_layout()
         plt.savefig(filepath, format='png', dpi=150, bbox_inches='tight')
         plt.close()
+        register_artifact(filepath, kind="chart")
         
         return f"[Generated image: {filename}]"
         
@@ -360,6 +364,7 @@ def wordcloud_tool(text_data: str) -> str:
         
         plt.savefig(filepath, format='png', dpi=150, bbox_inches='tight')
         plt.close()
+        register_artifact(filepath, kind="wordcloud")
         
         return f"[Generated image: {filename}]"
         
@@ -430,6 +435,7 @@ def table_tool(data_description: str) -> str:
         plt.title('Data Table', fontsize=16, fontweight='bold', pad=20)
         plt.savefig(filepath, format='png', dpi=150, bbox_inches='tight')
         plt.close()
+        register_artifact(filepath, kind="table")
         
         return f"[Generated image: {filename}]"
         
@@ -437,7 +443,10 @@ def table_tool(data_description: str) -> str:
         return f"Error creating table: {str(e)}"
 
 def cleanup_old_charts(output_dir, max_age_hours=24):
-    """Remove visualization files older than max_age_hours from output directory."""
+    """Remove visualization files older than max_age_hours from output directory.
+    
+    Not called per request - the artifact janitor expires registered charts on a schedule.
+    """
     if not os.path.exists(output_dir):
         return
     
@@ -463,45 +472,21 @@ def data_visualizer_assistant(query: str) -> str:
     try:
         print("Routed to Data Visualizer Assistant")
         
-        # Clean up old visualizations
-        output_dir = os.path.join(os.getcwd(), 'output')
-        cleanup_old_charts(output_dir)
-        
-        # Record timestamp before execution
-        start_time = time.time()
-        
-        agent = Agent(
-            system_prompt=DATA_VISUALIZER_SYSTEM_PROMPT,
+        # The tools register what they create, so only this request's charts are picked up
+        with subagent_factory.lease(
+            "data_visualizer",
+            Agent,
             model=get_current_model(),
+            system_prompt=DATA_VISUALIZER_SYSTEM_PROMPT,
             tools=[data_extractor, chart_tool, wordcloud_tool, table_tool, calculator]
-        )
-        
-        result = agent(query)
+        ) as agent, collect_artifacts() as created:
+            result = agent(query)
         result_str = str(result)
         
-        # Find visualization files created after start_time
-        if os.path.exists(output_dir):
-            viz_files = [f for f in os.listdir(output_dir) 
-                        if (f.startswith(('chart_', 'wordcloud_', 'table_')) and 
-                            f.lower().endswith('.png'))]
-            
-            # Filter to files created after we started
-            recent_viz = []
-            for filename in viz_files:
-                file_path = os.path.join(output_dir, filename)
-                if os.path.getmtime(file_path) >= start_time:
-                    recent_viz.append(filename)
-            
-            if recent_viz:
-                # Sort by creation time to maintain order
-                recent_viz.sort(key=lambda x: os.path.getmtime(os.path.join(output_dir, x)))
-                
-                # Include all generated visualizations
-                image_markers = []
-                for filename in recent_viz:
-                    image_markers.append(f"[Generated chart: {filename}]")
-                
-                return f"{result_str}\n\n" + "\n\n".join(image_markers)
+        if created:
+            # Include all generated visualizations, in creation order
+            image_markers = [f"[Generated chart: {artifact.filename}]" for artifact in created]
+            return f"{result_str}\n\n" + "\n\n".join(image_markers)
         
         return result_str
         
@@ -1,5 +1,6 @@
 from strands import Agent, tool
 from .model_utils import get_current_model
+from .subagent_factory import subagent_factory
 
 GENERAL_ASSISTANT_SYSTEM_PROMPT = """
 You are GeneralAssist, a concise general knowledge assistant for topics outside specialized domains. Your key characteristics are:
@@ -47,12 +48,14 @@ def general_assistant(query: str) -> str:
     try:
         print("Routed to General Assistant")
         
-        general_agent = Agent(
-            system_prompt=GENERAL_ASSISTANT_SYSTEM_PROMPT,
+        with subagent_factory.lease(
+            "general_assistant",
+            Agent,
             model=get_current_model(),
+            system_prompt=GENERAL_ASSISTANT_SYSTEM_PROMPT,
             tools=[],  # No specialized tools needed for general knowledge
-        )
-        agent_response = general_agent(formatted_query)
+        ) as general_agent:
+            agent_response = general_agent(formatted_query)
         text_response = str(agent_response)
 
         if len(text_response) > 0:
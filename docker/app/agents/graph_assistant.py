@@ -30,17 +30,20 @@ def neptune_database_statistics() -> str:
         return f"Error retrieving Neptune statistics: {str(e)}"
 
 @tool
-def neptune_cypher_query(query: str) -> str:
+def neptune_cypher_query(query: str, cursor: str = None) -> str:
     """
     Execute Cypher queries against Neptune graph database.
     
     Args:
         query: Natural language question to convert to Cypher and execute
+        cursor: Optional cursor from a previous result, to answer from its next page of rows
         
     Returns:
         Query results with explanations
     """
     try:
+        if cursor:
+            return execute_neptune_query(query, cursor)
         return execute_neptune_query(query)
     except Exception as e:
         return f"Error executing Neptune query: {str(e)}"
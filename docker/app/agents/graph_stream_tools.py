@@ -0,0 +1,52 @@
+"""
+Async variants of the Neptune query tools.
+
+Strands runs these on the agent's event loop instead of a worker thread:
+neptune_cypher_query streams its progress (the generated Cypher, then the
+first rows as they are decoded) as tool stream events and returns the answer
+as its last message. Set NEPTUNE_ASYNC_TOOLS=false to use the synchronous
+tools from graph_assistant instead.
+"""
+
+import os
+
+from strands import tool
+
+try:
+    from .neptune_tools import get_neptune_statistics_async, stream_neptune_query
+except ImportError:
+    from neptune_tools import get_neptune_statistics_async, stream_neptune_query
+
+NEPTUNE_ASYNC_TOOLS = os.getenv("NEPTUNE_ASYNC_TOOLS", "true").lower() == "true"
+
+@tool
+async def neptune_database_statistics() -> str:
+    """
+    Get Neptune property graph statistics including details on nodes and edges.
+    Use this tool to determine the overall database schema and summary.
+    
+    Returns:
+        Database statistics with node types, edge types, and counts
+    """
+    try:
+        return await get_neptune_statistics_async()
+    except Exception as e:
+        return f"Error retrieving Neptune statistics: {str(e)}"
+
+@tool
+async def neptune_cypher_query(query: str, cursor: str = None):
+    """
+    Execute Cypher queries against Neptune graph database.
+    
+    Args:
+        query: Natural language question to convert to Cypher and execute
+        cursor: Optional cursor from a previous result, to answer from its next page of rows
+        
+    Returns:
+        Query results with explanations
+    """
+    try:
+        async for message in stream_neptune_query(query, cursor):
+            yield message
+    except Exception as e:
+        yield f"Error executing Neptune query: {str(e)}"
@@ -2,6 +2,7 @@ import os
 import boto3
 from strands import Agent, tool
 from .model_utils import get_current_model
+from .subagent_factory import subagent_factory
 
 HELP_ASSISTANT_SYSTEM_PROMPT = """You are a Help assistant specialized in the AI Data Explorer application. You are an expert on:
 
@@ -44,11 +45,13 @@ def help_assistant(query: str) -> str:
         if not kb_id or kb_id == "placeholder-kb-id":
             print("Knowledge base not available, using fallback")
             # Fallback to basic help without KB
-            basic_agent = Agent(
-                system_prompt=HELP_ASSISTANT_SYSTEM_PROMPT + "\n\nNote: Knowledge base is not available, providing general guidance based on training data.",
+            with subagent_factory.lease(
+                "help_assistant",
+                Agent,
                 model=get_current_model(),
-            )
-            response = basic_agent(query)
+                system_prompt=HELP_ASSISTANT_SYSTEM_PROMPT + "\n\nNote: Knowledge base is not available, providing general guidance based on training data.",
+            ) as basic_agent:
+                response = basic_agent(query)
             return str(response)
         
         # Create Bedrock agent client for Knowledge Base queries
@@ -84,21 +87,24 @@ def help_assistant(query: str) -> str:
         if kb_context:
             enhanced_prompt += f"\n\nRelevant documentation context:\n\n{kb_context}\n\nUse this context to provide accurate, specific answers about the AI Data Explorer."
         
-        # Create agent with enhanced context
-        help_agent = Agent(
-            system_prompt=enhanced_prompt,
+        # The KB context varies per query, so a reused agent just gets the new prompt
+        with subagent_factory.lease(
+            "help_assistant",
+            Agent,
             model=get_current_model(),
-        )
-        
-        response = help_agent(query)
+            system_prompt=enhanced_prompt,
+        ) as help_agent:
+            response = help_agent(query)
         return str(response)
         
     except Exception as e:
         print(f"Error in Help Assistant: {e}")
         # Fallback to basic help
-        basic_agent = Agent(
-            system_prompt=HELP_ASSISTANT_SYSTEM_PROMPT + f"\n\nNote: Knowledge base query failed ({str(e)}), providing general guidance.",
+        with subagent_factory.lease(
+            "help_assistant",
+            Agent,
             model=get_current_model(),
-        )
-        response = basic_agent(query)
+            system_prompt=HELP_ASSISTANT_SYSTEM_PROMPT + f"\n\nNote: Knowledge base query failed ({str(e)}), providing general guidance.",
+        ) as basic_agent:
+            response = basic_agent(query)
         return str(response)
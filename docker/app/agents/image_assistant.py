@@ -1,5 +1,9 @@
 from strands import Agent, tool
+from strands.hooks import HookProvider, HookRegistry, AfterToolCallEvent
 from strands_tools import image_reader, generate_image
+from .model_utils import get_current_image_model
+from .subagent_factory import subagent_factory
+from artifact_store import collect_artifacts, register_artifact
 import re
 import os
 import time
@@ -33,7 +37,10 @@ Always use the appropriate tool based on the user's request - image_reader for a
 """
 
 def cleanup_old_images(output_dir, max_age_hours=24):
-    """Remove images older than max_age_hours from output directory."""
+    """Remove images older than max_age_hours from output directory.
+    
+    Not called per request - the artifact janitor expires generated images on a schedule.
+    """
     if not os.path.exists(output_dir):
         return
     
@@ -52,6 +59,24 @@ def cleanup_old_images(output_dir, max_age_hours=24):
     except Exception as e:
         print(f"Error during image cleanup: {e}")
 
+class GeneratedImageRegistrar(HookProvider):
+    """Registers files written by generate_image as artifacts of the current request"""
+    
+    SAVED_PATH = re.compile(r'saved locally to (.+?)\. ')
+    
+    def register_hooks(self, registry: HookRegistry) -> None:
+        registry.add_callback(AfterToolCallEvent, self.register_image)
+    
+    def register_image(self, event: AfterToolCallEvent) -> None:
+        if event.tool_use["name"] != "generate_image" or not event.result:
+            return
+        if event.result.get("status") != "success":
+            return
+        for item in event.result.get("content", []):
+            match = self.SAVED_PATH.search(item.get("text", "")) if isinstance(item, dict) else None
+            if match:
+                register_artifact(os.path.abspath(match.group(1)), kind="generated_image")
+
 @tool
 def image_assistant(query: str) -> str:
     """
@@ -76,43 +101,25 @@ def image_assistant(query: str) -> str:
             # Modify the query to use the image_reader tool without showing the path
             query = f"{clean_query} Use the image_reader tool to read the image at path: {file_path}"
         
-        # Import current_image_model here to avoid circular imports
-        from app import current_image_model
-        
-        # Create dynamic system prompt with current model
+        # Create dynamic system prompt with the image model selected for this request
+        current_image_model = get_current_image_model()
         dynamic_prompt = IMAGE_ASSISTANT_SYSTEM_PROMPT + f"\n\nIMPORTANT: When calling generate_image, always use model_id='{current_image_model}'"
         
-        image_agent = Agent(
+        # generate_image results are registered as they complete - no output/ scan needed
+        with subagent_factory.lease(
+            "image_assistant",
+            Agent,
             system_prompt=dynamic_prompt,
-            tools=[image_reader, generate_image]
-        )
-        
-        agent_response = image_agent(query)
+            tools=[image_reader, generate_image],
+            hooks=[GeneratedImageRegistrar()]
+        ) as image_agent, collect_artifacts() as created:
+            agent_response = image_agent(query)
         text_response = str(agent_response)
         
-        # Check if generate_image tool was used by checking tool metrics
-        is_generation_request = False
-        if hasattr(agent_response, 'metrics') and agent_response.metrics.tool_metrics:
-            if 'generate_image' in agent_response.metrics.tool_metrics:
-                is_generation_request = True
-        
-        if is_generation_request:
-            # Try to find the generated image file
-            output_dir = os.path.join(os.getcwd(), 'output')
-            
-            # Clean up old images before processing new ones
-            cleanup_old_images(output_dir)
-            
-            if os.path.exists(output_dir):
-                # Get the most recent image file
-                image_files = [f for f in os.listdir(output_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-                if image_files:
-                    # Sort by modification time, get most recent
-                    image_files.sort(key=lambda x: os.path.getmtime(os.path.join(output_dir, x)), reverse=True)
-                    latest_image = image_files[0]
-                    
-                    # Return a special marker that the streaming handler can replace
-                    return f"{text_response}\n\n[Generated image: {latest_image}]"
+        if created:
+            # Return a special marker that the streaming handler can replace
+            markers = "\n\n".join(f"[Generated image: {artifact.filename}]" for artifact in created)
+            return f"{text_response}\n\n{markers}"
         
         return text_response
         
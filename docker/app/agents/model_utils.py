@@ -1,10 +1,101 @@
-"""Utility functions for agent model configuration"""
+"""Utility functions for agent model configuration
 
-def get_current_model():
-    """Get the current model from app or environment"""
+Model selection is request scoped: the streaming endpoint resolves the caller's
+chat, Neptune and image models into a ModelSelection and activates it with
+use_model_selection(). The supervisor and every sub-agent read it back through
+the get_current_* helpers, which follow the request into tool threads because
+asyncio and strands copy the active context.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+DEFAULT_CHAT_MODEL = "us.anthropic.claude-sonnet-4-20250514-v1:0"
+DEFAULT_NEPTUNE_MODEL = "us.anthropic.claude-sonnet-4-20250514-v1:0"
+DEFAULT_IMAGE_MODEL = "stability.stable-image-core-v1:1"
+
+
+@dataclass(frozen=True)
+class ModelSelection:
+    """Models used to serve one request"""
+    chat_model: str
+    neptune_model: str
+    image_model: str
+
+    def with_overrides(self, chat_model: str = None, neptune_model: str = None, image_model: str = None):
+        """Return a copy with any non-empty overrides applied"""
+        changes = {
+            name: value for name, value in (
+                ("chat_model", chat_model),
+                ("neptune_model", neptune_model),
+                ("image_model", image_model),
+            ) if value
+        }
+        return replace(self, **changes) if changes else self
+
+
+def default_model_selection() -> ModelSelection:
+    """Service-wide defaults (AGENT_MODEL overrides the chat model, e.g. for evaluation)"""
+    return ModelSelection(
+        chat_model=os.getenv("AGENT_MODEL", DEFAULT_CHAT_MODEL),
+        neptune_model=DEFAULT_NEPTUNE_MODEL,
+        image_model=DEFAULT_IMAGE_MODEL,
+    )
+
+
+_active_selection: ContextVar[Optional[ModelSelection]] = ContextVar("model_selection", default=None)
+
+# Per-user selections made through /set-models
+_user_selections: Dict[str, ModelSelection] = {}
+_user_selections_lock = threading.Lock()
+
+
+def get_user_model_selection(user_id: str) -> ModelSelection:
+    """Get the models a user has selected, falling back to the defaults"""
+    with _user_selections_lock:
+        selection = _user_selections.get(user_id)
+    return selection or default_model_selection()
+
+
+def set_user_model_selection(user_id: str, chat_model: str = None, neptune_model: str = None,
+                             image_model: str = None) -> ModelSelection:
+    """Update a user's selected models without affecting anyone else"""
+    with _user_selections_lock:
+        current = _user_selections.get(user_id) or default_model_selection()
+        selection = current.with_overrides(chat_model, neptune_model, image_model)
+        _user_selections[user_id] = selection
+    return selection
+
+
+def get_model_selection() -> ModelSelection:
+    """Get the model selection for the current request"""
+    return _active_selection.get() or default_model_selection()
+
+
+@contextmanager
+def use_model_selection(selection: ModelSelection):
+    """Make selection the active model configuration for the enclosed work"""
+    token = _active_selection.set(selection)
     try:
-        from app import current_chat_model
-        return current_chat_model
-    except ImportError:
-        import os
-        return os.getenv("AGENT_MODEL", None)
+        yield selection
+    finally:
+        _active_selection.reset(token)
+
+
+def get_current_model():
+    """Get the chat model for the current request"""
+    return get_model_selection().chat_model
+
+
+def get_current_neptune_model():
+    """Get the Neptune query model for the current request"""
+    return get_model_selection().neptune_model
+
+
+def get_current_image_model():
+    """Get the image generation model for the current request"""
+    return get_model_selection().image_model
@@ -1,16 +1,49 @@
 import os
 import json
-import urllib3
+import time
+import asyncio
+import hashlib
 import boto3
-from botocore.auth import SigV4Auth
-from botocore.awsrequest import AWSRequest
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from neptune_http import get_async_neptune_client, get_neptune_client
+
+try:
+    from .cypher_cache import cypher_result_cache, cypher_translation_cache, is_read_only
+except ImportError:
+    from cypher_cache import cypher_result_cache, cypher_translation_cache, is_read_only
+
+try:
+    from .cypher_governor import cypher_governor
+except ImportError:
+    from cypher_governor import cypher_governor
 
 logger = logging.getLogger(__name__)
 
 # Module level variables for connection caching
 _graph_connection = None
-_qa_chain = None
+_qa_chains = {}  # QA chains keyed by Neptune model id
+_answer_chains = {}  # Answer-phrasing prompt | llm, keyed by Neptune model id
+_cypher_chains = {}  # Cypher-generation prompt | llm, keyed by Neptune model id
+
+# Rows of query results passed to the answer-phrasing LLM (one page, CYPHER_PAGE_ROWS)
+QA_TOP_K = cypher_governor.page_rows
+# Page returned by the last graph query in this context, for the row note in tool results
+_last_page = ContextVar("neptune_last_page", default=None)
+# Set while running LLM-generated Cypher; NeptuneGraph's own schema queries are not governed
+_governing = ContextVar("neptune_governing", default=False)
+
+# Schema fingerprint for the Cypher translation cache, re-checked every CYPHER_CACHE_SCHEMA_CHECK_SECONDS
+SCHEMA_CHECK_SECONDS = float(os.getenv("CYPHER_CACHE_SCHEMA_CHECK_SECONDS", "300"))
+_schema_fingerprint = None
+_schema_checked_at = 0.0
+
+# Bulk loads in these states have not changed the graph yet
+ACTIVE_LOAD_STATUSES = {'LOAD_NOT_STARTED', 'LOAD_IN_QUEUE', 'LOAD_IN_PROGRESS'}
+LOAD_LOG_CHECK_SECONDS = float(os.getenv("CYPHER_RESULT_CACHE_LOAD_CHECK_SECONDS", "60"))
+_finished_loads = set()
+_load_log_checked_at = None
 
 # Enhanced Cypher template with better rules and structure
 CYPHER_CUSTOM_TEMPLATE = """<Instructions>
@@ -69,6 +102,8 @@ def get_graph_connection():
                 use_https=True,
                 region_name=os.environ.get('AWS_REGION', 'us-east-1')
             )
+            # Every query - from the QA chain or a cached translation - goes through the result cache
+            _graph_connection.query = _with_result_cache(_graph_connection.query)
             logger.info("Neptune connection established successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Neptune connection: {str(e)}")
@@ -76,11 +111,99 @@ def get_graph_connection():
     
     return _graph_connection
 
+def _observe_finished_loads(load_ids, reason: str):
+    """Start a new graph generation if any of load_ids finished since last seen."""
+    new_loads = set(load_ids) - _finished_loads
+    if new_loads:
+        _finished_loads.update(new_loads)
+        cypher_result_cache.bump_generation(reason)
+
+def _check_bulk_load_log():
+    """Look for newly finished loads in the BULK_LOAD_LOG table, at most every LOAD_LOG_CHECK_SECONDS."""
+    global _load_log_checked_at
+    table_name = os.environ.get('BULK_LOAD_LOG')
+    if not table_name:
+        return
+    first_check = _load_log_checked_at is None
+    if not first_check and time.monotonic() - _load_log_checked_at < LOAD_LOG_CHECK_SECONDS:
+        return
+    _load_log_checked_at = time.monotonic()
+    
+    try:
+        table = boto3.resource('dynamodb').Table(table_name)
+        scan_kwargs = {'ProjectionExpression': 'loadId, loadStatus'}
+        finished = []
+        while True:
+            page = table.scan(**scan_kwargs)
+            finished.extend(item['loadId'] for item in page.get('Items', [])
+                            if item.get('loadStatus') not in ACTIVE_LOAD_STATUSES)
+            if 'LastEvaluatedKey' not in page:
+                break
+            scan_kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+    except Exception as e:
+        logger.warning(f"Could not read bulk load log: {e}")
+        return
+    
+    if first_check:
+        # Loads that finished before startup predate every cached result
+        _finished_loads.update(finished)
+    else:
+        _observe_finished_loads(finished, "bulk load finished")
+
+@contextmanager
+def _governed_queries():
+    """Run graph queries made in this block through the Cypher governor."""
+    token = _governing.set(True)
+    try:
+        yield
+    finally:
+        _governing.reset(token)
+
+def _with_result_cache(run_query):
+    """Wrap a graph connection's query method with the result cache, and the Cypher governor when governing."""
+    def query(cypher: str, params: dict = None, skip: int = 0):
+        governed = cypher_governor.govern(cypher, skip) if _governing.get() else None
+        if governed is not None:
+            cypher = governed.cypher
+        _check_bulk_load_log()
+        result = cypher_result_cache.get(cypher, params)
+        if result is not None:
+            logger.info("Using cached Cypher result")
+        else:
+            generation = cypher_result_cache.generation
+            result = run_query(cypher, params) if params else run_query(cypher)
+            if is_read_only(cypher):
+                cypher_result_cache.put(cypher, result, params, generation)
+            else:
+                cypher_result_cache.bump_generation("write statement")
+        
+        if governed is None:
+            return result
+        page = cypher_governor.page(governed, result)
+        _last_page.set(page)
+        return page.rows
+    return query
+
+def _page_note():
+    """Row note for the last graph query's page, or an empty string when nothing was left out."""
+    page = _last_page.get()
+    note = page.note() if page is not None else ""
+    return f"{note}\n\n" if note else ""
+
+def _current_neptune_model():
+    """Get the Neptune query model selected for the current request."""
+    try:
+        from .model_utils import get_current_neptune_model
+    except ImportError:
+        from model_utils import get_current_neptune_model
+    return get_current_neptune_model()
+
 def get_qa_chain():
-    """Initialize and return a QA chain with caching."""
-    global _qa_chain
+    """Initialize and return a QA chain for the current Neptune model with caching."""
+    llm_model = _current_neptune_model()
+    qa_chain = _qa_chains.get(llm_model)
     
-    if _qa_chain is None:
+    if qa_chain is None:
         logger.info('Initializing Neptune QA chain')
         
         try:
@@ -88,14 +211,6 @@ def get_qa_chain():
             from langchain.chains import NeptuneOpenCypherQAChain
             from langchain_core.prompts import PromptTemplate
             
-            # Use dynamic Neptune model from app configuration
-            try:
-                from app import current_neptune_model
-                llm_model = current_neptune_model
-            except ImportError:
-                # Fallback if import fails
-                llm_model = os.environ.get('AGENT_MODEL', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
-            
             llm = ChatBedrockConverse(
                 model=llm_model,
                 temperature=0.01,  # Lower temperature for consistency
@@ -112,24 +227,80 @@ def get_qa_chain():
             cypher_prompt = PromptTemplate(input_variables=["schema", "question"], template=CYPHER_CUSTOM_TEMPLATE)
 
             # Create the QA chain
-            _qa_chain = NeptuneOpenCypherQAChain.from_llm(
+            qa_chain = NeptuneOpenCypherQAChain.from_llm(
                 llm=llm,
                 graph=graph,
                 qa_prompt=qa_prompt,
                 cypher_prompt=cypher_prompt,
                 verbose=True,
-                top_K=10,
+                top_K=QA_TOP_K,
                 return_intermediate_steps=True,
                 return_direct=False,
                 allow_dangerous_requests=True
             )
+            _qa_chains[llm_model] = qa_chain
+            _answer_chains[llm_model] = qa_prompt | llm
+            _cypher_chains[llm_model] = cypher_prompt | llm
             logger.info("Neptune QA chain successfully created")
             
         except Exception as e:
             logger.error(f"Failed to initialize QA chain: {str(e)}")
             raise
     
-    return _qa_chain
+    return qa_chain
+
+def get_answer_chain():
+    """Answer-phrasing half of the QA chain, for questions whose Cypher is already known."""
+    llm_model = _current_neptune_model()
+    if llm_model not in _answer_chains:
+        get_qa_chain()
+    return _answer_chains[llm_model]
+
+def get_cypher_chain():
+    """Cypher-generation half of the QA chain, for the async query path."""
+    llm_model = _current_neptune_model()
+    if llm_model not in _cypher_chains:
+        get_qa_chain()
+    return _cypher_chains[llm_model]
+
+def _extract_cypher(text: str) -> str:
+    """Cypher from an LLM reply, without markdown code fences."""
+    return text.strip().replace('```cypher', '').replace('```', '').strip()
+
+def _request_statistics_summary():
+    """Signed GET of the property graph statistics summary; returns the urllib3 response."""
+    return get_neptune_client().request('GET', '/propertygraph/statistics/summary?mode=basic')
+
+def _observe_statistics(payload: dict):
+    """Update the schema fingerprint from a statistics summary payload."""
+    global _schema_fingerprint, _schema_checked_at
+    fingerprint = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    if _schema_fingerprint is not None and fingerprint != _schema_fingerprint:
+        cypher_result_cache.bump_generation("statistics changed")
+        # Cypher generation should see the new schema too
+        if _graph_connection is not None and hasattr(_graph_connection, '_refresh_schema'):
+            try:
+                _graph_connection._refresh_schema()
+            except Exception as e:
+                logger.warning(f"Could not refresh Neptune schema: {e}")
+    _schema_fingerprint = fingerprint
+    _schema_checked_at = time.monotonic()
+
+def schema_fingerprint() -> str:
+    """Fingerprint of the Neptune statistics, re-checked at most every SCHEMA_CHECK_SECONDS."""
+    global _schema_checked_at
+    neptune_host = os.environ.get('NEPTUNE_HOST')
+    if neptune_host and (_schema_fingerprint is None or time.monotonic() - _schema_checked_at > SCHEMA_CHECK_SECONDS):
+        _schema_checked_at = time.monotonic()
+        try:
+            response = _request_statistics_summary()
+            if response.status == 200:
+                _observe_statistics(json.loads(response.data.decode('utf-8'))['payload'])
+            else:
+                logger.warning(f"Could not fingerprint Neptune schema (HTTP {response.status})")
+        except Exception as e:
+            logger.warning(f"Could not fingerprint Neptune schema: {e}")
+    return _schema_fingerprint or "unknown"
 
 def get_neptune_statistics():
     """
@@ -141,33 +312,26 @@ def get_neptune_statistics():
         if not neptune_host:
             return "Neptune host not configured. Set NEPTUNE_HOST environment variable."
         
-        neptune_port = os.environ.get('NEPTUNE_PORT', '8182')
-        region = os.environ.get('AWS_REGION', 'us-east-1')
-        
-        neptune_endpoint = f"https://{neptune_host}:{neptune_port}/propertygraph/statistics/summary?mode=basic"
-        
-        # Create a signed request
-        session = boto3.Session()
-        credentials = session.get_credentials()
-        request = AWSRequest(method='GET', url=neptune_endpoint)
-        SigV4Auth(credentials, 'neptune-db', region).add_auth(request)
-        
-        # Send the request with urllib3
-        http = urllib3.PoolManager()
-        request.headers['Content-Type'] = 'application/json'
-        response = http.request(
-            'GET',
-            request.url,
-            body=request.data,
-            headers=dict(request.headers)
-        )
+        response = _request_statistics_summary()
         
         if response.status == 200:
-            resp = json.loads(response.data.decode('utf-8'))
-            graph_summary = resp['payload']['graphSummary']
-            last_updated = resp['payload']['lastStatisticsComputationTime']
+            return _format_statistics(json.loads(response.data.decode('utf-8')))
+        
+        else:
+            error_msg = response.data.decode('utf-8')
+            return f"Error retrieving Neptune statistics (HTTP {response.status}): {error_msg}"
             
-            return f"""**Neptune Database Statistics**
+    except Exception as e:
+        logger.error(f"Neptune statistics error: {e}")
+        return f"Error retrieving Neptune statistics: {str(e)}"
+
+def _format_statistics(resp: dict) -> str:
+    """Observe and format a statistics summary response."""
+    _observe_statistics(resp['payload'])
+    graph_summary = resp['payload']['graphSummary']
+    last_updated = resp['payload']['lastStatisticsComputationTime']
+    
+    return f"""**Neptune Database Statistics**
 
 **Last Updated:** {last_updated}
 
@@ -177,19 +341,90 @@ def get_neptune_statistics():
 ```
 
 **Status:** ✅ Successfully retrieved Neptune statistics"""
+
+async def get_neptune_statistics_async():
+    """
+    Async variant of get_neptune_statistics using the event loop's Neptune client.
+    """
+    try:
+        if not os.environ.get('NEPTUNE_HOST'):
+            return "Neptune host not configured. Set NEPTUNE_HOST environment variable."
         
-        else:
-            error_msg = response.data.decode('utf-8')
-            return f"Error retrieving Neptune statistics (HTTP {response.status}): {error_msg}"
-            
+        response = await get_async_neptune_client().request('GET', '/propertygraph/statistics/summary?mode=basic')
+        if response.status_code == 200:
+            return _format_statistics(response.json())
+        return f"Error retrieving Neptune statistics (HTTP {response.status_code}): {response.text}"
+    
     except Exception as e:
         logger.error(f"Neptune statistics error: {e}")
         return f"Error retrieving Neptune statistics: {str(e)}"
 
-def execute_neptune_query(query: str):
+def _execute_cached_translation(query: str, fingerprint: str):
+    """Answer query with previously generated Cypher, skipping Cypher generation; None on a miss."""
+    cypher_query = cypher_translation_cache.get(query, fingerprint)
+    if cypher_query is None:
+        return None
+    
+    try:
+        logger.info(f"Using cached Cypher translation (hit rate {cypher_translation_cache.stats()['hit_rate']:.0%})")
+        with _governed_queries():
+            context = get_graph_connection().query(cypher_query)
+        result = get_answer_chain().invoke({"context": context, "question": query}).content
+    except Exception as e:
+        # The translation may no longer fit the graph - regenerate it
+        logger.warning(f"Cached Cypher translation failed, regenerating: {e}")
+        cypher_translation_cache.discard(query)
+        return None
+    
+    return f"""**Generated Cypher Query:**
+```cypher
+{cypher_query}
+```
+
+**Query Results:**
+{result}
+
+{_page_note()}**Status:** ✅ Successfully executed against Neptune cluster (cached translation)"""
+
+def _execute_page(query: str, cursor: str):
+    """Answer query from the next page of a previous result."""
+    resumed = cypher_governor.resume(cursor)
+    if resumed is None:
+        return f"Cursor {cursor} is unknown or has expired. Ask the question again to start from the first page."
+    cypher_query, skip = resumed
+    
+    try:
+        with _governed_queries():
+            context = get_graph_connection().query(cypher_query, skip=skip)
+        result = get_answer_chain().invoke({"context": context, "question": query}).content
+    except Exception as e:
+        logger.error(f"Neptune page query error: {e}")
+        return f"Error executing Neptune query: {str(e)}"
+    
+    return f"""**Cypher Query:**
+```cypher
+{cypher_query}
+```
+
+**Query Results:**
+{result}
+
+{_page_note()}**Status:** ✅ Successfully executed against Neptune cluster"""
+
+def execute_neptune_query(query: str, cursor: str = None):
     """
     Execute Cypher queries against Neptune using enhanced QA chain.
+    With a cursor from a previous result, answer from the next page of that result instead.
     """
+    _last_page.set(None)
+    if cursor:
+        return _execute_page(query, cursor)
+    
+    fingerprint = schema_fingerprint()
+    cached_result = _execute_cached_translation(query, fingerprint)
+    if cached_result is not None:
+        return cached_result
+    
     try:
         logger.info("Executing Neptune query with QA chain")
         
@@ -198,12 +433,15 @@ def execute_neptune_query(query: str):
         
         # Execute the query
         logger.info(f"Processing query: {query}")
-        output = qa_chain.invoke(query)
+        with _governed_queries():
+            output = qa_chain.invoke(query)
         
         # Extract results and intermediate steps
         if 'intermediate_steps' in output and output['intermediate_steps']:
             cypher_query = output['intermediate_steps'][0].get('query', 'Query not available')
             result = output.get('result', 'No result available')
+            if 'query' in output['intermediate_steps'][0]:
+                cypher_translation_cache.put(query, fingerprint, cypher_query)
             
             return f"""**Generated Cypher Query:**
 ```cypher
@@ -213,7 +451,7 @@ def execute_neptune_query(query: str):
 **Query Results:**
 {result}
 
-**Status:** ✅ Successfully executed against Neptune cluster"""
+{_page_note()}**Status:** ✅ Successfully executed against Neptune cluster"""
         else:
             return f"""**Query Results:**
 {output.get('result', 'No result available')}
@@ -227,13 +465,8 @@ def execute_neptune_query(query: str):
         try:
             from langchain_aws import ChatBedrockConverse
             
-            # Use dynamic Neptune model from app configuration
-            try:
-                from app import current_neptune_model
-                model_id = current_neptune_model
-            except ImportError:
-                # Fallback if import fails
-                model_id = os.environ.get('AGENT_MODEL', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
+            # Use the Neptune model selected for this request
+            model_id = _current_neptune_model()
             
             llm = ChatBedrockConverse(
                 model=model_id,
@@ -257,7 +490,8 @@ def execute_neptune_query(query: str):
             
             # Execute with direct graph connection
             graph = get_graph_connection()
-            result = graph.query(cypher_query)
+            with _governed_queries():
+                result = graph.query(cypher_query)
             
             return f"""**Generated Cypher Query:**
 ```cypher
@@ -269,12 +503,80 @@ def execute_neptune_query(query: str):
 {result}
 ```
 
-**Status:** ✅ Successfully executed against Neptune cluster (fallback mode)"""
+{_page_note()}**Status:** ✅ Successfully executed against Neptune cluster (fallback mode)"""
             
         except Exception as fallback_error:
             logger.error(f"Fallback query execution failed: {fallback_error}")
             return f"Error executing Neptune query: {str(e)}"
 
+async def stream_neptune_query(query: str, cursor: str = None):
+    """
+    Async variant of execute_neptune_query that reads results over the openCypher HTTP endpoint.
+    
+    Yields progress messages - the Cypher, then the first QA_TOP_K rows as they are decoded -
+    and finally the formatted answer. Blocking setup (schema fingerprint, chain construction)
+    runs on worker threads; Cypher generation, the query and answer phrasing do not hold one.
+    If anything fails before the answer, the synchronous QA chain path answers instead.
+    Pages after the first (with a cursor) are answered by execute_neptune_query.
+    """
+    if cursor:
+        yield await asyncio.to_thread(execute_neptune_query, query, cursor)
+        return
+    
+    cypher_query, cached_translation = None, False
+    try:
+        fingerprint = await asyncio.to_thread(schema_fingerprint)
+        cypher_query = cypher_translation_cache.get(query, fingerprint)
+        cached_translation = cypher_query is not None
+        if not cached_translation:
+            cypher_chain = await asyncio.to_thread(get_cypher_chain)
+            schema = await asyncio.to_thread(lambda: get_graph_connection().get_schema)
+            reply = await cypher_chain.ainvoke({"question": query, "schema": schema})
+            cypher_query = _extract_cypher(reply.content)
+        yield f"Generated Cypher: {cypher_query}"
+        
+        governed = cypher_governor.govern(cypher_query)
+        await asyncio.to_thread(_check_bulk_load_log)
+        rows = cypher_result_cache.get(governed.cypher)
+        if rows is None:
+            generation = cypher_result_cache.generation
+            rows = []
+            async for row in get_async_neptune_client().stream_opencypher(governed.cypher):
+                rows.append(row)
+                if len(rows) <= QA_TOP_K:
+                    yield f"Row {len(rows)}: {json.dumps(row, default=str)}"
+                else:
+                    break  # The row after the page only tells that more exist
+            if is_read_only(governed.cypher):
+                cypher_result_cache.put(governed.cypher, rows, generation=generation)
+            else:
+                cypher_result_cache.bump_generation("write statement")
+        if not cached_translation:
+            cypher_translation_cache.put(query, fingerprint, cypher_query)
+        
+        page = cypher_governor.page(governed, rows)
+        _last_page.set(page)
+        answer_chain = await asyncio.to_thread(get_answer_chain)
+        result = (await answer_chain.ainvoke({"context": page.rows, "question": query})).content
+        note = " (cached translation)" if cached_translation else ""
+    except Exception as e:
+        logger.warning(f"Async Neptune query failed, using the QA chain: {e}")
+        if cached_translation:
+            # The translation may no longer fit the graph - regenerate it
+            cypher_translation_cache.discard(query)
+        yield await asyncio.to_thread(execute_neptune_query, query)
+        return
+    
+    yield f"""**Generated Cypher Query:**
+```cypher
+{cypher_query}
+```
+
+**Query Results:**
+{result}
+
+{_page_note()}**Status:** ✅ Successfully executed against Neptune cluster{note}"""
+
 def get_bulk_load_status(load_id: str = None):
     """
     Check the status of Neptune bulk load operations.
@@ -284,30 +586,19 @@ def get_bulk_load_status(load_id: str = None):
         if not neptune_host:
             return "Neptune host not configured. Set NEPTUNE_HOST environment variable."
         
-        neptune_port = os.environ.get('NEPTUNE_PORT', '8182')
-        region = os.environ.get('AWS_REGION', 'us-east-1')
-        
         if load_id:
-            endpoint = f"https://{neptune_host}:{neptune_port}/loader/{load_id}?details=true&errors=true&page=1&errorsPerPage=1000"
+            path = f"/loader/{load_id}?details=true&errors=true&page=1&errorsPerPage=1000"
         else:
-            endpoint = f"https://{neptune_host}:{neptune_port}/loader"
-        
-        # Create a signed request
-        session = boto3.Session()
-        credentials = session.get_credentials()
-        request = AWSRequest(method='GET', url=endpoint)
-        SigV4Auth(credentials, 'neptune-db', region).add_auth(request)
+            path = "/loader"
         
-        # Send the request
-        http = urllib3.PoolManager()
-        response = http.request(
-            'GET',
-            request.url,
-            headers=dict(request.headers)
-        )
+        response = get_neptune_client().request('GET', path)
         
         if response.status == 200:
             resp = json.loads(response.data.decode('utf-8'))
+            if load_id:
+                status = resp.get('payload', {}).get('overallStatus', {}).get('status')
+                if status and status not in ACTIVE_LOAD_STATUSES:
+                    _observe_finished_loads([load_id], f"bulk load {load_id} {status}")
             return f"""**Neptune Bulk Load Status**
 
 ```json
@@ -356,6 +647,8 @@ def start_bulk_load(source_s3_prefix: str):
         )
         
         if response['StatusCode'] == 200:
+            # The loader waits for the load to finish before responding
+            cypher_result_cache.bump_generation(f"bulk load from {source_s3_prefix}")
             result = json.loads(response['Payload'].read())
             
             # Extract the actual response from the Lambda response structure
@@ -0,0 +1,271 @@
+"""
+Local pre-routing of unambiguous queries.
+
+The supervisor's first model call mostly just picks one tool, and the routing
+rules in SUPERVISOR_SYSTEM_PROMPT are largely keyword driven. PreRouter applies
+those keywords as rules, backed by a small TF-IDF nearest-centroid classifier
+built from the evaluation test cases, and dispatches high-confidence queries
+straight to the specialist. Everything else (compound questions, follow-ups,
+low confidence) still goes to the supervisor.
+
+PREROUTER_MODE selects the behaviour: "off", "shadow" (default - decide and
+record, but always use the supervisor) or "dispatch". Every decision is logged
+as JSON and compared with the tools the supervisor actually used, so the local
+router's agreement with the LLM router can be measured before dispatching.
+Nothing is dispatched while guardrails are enforced (GUARDRAIL_MODE=enforce),
+because only the supervisor's protected model applies them.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import math
+import os
+import re
+import threading
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from strands.hooks import AfterInvocationEvent, MessageAddedEvent
+
+logger = logging.getLogger(__name__)
+
+# Specialists that take the user's question as their only argument
+ROUTABLE_TOOLS = {
+    "supply_chain_assistant", "tariff_assistant", "data_visualizer_assistant",
+    "image_assistant", "help_assistant", "schema_translator", "neptune_cypher_query",
+}
+
+# Evaluation labels that name a module rather than its tool
+LABEL_ALIASES = {"schema_assistant": "schema_translator"}
+
+ROUTING_RULES: List[Tuple[str, re.Pattern]] = [
+    ("tariff_assistant", re.compile(r"\b(tariffs?|hts( codes?)?|harmoni[sz]ed tariff|duty rates?|customs duty|import duty)\b", re.I)),
+    ("supply_chain_assistant", re.compile(r"\b(weather|forecast|temperature|rain(fall)?|snow|uv index)\b", re.I)),
+    ("neptune_cypher_query", re.compile(r"\b(cypher|opencypher)\b|\bMATCH\s*\(", re.I)),
+    ("data_visualizer_assistant", re.compile(r"\b((bar|pie|line|scatter) (chart|graph)|charts?|word ?clouds?|visuali[sz](e|ation))\b", re.I)),
+    ("image_assistant", re.compile(r"\b(generate|create|draw|make|paint)\b.{0,20}\b(image|picture|photo|illustration|drawing)\b", re.I)),
+    ("schema_translator", re.compile(r"\bcreate\s+table\b.*\bgraph\b|\bgraph\b.*\bcreate\s+table\b", re.I | re.S)),
+    ("help_assistant", re.compile(r"\b(deploy|install|set ?up|configure|troubleshoot)\b.{0,40}\b(this app(lication)?|ai data explorer)\b", re.I)),
+]
+
+# Questions that lean on earlier turns need the supervisor's memory context
+FOLLOW_UP = re.compile(r"\b(it|that|those|these|them|previous|above|again|earlier|same)\b", re.I)
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in",
+    "is", "me", "my", "of", "on", "or", "please", "show", "the", "this", "to", "what", "whats",
+    "when", "where", "which", "with", "you",
+}
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN.findall(text.lower().replace("'", "")) if token not in STOP_WORDS]
+
+
+class TfidfRouter:
+    """Nearest-centroid TF-IDF classifier over labelled example queries"""
+
+    def __init__(self, examples: Iterable[Tuple[str, str]]):
+        documents = [(tokenize(query), label) for query, label in examples]
+        document_frequency = Counter(token for tokens, _ in documents for token in set(tokens))
+        total = len(documents)
+        self.idf = {token: math.log((1 + total) / (1 + count)) + 1 for token, count in document_frequency.items()}
+
+        sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for tokens, label in documents:
+            for token, weight in self._vector(tokens).items():
+                sums[label][token] += weight
+        self.centroids = {label: self._normalize(vector) for label, vector in sums.items()}
+
+    def _vector(self, tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(token for token in tokens if token in self.idf)
+        return self._normalize({token: count * self.idf[token] for token, count in counts.items()})
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {token: weight / norm for token, weight in vector.items()} if norm else {}
+
+    def classify(self, text: str) -> List[Tuple[str, float]]:
+        """Labels with their cosine similarity to the query, best first"""
+        vector = self._vector(tokenize(text))
+        scores = [
+            (label, sum(weight * centroid.get(token, 0.0) for token, weight in vector.items()))
+            for label, centroid in self.centroids.items()
+        ]
+        return sorted(scores, key=lambda score: score[1], reverse=True)
+
+
+def load_routing_examples(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """(query, tool) pairs from the first evaluation test case file found"""
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r") as f:
+                cases = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load routing examples from {path}: {e}")
+            continue
+        return [
+            (case["query"], LABEL_ALIASES.get(case["expected_agent"], case["expected_agent"]))
+            for case in cases if case.get("query") and case.get("expected_agent")
+        ]
+    return []
+
+
+def _default_example_paths() -> List[str]:
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return [
+        os.getenv("PREROUTER_EXAMPLES_PATH", ""),
+        os.path.join(app_dir, "routing_examples.json"),  # Copied into the image by the Dockerfile
+        os.path.join(app_dir, "..", "..", "evaluation", "test_cases.json"),
+    ]
+
+
+@dataclass
+class RoutingDecision:
+    """Outcome of pre-routing one prompt"""
+    tool: Optional[str]
+    confidence: float
+    source: str  # "rule", "classifier" or "none"
+    dispatch: bool = False
+    reason: str = ""
+
+
+class PreRouter:
+    """Rule and classifier based routing in front of the supervisor, with agreement tracking"""
+
+    def __init__(self, mode: Optional[str] = None, min_confidence: Optional[float] = None,
+                 min_margin: Optional[float] = None, examples: Optional[List[Tuple[str, str]]] = None):
+        self.mode = (mode or os.getenv("PREROUTER_MODE", "shadow")).lower()
+        self.min_confidence = min_confidence if min_confidence is not None else float(os.getenv("PREROUTER_MIN_CONFIDENCE", "0.5"))
+        self.min_margin = min_margin if min_margin is not None else float(os.getenv("PREROUTER_MIN_MARGIN", "0.15"))
+        if examples is None and self.mode != "off":
+            examples = load_routing_examples(_default_example_paths())
+        self.classifier = TfidfRouter(examples) if examples else None
+        self.guardrails_enforced = bool(os.getenv("BEDROCK_GUARDRAIL_ID")) and os.getenv("GUARDRAIL_MODE") == "enforce"
+        self._lock = threading.Lock()
+        self.counts = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("shadow", "dispatch")
+
+    def decide(self, prompt: str) -> RoutingDecision:
+        """Pick a specialist for prompt, or explain why the supervisor should handle it"""
+        if FOLLOW_UP.search(prompt):
+            return RoutingDecision(None, 0.0, "none", reason="follow_up")
+
+        matched = {tool for tool, pattern in ROUTING_RULES if pattern.search(prompt)}
+        if len(matched) == 1:
+            return RoutingDecision(matched.pop(), 0.95, "rule")
+        if len(matched) > 1:
+            # Compound question - the supervisor fans out to several specialists
+            return RoutingDecision(None, 0.0, "none", reason="multiple_rules")
+
+        if self.classifier is None:
+            return RoutingDecision(None, 0.0, "none", reason="no_classifier")
+        scores = self.classifier.classify(prompt)
+        best, score = scores[0] if scores else (None, 0.0)
+        runner_up = scores[1][1] if len(scores) > 1 else 0.0
+        if score < self.min_confidence:
+            return RoutingDecision(best, round(score, 3), "classifier", reason="low_confidence")
+        if score - runner_up < self.min_margin:
+            return RoutingDecision(best, round(score, 3), "classifier", reason="ambiguous")
+        return RoutingDecision(best, round(score, 3), "classifier")
+
+    def route(self, prompt: str) -> RoutingDecision:
+        """Decide and, in dispatch mode, mark routable high-confidence decisions for direct dispatch"""
+        if not self.enabled:
+            return RoutingDecision(None, 0.0, "none", reason="disabled")
+        decision = self.decide(prompt)
+        if decision.tool is not None and not decision.reason:
+            if decision.tool not in ROUTABLE_TOOLS:
+                decision.reason = "not_routable"
+            elif self.guardrails_enforced:
+                # A dispatched prompt and its answer would never pass through the guardrail
+                decision.reason = "guardrail_enforce"
+            else:
+                decision.dispatch = self.mode == "dispatch"
+        with self._lock:
+            self.counts["decisions"] += 1
+            self.counts["dispatched"] += decision.dispatch
+        return decision
+
+    def record(self, decision: RoutingDecision, prompt: str, supervisor_tools: Optional[Set[str]] = None):
+        """Log a decision, with the supervisor's tool choice when the supervisor ran"""
+        entry = {"event": "pre_route", "prompt": prompt[:100], **asdict(decision)}
+        if supervisor_tools is not None:
+            entry["supervisor_tools"] = sorted(supervisor_tools)
+            if decision.tool is not None:
+                agreed = decision.tool in supervisor_tools
+                entry["agreed"] = agreed
+                with self._lock:
+                    self.counts["compared"] += 1
+                    self.counts["agreed"] += agreed
+        logger.info(f"🧭 {json.dumps(entry)}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            compared = self.counts["compared"]
+            return {
+                "mode": self.mode,
+                "decisions": self.counts["decisions"],
+                "dispatched": self.counts["dispatched"],
+                "compared": compared,
+                "agreed": self.counts["agreed"],
+                "agreement": round(self.counts["agreed"] / compared, 3) if compared else 0.0,
+            }
+
+
+GENERATED_MARKER = re.compile(r"\[Generated (?:image|chart):\s*[^\]]+\]")
+
+
+async def dispatch_to_specialist(agent, tool, prompt: str, callback_handler) -> str:
+    """Run a specialist tool directly in place of a supervisor turn.
+
+    The callback handler sees the same tool use and tool result messages as for a routed
+    supervisor turn (so generated images reach the UI), and the supervisor's hooks receive the
+    user and assistant messages, which keeps memory and shadow guardrails in the loop.
+    """
+    tool_use = {"toolUseId": f"prerouted-{uuid.uuid4().hex[:12]}", "name": tool.tool_name, "input": {"query": prompt}}
+    # While streaming, strands reports tool input as the JSON text generated so far
+    callback_handler(current_tool_use={**tool_use, "input": json.dumps(tool_use["input"])})
+    callback_handler(message={"role": "assistant", "content": [{"toolUse": tool_use}]})
+
+    tool_func = getattr(tool, "_tool_func", tool)
+    if inspect.isasyncgenfunction(tool_func):
+        # Streaming tools report progress like strands does; the last message is the result
+        result = None
+        async for message in tool_func(prompt):
+            if result is not None:
+                callback_handler(type="tool_stream", tool_stream_event={"tool_use": tool_use, "data": result})
+            result = message
+        result = str(result)
+    elif inspect.iscoroutinefunction(tool_func):
+        result = str(await tool_func(prompt))
+    else:
+        # Tools run on a worker thread with the request's context (model selection, artifact request)
+        result = str(await asyncio.to_thread(tool, prompt))
+
+    callback_handler(message={"role": "user", "content": [{"toolResult": {
+        "toolUseId": tool_use["toolUseId"], "status": "success", "content": [{"text": result}]
+    }}]})
+    response = GENERATED_MARKER.sub("", result).strip()
+
+    for message in ({"role": "user", "content": [{"text": prompt}]},
+                    {"role": "assistant", "content": [{"text": response}]}):
+        agent.messages.append(message)
+        agent.hooks.invoke_callbacks(MessageAddedEvent(agent=agent, message=message))
+    agent.hooks.invoke_callbacks(AfterInvocationEvent(agent=agent))
+    return response
+
+
+pre_router = PreRouter()
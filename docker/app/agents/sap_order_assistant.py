@@ -4,6 +4,7 @@ import json
 import boto3
 import os
 from botocore.exceptions import ClientError
+from .subagent_factory import subagent_factory
 
 SAP_ORDER_SYSTEM_PROMPT = """You are an AI assistant specialized in retrieving and displaying SAP sales order information.
 
@@ -75,10 +76,12 @@ def get_order_status(sales_order_id):
 def sap_order_assistant(query: str) -> str:
     """SAP Order assistant for retrieving sales order information and status."""
     try:
-        agent = Agent(
+        with subagent_factory.lease(
+            "sap_order_assistant",
+            Agent,
             system_prompt=SAP_ORDER_SYSTEM_PROMPT,
             tools=[get_order_status]
-        )
-        return agent(query)
+        ) as agent:
+            return agent(query)
     except Exception as e:
         return f"Error processing SAP order request: {str(e)}"
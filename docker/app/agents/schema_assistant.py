@@ -1,5 +1,6 @@
 from strands import Agent, tool
 from .model_utils import get_current_model
+from .subagent_factory import subagent_factory
 import boto3
 import uuid
 from datetime import datetime, timezone
@@ -79,11 +80,13 @@ def schema_translator(query: str) -> str:
     
     try:
         print("Routed to Schema Translator")
-        schema_agent = Agent(
-            system_prompt=SCHEMA_TRANSLATOR_SYSTEM_PROMPT,
+        with subagent_factory.lease(
+            "schema_translator",
+            Agent,
             model=get_current_model(),
-        )
-        agent_response = schema_agent(formatted_query)
+            system_prompt=SCHEMA_TRANSLATOR_SYSTEM_PROMPT,
+        ) as schema_agent:
+            agent_response = schema_agent(formatted_query)
         response_str = str(agent_response)
         
         # Log to DynamoDB
@@ -127,11 +130,13 @@ def data_analyzer(sample_data: str) -> str:
     
     try:
         print("Routed to Data Analyzer")
-        analyzer_agent = Agent(
-            system_prompt=DATA_ANALYZER_SYSTEM_PROMPT,
+        with subagent_factory.lease(
+            "data_analyzer",
+            Agent,
             model=get_current_model(),
-        )
-        agent_response = analyzer_agent(formatted_query)
+            system_prompt=DATA_ANALYZER_SYSTEM_PROMPT,
+        ) as analyzer_agent:
+            agent_response = analyzer_agent(formatted_query)
         response_str = str(agent_response)
         
         # Generate file details instead of trying to extract filename
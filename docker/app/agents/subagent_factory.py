@@ -0,0 +1,135 @@
+"""
+Reusable specialist agents for the AI Data Explorer multi-agent system.
+
+Specialist tools used to construct a new strands Agent on every call, which
+rebuilds the tool registry from the tool functions and creates a fresh Bedrock
+client for the model. SubAgentFactory keeps idle agents per (specialist, builder,
+model) and hands them out one caller at a time; an agent is reset to a
+clean conversation when it is returned, so nothing leaks between requests. Model
+clients are shared per model id across all specialists.
+
+While a response is streaming, leased agents forward their events to it through a
+StreamingCallbackHandler tagged with the specialist name, so sub-agent tokens and
+tool calls reach the client as they happen rather than when the tool returns.
+
+Unlike AgentPool (one long-lived agent per user session), several requests can
+use the same specialist at once, so each key holds a small stack of instances.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from strands.agent.state import AgentState
+from strands.models import BedrockModel
+from strands.telemetry.metrics import EventLoopMetrics
+from streaming_callback_handler import nested_callback_handler
+
+logger = logging.getLogger(__name__)
+
+
+def reset_agent(agent: Any):
+    """Clear the conversation and per-run state of a strands agent"""
+    agent.messages = []
+    agent.state = AgentState()
+    agent.event_loop_metrics = EventLoopMetrics()
+    conversation_manager = getattr(agent, "conversation_manager", None)
+    if conversation_manager is not None:
+        conversation_manager.removed_message_count = 0
+
+
+class SubAgentFactory:
+    """Pool of clean-state specialist agents keyed by (specialist, builder, model)"""
+
+    def __init__(self, max_idle_per_key: Optional[int] = None, max_keys: Optional[int] = None):
+        self.max_idle_per_key = max_idle_per_key or int(os.getenv("SUBAGENT_POOL_MAX_IDLE", "4"))
+        self.max_keys = max_keys or int(os.getenv("SUBAGENT_POOL_MAX_KEYS", "64"))
+        self.enabled = os.getenv("SUBAGENT_POOL_ENABLED", "true").lower() == "true"
+        self.stream_events = os.getenv("SUBAGENT_STREAM_EVENTS", "true").lower() == "true"
+        self._idle: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self._models: Dict[str, BedrockModel] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def model_client(self, model_id: str) -> BedrockModel:
+        """Shared BedrockModel for model_id"""
+        with self._lock:
+            model = self._models.get(model_id)
+        if model is None:
+            model = BedrockModel(model_id=model_id)
+            with self._lock:
+                model = self._models.setdefault(model_id, model)
+        return model
+
+    def _checkout(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self._idle.move_to_end(key)
+                self.hits += 1
+                return idle.pop()
+            self.misses += 1
+            return None
+
+    def _checkin(self, key: Tuple, agent: Any):
+        reset_agent(agent)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(agent)
+            while len(self._idle) > self.max_keys:
+                self._idle.popitem(last=False)
+
+    @contextmanager
+    def lease(self, specialist: str, build: Callable[..., Any], model: Optional[str] = None,
+              system_prompt: Optional[str] = None, variant: Hashable = None, **agent_kwargs):
+        """Yield a clean agent for specialist, calling build(**agent_kwargs) on a miss.
+
+        build is the Agent class or a function returning an agent. It is part of the key, so
+        patching a module's Agent gets its own pool entries; when build is a function, pass the
+        class it uses as variant. system_prompt is applied to reused agents, which lets callers
+        vary it per request. Agents whose run raised are dropped rather than returned to the pool.
+        Inside use_event_stream, the agent's events are forwarded to the stream for the lease.
+        """
+        key = (specialist, build, model, variant)
+        agent = self._checkout(key) if self.enabled else None
+        if agent is None:
+            if model is not None:
+                agent_kwargs["model"] = self.model_client(model)
+            if system_prompt is not None:
+                agent_kwargs["system_prompt"] = system_prompt
+            agent = build(**agent_kwargs)
+            logger.debug(f"🧩 Built {specialist} agent for {model or 'default model'}")
+        elif system_prompt is not None and agent.system_prompt != system_prompt:
+            agent.system_prompt = system_prompt
+
+        handler = nested_callback_handler(specialist) if self.stream_events else None
+        if handler is not None:
+            default_handler, agent.callback_handler = agent.callback_handler, handler
+        yield agent
+        if handler is not None:
+            agent.callback_handler = default_handler
+        if self.enabled:
+            self._checkin(key, agent)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "keys": len(self._idle),
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "models": len(self._models),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+subagent_factory = SubAgentFactory()
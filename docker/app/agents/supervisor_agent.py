@@ -7,15 +7,19 @@ from telemetry_config import setup_tracing
 from .general_assistant import general_assistant
 from .supply_chain_assistant import supply_chain_assistant
 from .schema_assistant import schema_translator, data_analyzer
-from .graph_assistant import neptune_database_statistics, neptune_cypher_query, neptune_bulk_load_status, neptune_bulk_load
+from . import graph_assistant, graph_stream_tools
 from .help_assistant import help_assistant
 from .data_visualizer_assistant import data_visualizer_assistant
 from .tariff_assistant import tariff_assistant
 from .image_assistant import image_assistant
 from .product_analyst import product_analyst
+from .agent_pool import pool_from_env
+from .model_utils import get_current_model
+from .tool_fanout import create_supervisor_tool_executor
 from chart_result_hook import ChartResultProcessor
 from memory_hooks import get_memory_hook
 from datetime import datetime
+from contextlib import asynccontextmanager
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -62,19 +66,20 @@ You are an intelligent supervisor agent designed to coordinate specialized assis
 Always provide direct, helpful responses by routing to the appropriate specialist.
 """
 
+# Neptune statistics and query tools run natively on the event loop unless NEPTUNE_ASYNC_TOOLS=false
+neptune_query_tools = graph_stream_tools if graph_stream_tools.NEPTUNE_ASYNC_TOOLS else graph_assistant
+
 # Define tools list once to avoid repetition
 SUPERVISOR_TOOLS = [
     help_assistant, product_analyst, supply_chain_assistant, 
-    schema_translator, data_analyzer, neptune_database_statistics, neptune_cypher_query, 
-    neptune_bulk_load_status, neptune_bulk_load, data_visualizer_assistant, 
+    schema_translator, data_analyzer, neptune_query_tools.neptune_database_statistics,
+    neptune_query_tools.neptune_cypher_query, graph_assistant.neptune_bulk_load_status,
+    graph_assistant.neptune_bulk_load, data_visualizer_assistant, 
     tariff_assistant, image_assistant, general_assistant
 ]
 
-def create_supervisor_agent(user_id: str = None, session_id: str = None, model: str = None):
-    """Create supervisor agent with optional guardrails and memory"""
-    
-    logger.info(f"🏗️ Creating supervisor agent for user_id={user_id}, session_id={session_id}")
-    
+def resolve_supervisor_identity(user_id: str = None, session_id: str = None):
+    """Return the AWS compliant (actor_id, agent_session_id) pair used for memory and pooling"""
     # Generate unique identifiers for memory (AWS compliant)
     actor_id = (user_id or 'default').replace('@', '_').replace('.', '_')
     
@@ -86,6 +91,15 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
         # Use date-based session for local development
         agent_session_id = f"session-{datetime.now().strftime('%Y%m%d')}"
     
+    return actor_id, agent_session_id
+
+def create_supervisor_agent(user_id: str = None, session_id: str = None, model: str = None):
+    """Create supervisor agent with optional guardrails and memory"""
+    
+    logger.info(f"🏗️ Creating supervisor agent for user_id={user_id}, session_id={session_id}")
+    
+    actor_id, agent_session_id = resolve_supervisor_identity(user_id, session_id)
+    
     logger.info(f"🆔 Using actor_id={actor_id}, agent_session_id={agent_session_id}")
     
     # Common trace attributes
@@ -114,24 +128,9 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
             
             config = BedrockGuardrailConfig()
             
-            # Use passed model or get from environment/app
-            if model:
-                model_to_use = model
-                logger.info(f"🎯 GUARDRAILS: Using passed model: {model_to_use}")
-            else:
-                env_model = os.getenv("AGENT_MODEL")
-                if env_model:
-                    model_to_use = env_model
-                    logger.info(f"🎯 GUARDRAILS: Using AGENT_MODEL env var: {model_to_use}")
-                else:
-                    # Use current_chat_model from app for UI
-                    try:
-                        from app import current_chat_model
-                        model_to_use = current_chat_model
-                        logger.info(f"🎯 GUARDRAILS: Using current_chat_model from app: {model_to_use}")
-                    except ImportError as ie:
-                        model_to_use = "us.anthropic.claude-sonnet-4-20250514-v1:0"  # Explicit fallback
-                        logger.warning(f"🎯 GUARDRAILS: Import failed ({ie}), using fallback: {model_to_use}")
+            # Use passed model or the model selected for this request
+            model_to_use = model or get_current_model()
+            logger.info(f"🎯 GUARDRAILS: Using model: {model_to_use}")
             
             if os.getenv("GUARDRAIL_MODE") == "enforce":
                 # Direct enforcement mode - pass model explicitly to avoid circular imports
@@ -142,6 +141,7 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
                     system_prompt=SUPERVISOR_SYSTEM_PROMPT,
                     model=protected_model,
                     tools=SUPERVISOR_TOOLS,
+                    tool_executor=create_supervisor_tool_executor(),
                     trace_attributes=trace_attributes
                 )
                 
@@ -163,6 +163,7 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
                     system_prompt=SUPERVISOR_SYSTEM_PROMPT,
                     model=model_to_use,
                     tools=SUPERVISOR_TOOLS,
+                    tool_executor=create_supervisor_tool_executor(),
                     trace_attributes=trace_attributes
                 )
                 
@@ -171,26 +172,15 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
                     if hasattr(hook, 'register_hooks'):
                         hook.register_hooks(agent.hooks)
         else:
-            # Use passed model or get from environment/app
-            if model:
-                model_to_use = model
-            else:
-                env_model = os.getenv("AGENT_MODEL")
-                if env_model:
-                    model_to_use = env_model
-                else:
-                    # Use current_chat_model from app for UI
-                    try:
-                        from app import current_chat_model
-                        model_to_use = current_chat_model
-                    except ImportError:
-                        model_to_use = None  # Let strands use default
+            # Use passed model or the model selected for this request
+            model_to_use = model or get_current_model()
             
             # Fallback to standard agent
             agent = Agent(
                 system_prompt=SUPERVISOR_SYSTEM_PROMPT,
                 model=model_to_use,
                 tools=SUPERVISOR_TOOLS,
+                tool_executor=create_supervisor_tool_executor(),
                 trace_attributes=trace_attributes
             )
             
@@ -201,26 +191,15 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
     except Exception as e:
         print(f"Guardrails not configured: {e}")
         
-        # Use passed model or get from environment/app for fallback
-        if model:
-            model_to_use = model
-        else:
-            env_model = os.getenv("AGENT_MODEL")
-            if env_model:
-                model_to_use = env_model
-            else:
-                # Use current_chat_model from app for UI
-                try:
-                    from app import current_chat_model
-                    model_to_use = current_chat_model
-                except ImportError:
-                    model_to_use = None  # Let strands use default
+        # Use passed model or the model selected for this request
+        model_to_use = model or get_current_model()
         
         # Fallback to standard agent
         agent = Agent(
             system_prompt=SUPERVISOR_SYSTEM_PROMPT,
             model=model_to_use,
             tools=SUPERVISOR_TOOLS,
+            tool_executor=create_supervisor_tool_executor(),
             trace_attributes=trace_attributes
         )
         
@@ -231,35 +210,31 @@ def create_supervisor_agent(user_id: str = None, session_id: str = None, model:
         
     return agent
 
-# User-specific agent cache
-_supervisor_agents = {}
-_last_model_id = None
+# Pooled supervisor agents keyed by (actor_id, agent_session_id, model)
+_supervisor_agents = pool_from_env("SUPERVISOR")
+
+def _supervisor_key(user_id: str = None, session_id: str = None, model: str = None):
+    actor_id, agent_session_id = resolve_supervisor_identity(user_id, session_id)
+    return (actor_id, agent_session_id, model or get_current_model())
 
 def get_supervisor_agent(user_id: str = None, session_id: str = None):
-    """Get supervisor agent with model switching support"""
-    global _supervisor_agents, _last_model_id
-    
-    logger.info(f"🤖 Getting supervisor agent for user_id={user_id}, session_id={session_id}")
-    
-    # Get current model
-    try:
-        from app import current_chat_model
-        current_model = current_chat_model
-    except ImportError:
-        current_model = os.getenv("AGENT_MODEL", "us.anthropic.claude-sonnet-4-20250514-v1:0")
-    
-    logger.info(f"🎯 Using model: {current_model}")
-    
-    # Recreate agent if model changed
-    if _last_model_id != current_model:
-        logger.info(f"🔄 Model changed from {_last_model_id} to {current_model}, clearing cache")
-        _supervisor_agents.clear()  # Clear all cached agents when model changes
-        _last_model_id = current_model
+    """Get the pooled supervisor agent for a user session, creating it on first use"""
+    key = _supervisor_key(user_id, session_id)
+    logger.info(f"🤖 Getting supervisor agent for user_id={user_id}, session_id={session_id}, model={key[2]}")
+    return _supervisor_agents.get(key, lambda: create_supervisor_agent(user_id, session_id, key[2]))
+
+@asynccontextmanager
+async def supervisor_session(user_id: str = None, session_id: str = None):
+    """Lease the supervisor for a user session, serializing concurrent requests for it.
     
-    # Always create fresh agent (no user-specific caching)
-    agent = create_supervisor_agent(user_id, session_id, current_model)
-    logger.info(f"✅ Supervisor agent created successfully")
-    return agent
+    Conversation context comes from AgentCore memory, so the pooled agent starts
+    every request with an empty message list just like a freshly built agent.
+    """
+    key = _supervisor_key(user_id, session_id)
+    logger.info(f"🤖 Leasing supervisor agent for user_id={user_id}, session_id={session_id}, model={key[2]}")
+    async with _supervisor_agents.lease(key, lambda: create_supervisor_agent(user_id, session_id, key[2])) as agent:
+        agent.messages.clear()
+        yield agent
 
 # For backward compatibility
 class SupervisorAgentProxy:
@@ -31,6 +31,11 @@ try:
 except ImportError:
     from graph_assistant import neptune_database_statistics, neptune_cypher_query
 
+try:
+    from .subagent_factory import subagent_factory
+except ImportError:
+    from subagent_factory import subagent_factory
+
 SUPPLY_CHAIN_ASSISTANT_SYSTEM_PROMPT = """You are a Supply Chain Assistant specialized in manufacturing supply chain operations and analysis. You are an expert on:
 
 ## Core Supply Chain Expertise Areas:
@@ -120,11 +125,10 @@ def supply_chain_assistant(query: str) -> str:
     try:
         print("Routed to Supply Chain Assistant")
         
-        # Create the agent
-        agent = create_supply_chain_assistant_agent()
-        
-        # Process the query through the agent
-        response = agent(query)
+        # Reuse an idle agent, creating one only when none is free
+        with subagent_factory.lease("supply_chain_assistant", create_supply_chain_assistant_agent, variant=Agent) as agent:
+            # Process the query through the agent
+            response = agent(query)
         
         return str(response)
         
@@ -3,6 +3,7 @@ import boto3
 from strands import Agent, tool
 from strands_tools import calculator
 from .model_utils import get_current_model
+from .subagent_factory import subagent_factory
 
 TARIFF_ASSISTANT_SYSTEM_PROMPT = """You are a Tariff Assistant specialized in the United States Harmonized Tariff Schedule (HTS). You are an expert on:
 
@@ -97,13 +98,6 @@ def tariff_assistant(query: str) -> str:
     try:
         print("Routed to Tariff Assistant")
         
-        # Create tariff agent with access to knowledge base and calculator
-        tariff_agent = Agent(
-            system_prompt=TARIFF_ASSISTANT_SYSTEM_PROMPT,
-            model=get_current_model(),
-            tools=[tariffs_knowledge_base, calculator],
-        )
-        
         # Enhance query with instruction to use calculator for computations
         enhanced_query = f"""
         {query}
@@ -114,7 +108,15 @@ def tariff_assistant(query: str) -> str:
         3. Provide specific HTS codes and duty rates when applicable
         """
         
-        agent_response = tariff_agent(enhanced_query)
+        # Tariff agent with access to knowledge base and calculator
+        with subagent_factory.lease(
+            "tariff_assistant",
+            Agent,
+            model=get_current_model(),
+            system_prompt=TARIFF_ASSISTANT_SYSTEM_PROMPT,
+            tools=[tariffs_knowledge_base, calculator],
+        ) as tariff_agent:
+            agent_response = tariff_agent(enhanced_query)
         text_response = str(agent_response)
 
         if len(text_response) > 0:
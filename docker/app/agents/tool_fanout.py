@@ -0,0 +1,128 @@
+"""
+Parallel fan-out of supervisor tool calls.
+
+Compound questions make the supervisor request several specialists in one
+model turn (e.g. supply_chain_assistant, tariff_assistant and product_analyst).
+Each one is an independent, LLM-heavy sub-agent, so FanOutToolExecutor runs the
+tool calls of a turn concurrently, at most SUPERVISOR_TOOL_CONCURRENCY at a
+time, and gives each one a timeout. Results are returned to the model in the
+order it requested the tools. A turn that includes a tool listed in
+SUPERVISOR_SEQUENTIAL_TOOLS (tools with side effects) runs one call at a time.
+A timed-out call gets an error result (passed through the AfterToolCallEvent
+hooks like any other) and its sub-agent events stop reaching the stream.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+from strands.tools.executors._executor import ToolExecutor
+from strands.types._events import ToolResultEvent
+from streaming_callback_handler import detachable_event_stream
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_timeouts(value: str) -> Dict[str, float]:
+    """Parse "tool=seconds,tool=seconds" into a dict"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, seconds = item.partition("=")
+        try:
+            timeouts[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid tool timeout {item!r}")
+    return timeouts
+
+
+class FanOutToolExecutor(ConcurrentToolExecutor):
+    """Concurrent tool executor with a concurrency bound, per-tool timeouts and ordered results"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, default_timeout: Optional[float] = None,
+                 timeouts: Optional[Dict[str, float]] = None, sequential_tools: Optional[Iterable[str]] = None):
+        super().__init__()
+        self.max_concurrency = max_concurrency or int(os.getenv("SUPERVISOR_TOOL_CONCURRENCY", "4"))
+        self.default_timeout = default_timeout or float(os.getenv("SUPERVISOR_TOOL_TIMEOUT_SECONDS", "300"))
+        self.timeouts = timeouts if timeouts is not None else _parse_timeouts(os.getenv("SUPERVISOR_TOOL_TIMEOUTS", ""))
+        if sequential_tools is None:
+            sequential_tools = filter(None, os.getenv("SUPERVISOR_SEQUENTIAL_TOOLS", "neptune_bulk_load").split(","))
+        self.sequential_tools = {name.strip() for name in sequential_tools}
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.timeouts.get(tool_name, self.default_timeout)
+
+    def is_independent(self, tool_uses: list) -> bool:
+        """Whether the tool calls of a turn can run at the same time"""
+        return not any(tool_use["name"] in self.sequential_tools for tool_use in tool_uses)
+
+    async def _execute(self, agent: Any, tool_uses: list, tool_results: list, cycle_trace: Any,
+                       cycle_span: Any, invocation_state: Dict[str, Any],
+                       structured_output_context: Any = None):
+        concurrency = self.max_concurrency if self.is_independent(tool_uses) else 1
+        if len(tool_uses) > 1:
+            logger.info(f"🔀 Running {len(tool_uses)} tool calls with concurrency {concurrency}")
+        slots = asyncio.Semaphore(concurrency)
+        events: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def run(tool_use):
+            try:
+                async with slots:
+                    with detachable_event_stream() as detach:
+                        stream = ToolExecutor._stream_with_trace(
+                            agent, tool_use, tool_results, cycle_trace, cycle_span, invocation_state,
+                            structured_output_context
+                        )
+
+                        async def drain():
+                            async for event in stream:
+                                events.put_nowait(event)
+
+                        timeout = self.timeout_for(tool_use["name"])
+                        try:
+                            await asyncio.wait_for(drain(), timeout)
+                        except asyncio.TimeoutError:
+                            # The tool's worker thread cannot be interrupted; its late events and result are discarded
+                            detach()
+                            logger.warning(f"⏱️ Tool {tool_use['name']} timed out after {timeout:.0f}s")
+                            message = f"{tool_use['name']} did not finish within {timeout:.0f} seconds"
+                            result = {
+                                "toolUseId": tool_use["toolUseId"],
+                                "status": "error",
+                                "content": [{"text": message}],
+                            }
+                            after_event, _ = await ToolExecutor._invoke_after_tool_call_hook(
+                                agent, agent.tool_registry.registry.get(tool_use["name"]), tool_use,
+                                invocation_state, result, exception=TimeoutError(message)
+                            )
+                            tool_results.append(after_event.result)
+                            events.put_nowait(ToolResultEvent(after_event.result))
+            finally:
+                events.put_nowait(finished)
+
+        tasks = [asyncio.create_task(run(tool_use)) for tool_use in tool_uses]
+        pending = len(tasks)
+        try:
+            while pending:
+                event = await events.get()
+                if event is finished:
+                    pending -= 1
+                    continue
+                yield event
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        # Completion order is arbitrary; hand results back in the order the model asked for them
+        order = {tool_use["toolUseId"]: index for index, tool_use in enumerate(tool_uses)}
+        tool_results.sort(key=lambda result: order.get(result["toolUseId"], -1))
+
+
+def create_supervisor_tool_executor():
+    """Tool executor for the supervisor, per SUPERVISOR_PARALLEL_TOOLS"""
+    if os.getenv("SUPERVISOR_PARALLEL_TOOLS", "true").lower() == "true":
+        return FanOutToolExecutor()
+    return SequentialToolExecutor()
@@ -1,11 +1,14 @@
 import sys
 import os
 import json
+import re
 import logging
+import uuid
+from contextlib import asynccontextmanager
 sys.path.append(os.path.join(os.path.dirname(__file__), 'agents'))
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -18,8 +21,16 @@ class HealthCheckFilter(logging.Filter):
 # Apply filter to uvicorn access logger
 logging.getLogger("uvicorn.access").addFilter(HealthCheckFilter())
 
-from agents.supervisor_agent import supervisor_agent
-from streaming_callback_handler import StreamingCallbackHandler
+from agents.pre_router import pre_router, dispatch_to_specialist
+from agents.model_utils import get_user_model_selection, set_user_model_selection, use_model_selection
+from streaming_callback_handler import StreamingCallbackHandler, use_event_stream
+from event_bus import StreamEventBus
+from stream_framing import SSEFramer
+from model_catalog import model_catalog
+from memory_hooks import memory_registry
+from memory_cache import recent_turns_cache
+from artifact_store import content_etag, is_content_addressed, media_type_for, use_artifact_request
+from artifact_janitor import get_artifact_janitor
 
 # Configure logging
 logging.basicConfig(
@@ -31,7 +42,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Multi-Agent Explorer")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Generated charts and images are expired on a schedule rather than per request
+    janitor = None
+    if os.getenv("ARTIFACT_JANITOR_ENABLED", "true").lower() == "true":
+        janitor = get_artifact_janitor()
+        janitor.start()
+    try:
+        yield
+    finally:
+        if janitor is not None:
+            janitor.stop(timeout=5)
+
+app = FastAPI(title="AI Multi-Agent Explorer", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -48,6 +72,10 @@ class PromptRequest(BaseModel):
     user_role: str = None
     user_email: str = None
     session_id: str = None
+    # Optional per-request model overrides (otherwise the user's /set-models selection)
+    chat_model: str = None
+    neptune_model: str = None
+    image_model: str = None
 
 @app.get('/health')
 def health_check():
@@ -67,76 +95,47 @@ def get_version():
     except Exception:
         return {'version': 'unknown', 'build_date': 'unknown', 'git_commit': 'unknown'}
 
-# Global model configuration
-current_chat_model = os.getenv("AGENT_MODEL", "us.anthropic.claude-sonnet-4-20250514-v1:0")
-current_neptune_model = "us.anthropic.claude-sonnet-4-20250514-v1:0"
-current_image_model = "stability.stable-image-core-v1:1"
-
 def get_model_display_name(model_id):
-    """Get display name for a model ID from llm-config.json"""
-    try:
-        import json
-        import os
-        
-        # Load config - try local copy first, then UI directory for local dev
-        config_path = os.path.join(os.path.dirname(__file__), 'llm-config.json')
-        if not os.path.exists(config_path):
-            # For local development, access from UI directory
-            config_path = os.path.join(os.path.dirname(__file__), '../../ui/static/llm-config.json')
-        
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-        
-        # Check regular models
-        for model in config.get('models', []):
-            if model['id'] == model_id:
-                return model['name']
-        
-        # Check image models
-        for model in config.get('image_models', []):
-            if model['id'] == model_id:
-                return model['name']
-        
-        # Fallback to model_id if not found
-        return model_id
-    except Exception as e:
-        print(f"Error loading model config: {e}")
-        return model_id
+    """Get display name for a model ID from the cached llm-config.json catalog"""
+    return model_catalog.display_name(model_id)
 
 @app.post('/set-models')
 async def set_models(request: dict):
-    """Set multiple models in a single call."""
-    global current_chat_model, current_neptune_model, current_image_model
+    """Set multiple models in a single call for the requesting user."""
+    user_id = request.get('user_id') or "local@dev"
     
-    if 'chat_model' in request:
-        current_chat_model = request['chat_model']
-        os.environ['AGENT_MODEL'] = current_chat_model  # Update environment variable
-        try:
-            supervisor_agent.messages.clear()
-            # Clear supervisor agent cache to force recreation with new model
-            from agents.supervisor_agent import _supervisor_agents
-            _supervisor_agents.clear()
-        except:
-            pass
-        logger.debug(f"Using current_chat_model: {current_chat_model}")
-    
-    if 'neptune_model' in request:
-        current_neptune_model = request['neptune_model']
-        logger.debug(f"Using current_neptune_model: {current_neptune_model}")
+    errors = model_catalog.validate_selection(
+        chat_model=request.get('chat_model'),
+        neptune_model=request.get('neptune_model'),
+        image_model=request.get('image_model')
+    )
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
     
-    if 'image_model' in request:
-        current_image_model = request['image_model']
-        logger.debug(f"Using current_image_model: {current_image_model}")
+    # Supervisor agents are pooled per model, so no cache needs to be flushed here
+    selection = set_user_model_selection(
+        user_id,
+        chat_model=request.get('chat_model'),
+        neptune_model=request.get('neptune_model'),
+        image_model=request.get('image_model')
+    )
+    logger.debug(f"Models for {user_id}: {selection}")
     
     return {"status": "success"}
 
 @app.get('/get-models')
-def get_current_models():
-    """Get current model configuration."""
+def get_current_models(user_id: str = "local@dev"):
+    """Get the model configuration for a user."""
+    selection = get_user_model_selection(user_id)
     return {
-        "chat_model": current_chat_model,
-        "neptune_model": current_neptune_model,
-        "image_model": current_image_model
+        "chat_model": selection.chat_model,
+        "neptune_model": selection.neptune_model,
+        "image_model": selection.image_model,
+        "display_names": {
+            "chat_model": model_catalog.display_name(selection.chat_model),
+            "neptune_model": model_catalog.display_name(selection.neptune_model),
+            "image_model": model_catalog.display_name(selection.image_model)
+        }
     }
 
 def get_memory_conversation_history(user_id: str = "local@dev"):
@@ -145,33 +144,29 @@ def get_memory_conversation_history(user_id: str = "local@dev"):
         return None
         
     try:
-        from bedrock_agentcore.memory import MemoryClient
         from datetime import datetime
         
-        memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-east-1"))
         safe_user_id = user_id.replace('@', '_').replace('.', '_')
-        memory_name = "AIDataExplorer_STM"
         
-        # Find existing memory (AWS adds suffix to names)
-        memories = memory_client.list_memories()
-        memory_id = None
-        for memory in memories:
-            if memory.get('id', '').startswith(memory_name):
-                memory_id = memory['id']
-                break
-                
+        # Memory id and client are resolved once per process
+        memory_id = memory_registry.get_memory_id()
         if not memory_id:
             return None
             
         # Get conversation history - use same actor_id format as supervisor agent
         session_id = f"session-{datetime.now().strftime('%Y%m%d')}"
         actor_id = safe_user_id  # Match supervisor agent format (not "supervisor-" prefix)
-        recent_turns = memory_client.get_last_k_turns(
-            memory_id=memory_id,
-            actor_id=actor_id,
-            session_id=session_id,
+        recent_turns = recent_turns_cache.get_last_k_turns(
+            (memory_id, actor_id, session_id),
             k=20,  # Get more history for UI
-            branch_name="main"
+            loader=lambda k: memory_registry.call(
+                "get_last_k_turns",
+                memory_id=memory_id,
+                actor_id=actor_id,
+                session_id=session_id,
+                k=k,
+                branch_name="main"
+            )
         )
         
         messages = []
@@ -217,9 +212,10 @@ def clear_conversation(request: ClearRequest = None):
         # Get user_id from request body
         user_id = request.user_id if request else "local@dev"
         
-        # Clear any cached agents - next request will get fresh timestamp-based session
-        from agents.supervisor_agent import _supervisor_agents
-        _supervisor_agents.clear()
+        # Drop this user's pooled agents - next request will get fresh timestamp-based session
+        from agents.supervisor_agent import _supervisor_agents, resolve_supervisor_identity
+        actor_id, _ = resolve_supervisor_identity(user_id)
+        _supervisor_agents.discard(lambda key: key[0] == actor_id)
         
         print(f"Cleared agent cache for user {user_id} - next request will start fresh session")
         
@@ -241,114 +237,162 @@ async def query_streaming_with_events(request: PromptRequest, http_request: Requ
     if not prompt:
         logger.error("❌ Empty prompt provided")
         raise HTTPException(status_code=400, detail="No prompt provided")
+    
+    errors = model_catalog.validate_selection(
+        chat_model=request.chat_model,
+        neptune_model=request.neptune_model,
+        image_model=request.image_model
+    )
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+    
+    # Resolve models once for this request; they travel with it to every sub-agent
+    models = get_user_model_selection(actual_user_id).with_overrides(
+        request.chat_model, request.neptune_model, request.image_model
+    )
 
     async def generate_with_events():
-        events = []
+        bus = StreamEventBus()
+        request_id = uuid.uuid4().hex  # Artifacts created for this response are registered under it
         used_tools = set()   # Track which tools were used
         
         def event_callback(event):
-            events.append(event)
-            # Log events but filter out verbose delta messages
-            if isinstance(event, dict) and not str(event).startswith("Data: {'delta':"):
-                logger.debug(f"📡 Event: {event}")
-            # Track tool usage
-            if isinstance(event, dict) and event.get('type', '').startswith('🔧 tool_use'):
+            # Log events lazily - formatting every event is not free
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📡 Event: %s", event)
+            # Track the supervisor's tool usage (nested sub-agent events carry the specialist's name)
+            if (isinstance(event, dict) and event.get('agent') == 'supervisor'
+                    and event.get('type', '').startswith('🔧 tool_use')):
                 tool_name = event.get('data', {}).get('tool', '')
                 if tool_name:
                     used_tools.add(tool_name)
                     logger.info(f"🔧 Tool used: {tool_name}")
+            bus.publish(event)
         
         callback_handler = StreamingCallbackHandler(event_callback, "supervisor")
         
+        async def run_supervisor():
+            # Lease the pooled supervisor for this user session
+            from agents.supervisor_agent import supervisor_session, SUPERVISOR_TOOLS
+            decision = pre_router.route(prompt)
+            with use_model_selection(models), use_artifact_request(request_id), use_event_stream(event_callback):
+                async with supervisor_session(actual_user_id, actual_session_id) as user_supervisor:
+                    user_supervisor.callback_handler = callback_handler
+                    
+                    if decision.dispatch:
+                        # Unambiguous query - skip the supervisor's routing model call
+                        tool = next(t for t in SUPERVISOR_TOOLS if t.tool_name == decision.tool)
+                        logger.info(f"🧭 Pre-routed to {decision.tool} ({decision.source}, {decision.confidence})")
+                        await bus.put_content(await dispatch_to_specialist(user_supervisor, tool, prompt, callback_handler))
+                        pre_router.record(decision, prompt)
+                        return
+                    
+                    async for chunk in user_supervisor.stream_async(prompt):
+                        if isinstance(chunk, dict) and "data" in chunk:
+                            content = chunk["data"]
+                        elif isinstance(chunk, str):
+                            content = chunk
+                        else:
+                            continue
+                        if not (content.startswith("Tool #") or content.startswith("Routed to")):
+                            await bus.put_content(content)
+            if pre_router.enabled:
+                pre_router.record(decision, prompt, used_tools)
+        
+        framer = SSEFramer()
+        
+        # Display names for the usage annotation are resolved once per stream
+        chat_model_name = get_model_display_name(models.chat_model)
+        neptune_model_name = get_model_display_name(models.neptune_model)
+        image_model_name = get_model_display_name(models.image_model)
+        
         try:
             logger.info("🚀 Starting supervisor agent processing")
-            # Get user-specific supervisor agent
-            from agents.supervisor_agent import get_supervisor_agent
-            user_supervisor = get_supervisor_agent(actual_user_id, actual_session_id)
-            user_supervisor.callback_handler = callback_handler
-            
             message_ended = False
             
-            async for chunk in user_supervisor.stream_async(prompt):
-                # Send regular content
-                if isinstance(chunk, dict) and "data" in chunk:
-                    content = chunk["data"]
-                    if not (content.startswith("Tool #") or content.startswith("Routed to")):
-                        # Add line breaks after message ends
-                        if message_ended:
-                            content = "\n\n" + content
-                            message_ended = False
-                        yield f"data: {json.dumps({'type': 'content', 'data': content}, ensure_ascii=False)}\n\n"
-                elif isinstance(chunk, str):
-                    if not (chunk.startswith("Tool #") or chunk.startswith("Routed to")):
-                        # Add line breaks after message ends
-                        if message_ended:
-                            chunk = "\n\n" + chunk
-                            message_ended = False
-                        yield f"data: {json.dumps({'type': 'content', 'data': chunk}, ensure_ascii=False)}\n\n"
+            # Content and callback events are delivered as they arrive, independently of each other;
+            # content deltas are batched by the framer within a short time/size window
+            async for kind, item in bus.stream(run_supervisor(), tick=framer.time_until_flush):
+                if kind == "tick":
+                    frames = framer.tick()
+                    if frames:
+                        yield frames
+                    continue
+                
+                if kind == "content":
+                    # Add line breaks after message ends
+                    if message_ended:
+                        item = "\n\n" + item
+                        message_ended = False
+                    frames = framer.content(item)
+                    if frames:
+                        yield frames
+                    continue
                 
-                # Send any new callback events and check for messageStop
-                while len(events) > 0:
-                    event = events.pop(0)
-                    if "messageStop" in str(event):
-                        message_ended = True
+                event = item
+                is_supervisor_event = isinstance(event, dict) and event.get('agent') == 'supervisor'
+                if is_supervisor_event and event.get('type') == '🏁 messageStop':
+                    message_ended = True
+                
+                # Add model info to the supervisor's usage events
+                if is_supervisor_event and event.get('type') == '📊 usage':
+                    # Build model list based on tools that were actually used
+                    used_models = []
+                    
+                    # Always include chat model as supervisor uses it
+                    used_models.append(f"<strong>Chat LLM:</strong> {chat_model_name}")
                     
-                    # Add model info to usage events
-                    if isinstance(event, dict) and event.get('type') == '📊 usage':
-                        # Get model display names
-                        chat_model_name = get_model_display_name(current_chat_model)
-                        neptune_model_name = get_model_display_name(current_neptune_model)
-                        image_model_name = get_model_display_name(current_image_model)
-                        
-                        # Build model list based on tools that were actually used
-                        used_models = []
-                        
-                        # Always include chat model as supervisor uses it
-                        used_models.append(f"<strong>Chat LLM:</strong> {chat_model_name}")
-                        
-                        # Check if graph/neptune tools were used
-                        if any('schema' in tool.lower() or 'neptune' in tool.lower() for tool in used_tools):
-                            used_models.append(f"<strong>Graph Query LLM:</strong> {neptune_model_name}")
-                        
-                        # Check if image tools were used
-                        if any('image' in tool.lower() or 'visualizer' in tool.lower() for tool in used_tools):
-                            used_models.append(f"<strong>Image Gen LLM:</strong> {image_model_name}")
-                        
-                        # Add model info to existing data
-                        event['data']['models'] = " &nbsp; ".join(used_models)
+                    # Check if graph/neptune tools were used
+                    if any('schema' in tool.lower() or 'neptune' in tool.lower() for tool in used_tools):
+                        used_models.append(f"<strong>Graph Query LLM:</strong> {neptune_model_name}")
                     
-                    yield f"data: {json.dumps({'type': 'event', 'event': event}, ensure_ascii=False)}\n\n"
+                    # Check if image tools were used
+                    if any('image' in tool.lower() or 'visualizer' in tool.lower() for tool in used_tools):
+                        used_models.append(f"<strong>Image Gen LLM:</strong> {image_model_name}")
+                    
+                    # Add model info to existing data
+                    event['data']['models'] = " &nbsp; ".join(used_models)
+                
+                frames = framer.event(event)
+                if frames:
+                    yield frames
             
-            # Send any remaining events
-            while len(events) > 0:
-                event = events.pop(0)
-                yield f"data: {json.dumps({'type': 'event', 'event': event}, ensure_ascii=False)}\n\n"
+            frames = framer.flush()
+            if frames:
+                yield frames
                 
         except Exception as e:
             logger.error(f"❌ Error in query processing: {str(e)}", exc_info=True)
-            yield f"data: {json.dumps({'type': 'error', 'message': 'An error occurred while processing your request'}, ensure_ascii=False)}\n\n"
+            yield framer.error('An error occurred while processing your request')
 
     logger.info("✅ Query processing completed")
     return StreamingResponse(generate_with_events(), media_type="text/plain")
 
 
+# Only alphanumeric, dash, underscore, and single dots (for extension)
+IMAGE_FILENAME = re.compile(r'^[\w\-]+(\.[\w\-]+)*$')
+SERVED_IMAGE_TYPES = {'image/png', 'image/jpeg', 'image/gif'}
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 @app.get("/get-image/{filename}")
-async def get_image(filename: str):
-    """Serve generated images from output directory"""
+def get_image(filename: str, request: Request):
+    """Serve generated images from output directory.
+    
+    Responses carry a content-hash ETag, so repeat views revalidate with a 304. Content-addressed
+    artifact names are cached as immutable, and FileResponse serves Range requests.
+    """
     try:
-        from fastapi.responses import FileResponse
-        import os
-        
         output_dir = os.path.join(os.getcwd(), 'output')
         
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-        
         # Validate filename to prevent path traversal attacks
-        # Only allow alphanumeric, dash, underscore, and single dots (for extension)
         # Reject consecutive dots (..) which could be used for traversal
-        import re
-        if not re.match(r'^[\w\-]+(\.[\w\-]+)*$', filename) or '..' in filename:
+        if not IMAGE_FILENAME.match(filename) or '..' in filename:
             raise HTTPException(status_code=400, detail="Invalid filename")
         
         # Normalize and verify the path stays within output_dir
@@ -356,35 +400,39 @@ async def get_image(filename: str):
         if not image_path.startswith(os.path.normpath(output_dir) + os.sep):
             raise HTTPException(status_code=400, detail="Invalid filename")
         
-        if os.path.exists(image_path):
-            # Determine media type
-            if filename.lower().endswith('.png'):
-                media_type = 'image/png'
-            elif filename.lower().endswith(('.jpg', '.jpeg')):
-                media_type = 'image/jpeg'
-            elif filename.lower().endswith('.gif'):
-                media_type = 'image/gif'
-            else:
-                media_type = 'application/octet-stream'
-            
-            return FileResponse(
-                path=image_path,
-                media_type=media_type,
-                filename=filename
-            )
-        else:
-            print(f"Image not found: {image_path}")
-            print(f"Directory contents: {os.listdir(output_dir) if os.path.exists(output_dir) else 'Directory does not exist'}")
+        try:
+            stat_result = os.stat(image_path)
+        except FileNotFoundError:
+            logger.warning(f"Image not found: {filename}")
             raise HTTPException(status_code=404, detail="Image not found")
+        
+        headers = {
+            "ETag": content_etag(image_path, stat_result),
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if is_content_addressed(filename) else REVALIDATE_CACHE_CONTROL,
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        
+        media_type = media_type_for(filename)
+        return FileResponse(
+            path=image_path,
+            media_type=media_type if media_type in SERVED_IMAGE_TYPES else 'application/octet-stream',
+            filename=filename,
+            headers=headers,
+            stat_result=stat_result
+        )
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error serving image {filename}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to serve image")
 
 @app.get("/query-get-image/{filename}")
-async def query_get_image(filename: str):
+def query_get_image(filename: str, request: Request):
     """Alternative endpoint for UI service using /query* routing"""
-    return await get_image(filename)
+    return get_image(filename, request)
 
 
 if __name__ == '__main__':
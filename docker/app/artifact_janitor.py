@@ -0,0 +1,197 @@
+"""
+Scheduled cleanup of the output directory.
+
+Chart and image tools used to walk output/ on every request to delete files
+older than 24 hours, so each request paid for the whole directory. The janitor
+instead keeps an index of artifacts ordered by expiry time: registered
+artifacts are added as they are created, a background thread pops whatever has
+expired every ARTIFACT_JANITOR_INTERVAL_SECONDS, and ARTIFACT_MAX_BYTES caps
+the directory size by removing the oldest artifacts first. The directory is
+walked once at startup (and every ARTIFACT_JANITOR_RESCAN_SECONDS) to pick up
+files that were written outside the registry.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from .artifact_store import Artifact, artifact_registry
+except ImportError:
+    from artifact_store import Artifact, artifact_registry
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactJanitor:
+    """Expires output files by retention time and size quota from a background thread"""
+
+    def __init__(self, root: Optional[str] = None, retention_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None, interval_seconds: Optional[float] = None,
+                 rescan_seconds: Optional[float] = None,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        self.root = root or os.path.join(os.getcwd(), 'output')
+        self.retention = retention_seconds if retention_seconds is not None else float(os.getenv("ARTIFACT_RETENTION_SECONDS", "86400"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("ARTIFACT_MAX_BYTES", str(1024 ** 3)))
+        self.interval = interval_seconds or float(os.getenv("ARTIFACT_JANITOR_INTERVAL_SECONDS", "300"))
+        self.rescan_interval = rescan_seconds if rescan_seconds is not None else float(os.getenv("ARTIFACT_JANITOR_RESCAN_SECONDS", "21600"))
+        self.on_remove = on_remove
+        self._heap: List[Tuple[float, str]] = []  # (expires_at, path), may hold stale entries
+        self._files: Dict[str, Tuple[float, int]] = {}  # path -> (expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_scan = 0.0
+        self.stats = {"removed": 0, "removed_bytes": 0, "quota_removed": 0}
+
+    @property
+    def tracked_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._files)
+
+    def track(self, path: str, size: Optional[int] = None, created: Optional[float] = None):
+        """Add or refresh a file in the expiry index"""
+        path = os.path.abspath(path)
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return
+        expires_at = (created if created is not None else time.time()) + self.retention
+        with self._lock:
+            previous = self._files.get(path)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._files[path] = (expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._heap, (expires_at, path))
+            over_quota = self.max_bytes and self._bytes > self.max_bytes
+        if over_quota:
+            self._wake.set()  # Enforce the quota now rather than at the next interval
+
+    def track_artifact(self, artifact: Artifact):
+        self.track(artifact.path, artifact.size, artifact.created)
+
+    def forget(self, path: str):
+        with self._lock:
+            entry = self._files.pop(os.path.abspath(path), None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def scan(self) -> int:
+        """Index every file under root by its mtime; returns the number of files seen"""
+        self._last_scan = time.monotonic()
+        count = 0
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    with self._lock:
+                        known = entry.path in self._files
+                    if not known:
+                        self.track(entry.path, stat.st_size, stat.st_mtime)
+                    count += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Artifact janitor could not scan {self.root}: {e}")
+        return count
+
+    def _pop(self) -> Optional[Tuple[str, int]]:
+        # Caller holds the lock; None when the head entry was superseded by a later track()/forget()
+        expires_at, path = heapq.heappop(self._heap)
+        entry = self._files.get(path)
+        if entry is None or entry[0] != expires_at:
+            return None
+        del self._files[path]
+        self._bytes -= entry[1]
+        return path, entry[1]
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove expired files, then the oldest files while over quota; returns files removed"""
+        now = now if now is not None else time.time()
+        expired, evicted = [], []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                popped = self._pop()
+                if popped is not None:
+                    expired.append(popped)
+            while self.max_bytes and self._bytes > self.max_bytes and self._heap:
+                popped = self._pop()
+                if popped is not None:
+                    evicted.append(popped)
+
+        for path, size in expired + evicted:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Artifact janitor could not remove {path}: {e}")
+                continue
+            self.stats["removed"] += 1
+            self.stats["removed_bytes"] += size
+            if self.on_remove is not None:
+                self.on_remove(os.path.basename(path))
+        self.stats["quota_removed"] += len(evicted)
+        if expired or evicted:
+            logger.info(f"🧹 Artifact janitor removed {len(expired)} expired and {len(evicted)} over-quota files")
+        return len(expired) + len(evicted)
+
+    def _run(self):
+        self.scan()
+        while not self._stopped.is_set():
+            try:
+                self.sweep()
+                if self.rescan_interval and time.monotonic() - self._last_scan >= self.rescan_interval:
+                    self.scan()
+            except Exception as e:
+                logger.error(f"Artifact janitor sweep failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start the background thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="artifact-janitor", daemon=True)
+        self._thread.start()
+        logger.info(f"🧹 Artifact janitor started for {self.root} (retention {self.retention:.0f}s, quota {self.max_bytes} bytes)")
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_artifact_janitor: Optional[ArtifactJanitor] = None
+_artifact_janitor_lock = threading.Lock()
+
+
+def get_artifact_janitor() -> ArtifactJanitor:
+    """Process-wide janitor for ./output, fed by the artifact registry"""
+    global _artifact_janitor
+    if _artifact_janitor is None:
+        with _artifact_janitor_lock:
+            if _artifact_janitor is None:
+                janitor = ArtifactJanitor(on_remove=artifact_registry.discard)
+                artifact_registry.add_listener(janitor.track_artifact)
+                _artifact_janitor = janitor
+    return _artifact_janitor
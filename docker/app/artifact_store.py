@@ -0,0 +1,264 @@
+"""
+Content-addressed store for binary artifacts produced by tools.
+
+Image bytes in tool results used to be base64-inlined into the SSE event
+stream. Instead they are written once to the output directory under a name
+derived from their SHA-256, and the stream carries a short /query-get-image
+URL plus metadata. Identical content maps to the same file, so re-sending an
+image costs nothing.
+
+ArtifactRegistry records which artifacts each request produced. Tools register
+their output files as they write them, and callers collect the artifacts made
+inside a block with collect_artifacts() instead of scanning output/ by mtime,
+which also keeps concurrent users from picking up each other's charts.
+Registered artifacts feed the expiry index of the artifact janitor.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+    "html": "text/html",
+    "csv": "text/csv",
+}
+
+# Hex characters of the SHA-256 used in artifact ids
+ARTIFACT_ID_LENGTH = 32
+
+# Names produced by ArtifactStore.put - their content can never change
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{%d}\.[a-z0-9]+$" % ARTIFACT_ID_LENGTH)
+
+
+def media_type_for(filename: str) -> str:
+    """Media type from a filename's extension"""
+    return MEDIA_TYPES.get(filename.rsplit(".", 1)[-1].lower(), "application/octet-stream")
+
+
+def is_content_addressed(filename: str) -> bool:
+    return CONTENT_ADDRESSED_NAME.match(filename) is not None
+
+
+_etags: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_etags_lock = threading.Lock()
+_ETAG_CACHE_SIZE = 1024
+
+
+def content_etag(path: str, stat_result: os.stat_result) -> str:
+    """Strong ETag from the file's content hash, memoized by path, mtime and size"""
+    filename = os.path.basename(path)
+    if is_content_addressed(filename):
+        return f'"{filename.split(".", 1)[0]}"'
+    key = (path, stat_result.st_mtime_ns, stat_result.st_size)
+    with _etags_lock:
+        etag = _etags.get(key)
+        if etag is not None:
+            _etags.move_to_end(key)
+            return etag
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()[:ARTIFACT_ID_LENGTH]}"'
+    with _etags_lock:
+        _etags[key] = etag
+        while len(_etags) > _ETAG_CACHE_SIZE:
+            _etags.popitem(last=False)
+    return etag
+
+
+@dataclass
+class Artifact:
+    """A file in the output directory that can be served by /get-image"""
+    id: str
+    filename: str
+    path: str
+    media_type: str
+    size: int
+    created: float = field(default_factory=time.time)
+    kind: str = "image"
+    request_id: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        # Relative URL that works with both HTTP and HTTPS, routed by the UI to the agent service
+        return f"/query-get-image/{self.filename}"
+
+    def to_event(self) -> Dict[str, Union[str, int]]:
+        """Reference to the artifact for the event stream"""
+        return {"id": self.id, "url": self.url, "media_type": self.media_type, "size": self.size}
+
+
+class ArtifactStore:
+    """Writes binary tool outputs to the output directory, named by content hash"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(os.getcwd(), 'output')
+        self._lock = threading.Lock()
+
+    def put(self, data: Union[bytes, str], extension: str = "png") -> Artifact:
+        """Store data (raw bytes or a base64 string) and return its artifact"""
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+        extension = extension.lower().lstrip(".") or "bin"
+        artifact_id = hashlib.sha256(data).hexdigest()[:ARTIFACT_ID_LENGTH]
+        filename = f"{artifact_id}.{extension}"
+        path = os.path.join(self.root, filename)
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(self.root, exist_ok=True)
+                # Write to a temp file and rename so /get-image never serves a partial file
+                fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                logger.debug(f"🗂️ Stored artifact {filename} ({len(data)} bytes)")
+            else:
+                # Reused content counts as new for retention
+                os.utime(path)
+
+        return Artifact(
+            id=artifact_id,
+            filename=filename,
+            path=path,
+            media_type=media_type_for(filename),
+            size=len(data),
+        )
+
+
+_artifact_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide artifact store rooted at ./output"""
+    global _artifact_store
+    if _artifact_store is None:
+        _artifact_store = ArtifactStore()
+    return _artifact_store
+
+
+class ArtifactRegistry:
+    """In-process index of artifacts by id and by the request that produced them"""
+
+    def __init__(self, max_requests: Optional[int] = None):
+        self.max_requests = max_requests or int(os.getenv("ARTIFACT_REGISTRY_MAX_REQUESTS", "256"))
+        self._by_id: Dict[str, Artifact] = {}
+        self._by_request: "OrderedDict[str, List[Artifact]]" = OrderedDict()
+        self._listeners: List[Callable[[Artifact], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Artifact], None]):
+        """Call listener(artifact) for every artifact registered from now on"""
+        self._listeners.append(listener)
+
+    def register(self, artifact: Artifact) -> Artifact:
+        """Record an artifact for the current request and any open collectors"""
+        if artifact.request_id is None:
+            artifact.request_id = _current_request.get()
+        with self._lock:
+            self._by_id[artifact.id] = artifact
+            if artifact.request_id is not None:
+                self._by_request.setdefault(artifact.request_id, []).append(artifact)
+                self._by_request.move_to_end(artifact.request_id)
+                while len(self._by_request) > self.max_requests:
+                    # Forget the oldest request's index entries (files are left to the janitor)
+                    _, dropped = self._by_request.popitem(last=False)
+                    for old in dropped:
+                        if self._by_id.get(old.id) is old:
+                            del self._by_id[old.id]
+        for listener in self._listeners:
+            listener(artifact)
+        for collected in _collectors.get():
+            collected.append(artifact)
+        return artifact
+
+    def register_file(self, path: str, kind: str = "image") -> Artifact:
+        """Register a file a tool wrote to the output directory"""
+        filename = os.path.basename(path)
+        artifact = Artifact(
+            id=filename.rsplit(".", 1)[0],
+            filename=filename,
+            path=path,
+            media_type=media_type_for(filename),
+            size=os.path.getsize(path),
+            kind=kind,
+        )
+        return self.register(artifact)
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        """Look up an artifact by id (or by filename)"""
+        with self._lock:
+            artifact = self._by_id.get(artifact_id)
+            if artifact is None and "." in artifact_id:
+                artifact = self._by_id.get(artifact_id.rsplit(".", 1)[0])
+            return artifact
+
+    def discard(self, artifact_id: str):
+        """Forget an artifact whose file was removed (by id or by filename)"""
+        with self._lock:
+            self._by_id.pop(artifact_id.rsplit(".", 1)[0], None)
+
+    def for_request(self, request_id: str) -> List[Artifact]:
+        """Artifacts produced while serving request_id, in creation order"""
+        with self._lock:
+            return list(self._by_request.get(request_id, []))
+
+
+_current_request: ContextVar[Optional[str]] = ContextVar("artifact_request_id", default=None)
+_collectors: ContextVar[Tuple[List[Artifact], ...]] = ContextVar("artifact_collectors", default=())
+
+artifact_registry = ArtifactRegistry()
+
+
+@contextmanager
+def use_artifact_request(request_id: str):
+    """Attribute artifacts registered in the enclosed work to request_id"""
+    token = _current_request.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _current_request.reset(token)
+
+
+@contextmanager
+def collect_artifacts():
+    """Collect the artifacts registered in the enclosed work (including tool threads)"""
+    collected: List[Artifact] = []
+    token = _collectors.set(_collectors.get() + (collected,))
+    try:
+        yield collected
+    finally:
+        _collectors.reset(token)
+
+
+def register_artifact(path: str, kind: str = "image") -> Optional[Artifact]:
+    """Register a tool output file, logging instead of failing the tool"""
+    try:
+        return artifact_registry.register_file(path, kind)
+    except OSError as e:
+        logger.warning(f"Could not register artifact {path}: {e}")
+        return None
@@ -0,0 +1,161 @@
+"""
+Event bus between the supervisor stream and the SSE response generator.
+
+Model content and StreamingCallbackHandler events flow through one bounded
+asyncio.Queue, so tool progress reaches the client as soon as it happens
+instead of waiting for the next model chunk. Content is written with
+backpressure (the agent stream waits for the client); callback events are
+published without blocking and, when the queue is full, low-priority events
+are coalesced into a count while high-priority ones wait in a small overflow.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Event types that can be summarized instead of delivered when the client falls behind
+LOW_PRIORITY_EVENT_TYPES = {
+    "📟 text_generation",
+    "📡 tool_stream",
+    "🔄 init_event_loop",
+    "▶️ start_event_loop",
+    "📝 start",
+    "📝 delta",
+    "🚀 messageStart",
+    "📄 contentBlockStart",
+    "📄 contentBlockStop",
+    "raw_event",
+    "❓ unknown",
+}
+
+# Event types the stream loop relies on (line breaks, usage annotation); parked even past maxsize
+ESSENTIAL_EVENT_TYPES = {
+    "📊 usage",
+    "🏁 messageStop",
+}
+
+_END = object()
+
+
+class StreamEventBus:
+    """Bounded, priority-aware queue feeding one streaming response"""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize or int(os.getenv("STREAM_EVENT_QUEUE_SIZE", "256"))
+        self._queue: asyncio.Queue = asyncio.Queue(self.maxsize)
+        self._overflow: deque = deque()
+        self._overflow_drained = asyncio.Event()
+        self._overflow_drained.set()
+        self._coalesced: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._error: Optional[BaseException] = None
+
+    @staticmethod
+    def is_low_priority(event: Any) -> bool:
+        return isinstance(event, dict) and event.get("type") in LOW_PRIORITY_EVENT_TYPES
+
+    def publish(self, event: dict):
+        """Publish a callback event without blocking; safe to call from tool threads"""
+        if self._loop is None:
+            logger.debug("Event published before the stream started, dropping")
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._offer(("event", event))
+        else:
+            self._loop.call_soon_threadsafe(self._offer, ("event", event))
+
+    def _offer(self, item: Tuple[str, Any]):
+        """Enqueue an event, coalescing or parking it when the queue is full"""
+        # Once anything is parked, later events queue behind it to keep ordering
+        if not self._overflow and not self._queue.full():
+            self._queue.put_nowait(item)
+            return
+
+        event = item[1]
+        event_type = event.get("type", "unknown") if isinstance(event, dict) else "unknown"
+        if self.is_low_priority(event):
+            self._coalesced[event_type] += 1
+            return
+        if len(self._overflow) >= self.maxsize and event_type not in ESSENTIAL_EVENT_TYPES:
+            logger.warning(f"Stream event overflow full, dropping {event_type} event")
+            self._coalesced[event_type] += 1
+            return
+
+        self._overflow.append(item)
+        self._overflow_drained.clear()
+
+    async def put_content(self, text: str):
+        """Queue model content, waiting while the client is behind"""
+        while self._overflow:
+            await self._overflow_drained.wait()
+        await self._queue.put(("content", text))
+
+    def _refill(self):
+        """Move parked events into the queue as space frees up"""
+        while self._overflow and not self._queue.full():
+            self._queue.put_nowait(self._overflow.popleft())
+        if not self._overflow:
+            self._overflow_drained.set()
+
+    def _coalesced_event(self) -> dict:
+        counts = dict(self._coalesced)
+        self._coalesced.clear()
+        return {
+            "type": "📉 events_coalesced",
+            "agent": "stream",
+            "data": {"coalesced": ", ".join(f"{name}: {count}" for name, count in counts.items())},
+        }
+
+    async def stream(self, producer: Awaitable[None],
+                     tick: Optional[Callable[[], Optional[float]]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Run producer in a task and yield ("content", text) / ("event", dict) items until it finishes.
+        
+        tick, if given, returns how long the consumer may wait for the next item (None for
+        no limit); when that time passes without an item a ("tick", None) item is yielded.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+
+        async def run():
+            try:
+                await producer
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._error = e
+            # Deliver the end marker after anything already parked
+            while self._overflow:
+                await self._overflow_drained.wait()
+            await self._queue.put(("end", _END))
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                timeout = tick() if tick else None
+                if timeout is None:
+                    kind, payload = await self._queue.get()
+                else:
+                    try:
+                        kind, payload = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        yield "tick", None
+                        continue
+                self._refill()
+                if self._coalesced:
+                    yield "event", self._coalesced_event()
+                if kind == "end":
+                    break
+                yield kind, payload
+
+            if self._error is not None:
+                raise self._error
+        finally:
+            # Client went away or we are done - never leave the agent running detached
+            if not task.done():
+                task.cancel()
@@ -1,3 +1,15 @@
-from .bedrock_guardrails import BedrockGuardrailConfig, NotifyOnlyGuardrailsHook
+from .bedrock_guardrails import (
+    BedrockGuardrailConfig,
+    GuardrailVerdictCache,
+    NotifyOnlyGuardrailsHook,
+    ShadowGuardrailEvaluator,
+    verdict_cache,
+)
 
-__all__ = ["BedrockGuardrailConfig", "NotifyOnlyGuardrailsHook"]
+__all__ = [
+    "BedrockGuardrailConfig",
+    "GuardrailVerdictCache",
+    "NotifyOnlyGuardrailsHook",
+    "ShadowGuardrailEvaluator",
+    "verdict_cache",
+]
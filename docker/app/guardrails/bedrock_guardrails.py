@@ -1,8 +1,99 @@
 import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import boto3
 from strands.models import BedrockModel
 from strands.hooks import HookProvider, HookRegistry, MessageAddedEvent, AfterInvocationEvent
 
+logger = logging.getLogger(__name__)
+
+class GuardrailVerdictCache:
+    """TTL/LRU cache of ApplyGuardrail verdicts keyed by guardrail, source and content hash"""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries or int(os.getenv("GUARDRAIL_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("GUARDRAIL_CACHE_TTL_SECONDS", "3600"))
+        self.enabled = os.getenv("GUARDRAIL_CACHE_ENABLED", "true").lower() == "true"
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(guardrail_id: str, guardrail_version: str, source: str, content: str) -> tuple:
+        return (guardrail_id, guardrail_version, source, hashlib.sha256(content.encode("utf-8")).hexdigest())
+
+    def get(self, key: tuple):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, response: dict):
+        if not self.enabled:
+            return
+        # Only the verdict is kept - usage and request metadata are per call
+        verdict = {"action": response.get("action", "NONE"), "assessments": response.get("assessments", [])}
+        if "outputs" in response:
+            verdict["outputs"] = response["outputs"]
+        with self._lock:
+            self._entries[key] = (time.monotonic(), verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+verdict_cache = GuardrailVerdictCache()
+
+
+def apply_guardrail_cached(bedrock_client, guardrail_id: str, guardrail_version: str, source: str,
+                           content: str, cache: GuardrailVerdictCache = None):
+    """Call ApplyGuardrail unless the same content was already evaluated; returns (verdict, cached)"""
+    cache = cache or verdict_cache
+    key = cache.key(guardrail_id, guardrail_version, source, content)
+    verdict = cache.get(key)
+    if verdict is not None:
+        return verdict, True
+    response = bedrock_client.apply_guardrail(
+        guardrailIdentifier=guardrail_id,
+        guardrailVersion=guardrail_version,
+        source=source,
+        content=[{"text": {"text": content}}]
+    )
+    cache.put(key, response)
+    return response, False
+
 class BedrockGuardrailConfig:
     """Configuration for Bedrock guardrails"""
     
@@ -36,13 +127,81 @@ class BedrockGuardrailConfig:
             guardrail_trace="enabled",
         )
 
+class ShadowGuardrailEvaluator:
+    """Runs shadow-mode guardrail checks off the request path.
+    
+    Checks run on a small worker pool. When GUARDRAIL_SHADOW_MAX_PENDING checks are
+    already waiting the new one is dropped (and counted) rather than queued, and
+    GUARDRAIL_SHADOW_SAMPLE_RATE evaluates only a fraction of traffic.
+    """
+    
+    def __init__(self, max_workers: int = None, max_pending: int = None, sample_rate: float = None):
+        self.max_workers = max_workers or int(os.getenv("GUARDRAIL_SHADOW_WORKERS", "2"))
+        self.max_pending = max_pending or int(os.getenv("GUARDRAIL_SHADOW_MAX_PENDING", "64"))
+        if sample_rate is None:
+            sample_rate = float(os.getenv("GUARDRAIL_SHADOW_SAMPLE_RATE", "1.0"))
+        self.sample_rate = sample_rate
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="guardrail-shadow")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats_lock = threading.Lock()
+        self.stats = {"submitted": 0, "sampled_out": 0, "dropped": 0, "completed": 0}
+    
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+    
+    def submit(self, evaluate, content: str, source: str) -> bool:
+        """Schedule evaluate(content, source); returns False if it was sampled out or dropped"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self._count("sampled_out")
+            return False
+        if not self._slots.acquire(blocking=False):
+            self._count("dropped")
+            logger.warning(f"[GUARDRAIL] Shadow evaluation dropped for {source}, {self.max_pending} checks pending")
+            return False
+        self._count("submitted")
+        
+        def run():
+            try:
+                evaluate(content, source)
+            finally:
+                self._slots.release()
+                self._count("completed")
+        
+        try:
+            self._executor.submit(run)
+        except RuntimeError:
+            # Interpreter shutting down
+            self._slots.release()
+            return False
+        return True
+
+
+_shadow_evaluator = None
+_shadow_evaluator_lock = threading.Lock()
+
+
+def get_shadow_evaluator() -> ShadowGuardrailEvaluator:
+    """Process-wide shadow evaluation pool"""
+    global _shadow_evaluator
+    if _shadow_evaluator is None:
+        with _shadow_evaluator_lock:
+            if _shadow_evaluator is None:
+                _shadow_evaluator = ShadowGuardrailEvaluator()
+    return _shadow_evaluator
+
+
 class NotifyOnlyGuardrailsHook(HookProvider):
     """Hook for shadow mode guardrail monitoring"""
     
-    def __init__(self, guardrail_id: str, guardrail_version: str, region: str = "us-east-1"):
+    def __init__(self, guardrail_id: str, guardrail_version: str, region: str = "us-east-1",
+                 evaluator: ShadowGuardrailEvaluator = None):
         self.guardrail_id = guardrail_id
         self.guardrail_version = guardrail_version
         self.bedrock_client = boto3.client("bedrock-runtime", region)
+        if evaluator is None and os.getenv("GUARDRAIL_SHADOW_ASYNC", "true").lower() == "true":
+            evaluator = get_shadow_evaluator()
+        self.evaluator = evaluator  # None evaluates inline
 
     def register_hooks(self, registry: HookRegistry) -> None:
         registry.add_callback(MessageAddedEvent, self.check_user_input)
@@ -50,33 +209,51 @@ class NotifyOnlyGuardrailsHook(HookProvider):
 
     def evaluate_content(self, content: str, source: str = "INPUT"):
         """Evaluate content using Bedrock ApplyGuardrail API in shadow mode"""
+        started = time.monotonic()
         try:
-            response = self.bedrock_client.apply_guardrail(
-                guardrailIdentifier=self.guardrail_id,
-                guardrailVersion=self.guardrail_version,
-                source=source,
-                content=[{"text": {"text": content}}]
+            response, cached = apply_guardrail_cached(
+                self.bedrock_client, self.guardrail_id, self.guardrail_version, source, content
             )
-
-            if response.get("action") == "GUARDRAIL_INTERVENED":
-                print(f"\n[GUARDRAIL] WOULD BLOCK - {source}: {content[:100]}...")
-                for assessment in response.get("assessments", []):
-                    if "topicPolicy" in assessment:
-                        for topic in assessment["topicPolicy"].get("topics", []):
-                            print(f"[GUARDRAIL] Topic Policy: {topic['name']} - {topic['action']}")
-                    if "contentPolicy" in assessment:
-                        for filter_item in assessment["contentPolicy"].get("filters", []):
-                            print(f"[GUARDRAIL] Content Policy: {filter_item['type']} - {filter_item['confidence']} confidence")
-
         except Exception as e:
             print(f"[GUARDRAIL] Evaluation failed: {e}")
+            return None
+
+        result = {
+            "event": "guardrail_shadow",
+            "guardrail_id": self.guardrail_id,
+            "guardrail_version": self.guardrail_version,
+            "source": source,
+            "action": response.get("action", "NONE"),
+            "latency_ms": round((time.monotonic() - started) * 1000),
+            "cached": cached,
+        }
+        if response.get("action") == "GUARDRAIL_INTERVENED":
+            topics, filters = [], []
+            for assessment in response.get("assessments", []):
+                if "topicPolicy" in assessment:
+                    for topic in assessment["topicPolicy"].get("topics", []):
+                        topics.append({"name": topic.get("name"), "action": topic.get("action")})
+                if "contentPolicy" in assessment:
+                    for filter_item in assessment["contentPolicy"].get("filters", []):
+                        filters.append({"type": filter_item.get("type"), "confidence": filter_item.get("confidence")})
+            result.update(topics=topics, filters=filters, content=content[:100])
+            logger.warning(f"[GUARDRAIL] WOULD BLOCK {json.dumps(result)}")
+        else:
+            logger.info(f"[GUARDRAIL] {json.dumps(result)}")
+        return result
+
+    def _evaluate(self, content: str, source: str):
+        if self.evaluator is None:
+            self.evaluate_content(content, source)
+        else:
+            self.evaluator.submit(self.evaluate_content, content, source)
 
     def check_user_input(self, event: MessageAddedEvent) -> None:
         """Check user input before model invocation"""
         if event.message.get("role") == "user":
             content = "".join(block.get("text", "") for block in event.message.get("content", []))
             if content:
-                self.evaluate_content(content, "INPUT")
+                self._evaluate(content, "INPUT")
 
     def check_assistant_response(self, event: AfterInvocationEvent) -> None:
         """Check assistant response after model invocation"""
@@ -84,4 +261,4 @@ class NotifyOnlyGuardrailsHook(HookProvider):
             assistant_message = event.agent.messages[-1]
             content = "".join(block.get("text", "") for block in assistant_message.get("content", []))
             if content:
-                self.evaluate_content(content, "OUTPUT")
+                self._evaluate(content, "OUTPUT")
@@ -0,0 +1,122 @@
+"""
+In-process cache of recent conversation turns.
+
+load_conversation_history (before every supervisor invocation) and the
+/conversation endpoint both read the last turns of a session from AgentCore
+memory. RecentTurnsCache keeps those turns per (memory_id, actor_id, session_id)
+in an LRU and is updated by the memory write path, so repeated reads of an
+active session are served locally. Like MemoryClient.get_last_k_turns, turns
+are kept in list_events order and a read returns the first k of them. Entries expire after MEMORY_CACHE_TTL_SECONDS
+to pick up writes made by other replicas.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]  # (memory_id, actor_id, session_id)
+Turns = List[List[Dict]]
+
+
+@dataclass
+class _Entry:
+    turns: Turns
+    complete: bool  # True when the remote returned everything the session has
+    loaded_at: float
+
+
+class RecentTurnsCache:
+    """LRU of recent turns per memory session, with hit/miss counters"""
+
+    def __init__(self, max_sessions: Optional[int] = None, max_turns: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.max_sessions = max_sessions or int(os.getenv("MEMORY_CACHE_MAX_SESSIONS", "256"))
+        self.max_turns = max_turns or int(os.getenv("MEMORY_CACHE_MAX_TURNS", "20"))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("MEMORY_CACHE_TTL_SECONDS", "300"))
+        self.enabled = os.getenv("MEMORY_CACHE_ENABLED", "true").lower() == "true"
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: CacheKey, k: int) -> Optional[Turns]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl:
+            del self._entries[key]
+            return None
+        if not entry.complete and len(entry.turns) < k:
+            return None  # Cached fewer turns than asked for
+        self._entries.move_to_end(key)
+        return [list(turn) for turn in entry.turns[:k]]
+
+    def get_last_k_turns(self, key: CacheKey, k: int, loader: Callable[[int], Optional[Turns]]) -> Optional[Turns]:
+        """Return the last k turns for key, calling loader(k) on a miss"""
+        if not self.enabled:
+            return loader(k)
+        with self._lock:
+            turns = self._lookup(key, k)
+            if turns is not None:
+                self.hits += 1
+                return turns
+            self.misses += 1
+
+        requested = max(k, self.max_turns)
+        turns = loader(requested)
+        if turns is None:
+            return None
+        with self._lock:
+            self._entries[key] = _Entry(
+                turns=[list(turn) for turn in turns[:self.max_turns]],
+                complete=len(turns) < requested and len(turns) <= self.max_turns,
+                loaded_at=time.monotonic()
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+        return turns[:k]
+
+    def append(self, key: CacheKey, content: str, role: str):
+        """Record a newly written message in a cached session"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return  # Not cached - the next read loads it from memory
+            if not entry.complete:
+                return  # New messages follow turns beyond the cached ones
+            message = {"role": role.upper(), "content": {"text": content}}
+            if message["role"] == "USER" or not entry.turns:
+                entry.turns.append([message])
+            else:
+                entry.turns[-1].append(message)
+            if len(entry.turns) > self.max_turns:
+                del entry.turns[self.max_turns:]
+                entry.complete = False
+
+    def invalidate(self, key: CacheKey):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "sessions": len(self._entries),
+            }
+
+
+recent_turns_cache = RecentTurnsCache()
@@ -3,26 +3,147 @@ Memory integration hooks for the AI Data Explorer multi-agent system.
 Integrates AWS AgentCore Memory with existing guardrails functionality.
 """
 
+import asyncio
 import os
 import logging
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Optional
-from strands.hooks import HookProvider, HookRegistry, MessageAddedEvent, BeforeInvocationEvent
+from typing import Any, Optional
+from strands.hooks import HookProvider, HookRegistry, MessageAddedEvent, BeforeInvocationEvent, AfterInvocationEvent
 from strands.experimental.hooks import AfterModelInvocationEvent
 
+try:
+    from .memory_cache import recent_turns_cache
+except ImportError:
+    from memory_cache import recent_turns_cache
+
 logger = logging.getLogger(__name__)
 
+MEMORY_NAME = "AIDataExplorer_STM"
+
+
+def is_memory_not_found(error: Exception) -> bool:
+    """Check whether an AgentCore error means the memory resource no longer exists"""
+    response = getattr(error, 'response', None)
+    code = response.get('Error', {}).get('Code', '') if isinstance(response, dict) else ''
+    return code == 'ResourceNotFoundException' or 'ResourceNotFound' in str(error)
+
+
+class MemoryRegistry:
+    """Process-wide MemoryClient and memory id, resolved once and reused by every request.
+    
+    The memory id is only looked up again after a not-found error. Failed finds and failed
+    creates are each retried at most every MEMORY_LOOKUP_RETRY_SECONDS, so a find that comes
+    up empty does not stop the next caller from creating the resource. One caller resolves
+    at a time; the others wait for its result.
+    """
+    
+    def __init__(self, memory_name: str = MEMORY_NAME, region_name: Optional[str] = None):
+        self.memory_name = memory_name
+        self.region_name = region_name
+        self.retry_seconds = float(os.getenv("MEMORY_LOOKUP_RETRY_SECONDS", "60"))
+        self._lock = threading.Lock()
+        self._resolve_lock = threading.Lock()  # Single flight for lookups and creates
+        self._client = None
+        self._memory_id = None
+        self._retry_after = {False: 0.0, True: 0.0}  # Keyed by create
+    
+    @property
+    def client(self):
+        """Shared MemoryClient (created on first use)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from bedrock_agentcore.memory import MemoryClient
+                    self._client = MemoryClient(region_name=self.region_name or os.getenv("AWS_REGION", "us-east-1"))
+        return self._client
+    
+    def get_memory_id(self, create: bool = False) -> Optional[str]:
+        """Cached memory id; looked up (and optionally created) on first use"""
+        if self._memory_id is not None:
+            return self._memory_id
+        client = self.client
+        # Resolving can wait for a new resource to become active; only callers that need the id wait for it
+        with self._resolve_lock:
+            if self._memory_id is not None or time.monotonic() < self._retry_after[create]:
+                return self._memory_id
+            try:
+                if create:
+                    memory_id = create_memory_resource(client, self.memory_name)
+                else:
+                    memory_id = find_memory_resource(client, self.memory_name)
+            except Exception as e:
+                logger.error(f"Failed to find memory resource: {e}")
+                memory_id = None
+            with self._lock:
+                if memory_id:
+                    self._memory_id = memory_id
+                else:
+                    self._retry_after[create] = time.monotonic() + self.retry_seconds
+                return self._memory_id
+    
+    def invalidate(self, memory_id: Optional[str] = None):
+        """Forget the cached memory id (only if it is still memory_id, when given)"""
+        with self._lock:
+            if memory_id is None or self._memory_id == memory_id:
+                logger.warning(f"🔄 Memory resource {self._memory_id} not found, resolving again")
+                self._memory_id = None
+                self._retry_after = {False: 0.0, True: 0.0}
+    
+    def call(self, method: str, memory_id: Optional[str] = None, create: bool = False, **kwargs) -> Any:
+        """Call a MemoryClient method, re-resolving the memory id once if it no longer exists"""
+        memory_id = memory_id or self.get_memory_id(create=create)
+        if not memory_id:
+            return None
+        try:
+            return getattr(self.client, method)(memory_id=memory_id, **kwargs)
+        except Exception as e:
+            if not is_memory_not_found(e):
+                raise
+            self.invalidate(memory_id)
+            memory_id = self.get_memory_id(create=create)
+            if not memory_id:
+                return None
+            return getattr(self.client, method)(memory_id=memory_id, **kwargs)
+    
+    def reset(self):
+        """Drop the cached client and memory id"""
+        with self._lock:
+            self._client = None
+            self._memory_id = None
+            self._retry_after = {False: 0.0, True: 0.0}
+
+
+memory_registry = MemoryRegistry()
+
+
 class SharedMemoryHook(HookProvider):
     """Hook provider that integrates shared memory with guardrails validation"""
     
-    def __init__(self, memory_client, memory_id: str, actor_id: str, session_id: str):
+    def __init__(self, memory_client, memory_id: str, actor_id: str, session_id: str,
+                 registry: Optional[MemoryRegistry] = None, writer=None):
         self.memory_client = memory_client
         self.memory_id = memory_id
+        self.registry = registry
+        self.writer = writer  # Optional MemoryWriter for write-behind persistence
+        self.flush_wait = float(os.getenv("MEMORY_FLUSH_WAIT_SECONDS", "2"))
         self.actor_id = actor_id
         self.session_id = session_id
         self.blocked_outputs = set()  # Track blocked assistant messages
         self.history_loaded = False  # Track if we've loaded history for this session
         
+    def _call_memory(self, method: str, **kwargs):
+        """Call the memory client, following the registry if the memory resource was replaced"""
+        if self.registry is None:
+            return getattr(self.memory_client, method)(memory_id=self.memory_id, **kwargs)
+        result = self.registry.call(method, memory_id=self.memory_id, create=True, **kwargs)
+        self.memory_id = self.registry.get_memory_id() or self.memory_id
+        return result
+    
+    def _cache_key(self):
+        return (self.memory_id, self.actor_id, self.session_id)
+    
     def after_model_invocation(self, event: AfterModelInvocationEvent):
         """Track model outputs that fail guardrail checks"""
         if event.exception is not None or event.stop_response is None:
@@ -96,28 +217,48 @@ class SharedMemoryHook(HookProvider):
             logger.debug(f"⛔ MEMORY DEBUG: Skipping blocked assistant message")
             return
         
+        # Hand the message to the background writer so the agent loop does not wait on it
+        if self.writer is not None:
+            if self.registry is not None:
+                self.memory_id = self.registry.get_memory_id() or self.memory_id
+            if self.writer.submit(self.memory_id, self.actor_id, self.session_id, content, role):
+                recent_turns_cache.append(self._cache_key(), content, role)
+            return
+        
         # Store the message in memory
         try:
-            self.memory_client.create_event(
-                memory_id=self.memory_id,
+            self._call_memory(
+                "create_event",
                 actor_id=self.actor_id,
                 session_id=self.session_id,
                 messages=[(content, role)]
             )
+            recent_turns_cache.append(self._cache_key(), content, role)
             logger.debug(f"✅ MEMORY DEBUG: Successfully stored {role} message")
         except Exception as e:
             print(f"❌ MEMORY DEBUG: Failed to store message: {e}")
     
+    def _load_recent_turns(self, k: int):
+        """Read the last k turns from memory once the writer has stored this session's messages"""
+        if self.writer is not None:
+            # Cached turns already include queued messages - only a read from memory waits for them
+            self.writer.flush_session(self.actor_id, self.session_id, timeout=self.flush_wait)
+        return self._call_memory(
+            "get_last_k_turns",
+            actor_id=self.actor_id,
+            session_id=self.session_id,
+            k=k,
+            branch_name="main"
+        )
+    
     def load_conversation_history(self, agent):
         """Load recent conversation history into agent's system prompt"""
         logger.debug(f"🔧 MEMORY DEBUG: Loading conversation history for {self.actor_id}")
         try:
-            recent_turns = self.memory_client.get_last_k_turns(
-                memory_id=self.memory_id,
-                actor_id=self.actor_id,
-                session_id=self.session_id,
+            recent_turns = recent_turns_cache.get_last_k_turns(
+                self._cache_key(),
                 k=10,  # Get more history
-                branch_name="main"
+                loader=self._load_recent_turns
             )
             
             if recent_turns:
@@ -152,25 +293,39 @@ class SharedMemoryHook(HookProvider):
         registry.add_callback(BeforeInvocationEvent, self.before_invocation)
         registry.add_callback(AfterModelInvocationEvent, self.after_model_invocation)
         registry.add_callback(MessageAddedEvent, self.on_message_added)
+        registry.add_callback(AfterInvocationEvent, self.after_invocation)
         logger.info(f"✅ Memory hooks registered for {self.actor_id}")
     
-    def before_invocation(self, event: BeforeInvocationEvent):
+    async def before_invocation(self, event: BeforeInvocationEvent):
         """Load conversation history before agent starts processing"""
         print(f"🔧 MEMORY DEBUG: Loading conversation history BEFORE invocation for {self.actor_id}")
-        self.load_conversation_history(event.agent)
+        # A cache miss reads AgentCore memory (after a flush) - keep it off the event loop
+        await asyncio.to_thread(self.load_conversation_history, event.agent)
+    
+    def after_invocation(self, event: AfterInvocationEvent):
+        """Write out this session's pending messages once the agent is done"""
+        if self.writer is not None:
+            self.writer.flush_session(self.actor_id, self.session_id)
+
+
+def find_memory_resource(memory_client, memory_name: str) -> Optional[str]:
+    """Find an existing memory resource by name prefix"""
+    # AWS adds a unique suffix to memory names
+    for memory in memory_client.list_memories():
+        memory_id = memory.get('id', '')
+        if memory_id.startswith(memory_name):
+            logger.info(f"✅ Using existing memory resource: {memory_id}")
+            return memory_id
+    return None
 
 
 def create_memory_resource(memory_client, memory_name: str) -> Optional[str]:
     """Create or retrieve existing memory resource"""
     try:
         # First try to find existing memory (AWS adds suffix to names)
-        memories = memory_client.list_memories()
-        for memory in memories:
-            # Check if memory id starts with our prefix (AWS adds unique suffix)
-            memory_id = memory.get('id', '')
-            if memory_id.startswith(memory_name):
-                logger.info(f"✅ Using existing memory resource: {memory_id}")
-                return memory_id
+        memory_id = find_memory_resource(memory_client, memory_name)
+        if memory_id:
+            return memory_id
         
         # If not found, create new memory
         memory = memory_client.create_memory_and_wait(
@@ -196,17 +351,20 @@ def get_memory_hook(actor_id: str, session_id: str, user_id: str = "default") ->
         return None
         
     try:
-        from bedrock_agentcore.memory import MemoryClient
-        
-        memory_client = MemoryClient(region_name=os.getenv("AWS_REGION", "us-east-1"))
-        safe_user_id = user_id.replace('@', '_').replace('.', '_')
-        memory_name = "AIDataExplorer_STM"
-        
-        memory_id = create_memory_resource(memory_client, memory_name)
+        memory_id = memory_registry.get_memory_id(create=True)
         if not memory_id:
             return None
             
-        return SharedMemoryHook(memory_client, memory_id, actor_id, session_id)
+        writer = None
+        if os.getenv("MEMORY_WRITE_BEHIND", "true").lower() == "true":
+            try:
+                from .memory_writer import get_memory_writer
+            except ImportError:
+                from memory_writer import get_memory_writer
+            writer = get_memory_writer()
+        
+        return SharedMemoryHook(memory_registry.client, memory_id, actor_id, session_id,
+                                registry=memory_registry, writer=writer)
         
     except ImportError:
         logger.warning("bedrock-agentcore not available, memory disabled")
@@ -0,0 +1,196 @@
+"""
+Write-behind persistence for AgentCore memory events.
+
+SharedMemoryHook used to call create_event from inside the MessageAddedEvent
+callback, so every stored message put a network round trip between tool calls.
+MemoryWriter takes the messages from a bounded queue on a background thread,
+batches them per (actor, session) into a single create_event call, and flushes
+when a batch is full, when it is older than the flush interval, when the
+session's invocation ends, or when the process shuts down. Failed writes are
+retried with exponential backoff.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .memory_cache import recent_turns_cache
+except ImportError:
+    from memory_cache import recent_turns_cache
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]  # (actor_id, session_id)
+
+
+@dataclass
+class _Batch:
+    memory_id: str
+    messages: List[Tuple[str, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+
+
+class MemoryWriter:
+    """Background writer that batches memory events per (actor, session)"""
+
+    def __init__(self, registry=None, batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 queue_size: Optional[int] = None, max_retries: Optional[int] = None,
+                 retry_backoff: Optional[float] = None):
+        self.registry = registry
+        self.batch_size = batch_size or int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "10"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("MEMORY_WRITE_FLUSH_SECONDS", "2"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("MEMORY_WRITE_MAX_RETRIES", "3"))
+        self.retry_backoff = retry_backoff if retry_backoff is not None else float(os.getenv("MEMORY_WRITE_RETRY_BACKOFF", "0.5"))
+        self.enqueue_timeout = float(os.getenv("MEMORY_WRITE_ENQUEUE_TIMEOUT", "1"))
+        self._queue: queue.Queue = queue.Queue(queue_size or int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", "1000")))
+        self._pending: Dict[SessionKey, _Batch] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "retries": 0, "dropped": 0, "failed": 0}
+
+    def _get_registry(self):
+        if self.registry is None:
+            try:
+                from .memory_hooks import memory_registry
+            except ImportError:
+                from memory_hooks import memory_registry
+            self.registry = memory_registry
+        return self.registry
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, memory_id: str, actor_id: str, session_id: str, content: str, role: str) -> bool:
+        """Queue a message for persistence; returns False if it had to be dropped"""
+        self._ensure_started()
+        try:
+            # Brief backpressure when the writer is far behind, then shed load
+            self._queue.put(("message", (actor_id, session_id), memory_id, (content, role)),
+                            timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.error(f"❌ Memory write queue full, dropped {role} message for {actor_id}")
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def flush_session(self, actor_id: str, session_id: str, timeout: Optional[float] = None) -> bool:
+        """Write out a session's pending messages; waits up to timeout seconds if given"""
+        if self._thread is None:
+            return True  # Nothing has ever been queued
+        done = threading.Event()
+        try:
+            self._queue.put(("flush", (actor_id, session_id), None, done), timeout=self.enqueue_timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout) if timeout is not None else True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write out everything pending and wait for it"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", None, None, done))
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush pending messages and stop the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.flush(timeout)
+        self._queue.put(("stop", None, None, None))
+        self._thread.join(timeout)
+        logger.info(f"🛑 Memory writer stopped: {self.stats}")
+
+    def _next_timeout(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        oldest = min(batch.started for batch in self._pending.values())
+        return max(0.0, oldest + self.flush_interval - time.monotonic())
+
+    def _run(self):
+        while True:
+            try:
+                kind, key, memory_id, payload = self._queue.get(timeout=self._next_timeout())
+            except queue.Empty:
+                kind = None
+
+            if kind == "message":
+                batch = self._pending.get(key)
+                if batch is not None and batch.memory_id != memory_id:
+                    self._write(key, self._pending.pop(key))
+                    batch = None
+                if batch is None:
+                    batch = self._pending[key] = _Batch(memory_id)
+                batch.messages.append(payload)
+                if len(batch.messages) >= self.batch_size:
+                    self._write(key, self._pending.pop(key))
+            elif kind == "flush":
+                keys = [key] if key is not None else list(self._pending)
+                for flush_key in keys:
+                    if flush_key in self._pending:
+                        self._write(flush_key, self._pending.pop(flush_key))
+                payload.set()
+            elif kind == "stop":
+                for flush_key in list(self._pending):
+                    self._write(flush_key, self._pending.pop(flush_key))
+                return
+
+            # Time-based flush for batches that have waited long enough
+            now = time.monotonic()
+            for flush_key in [k for k, b in self._pending.items() if now - b.started >= self.flush_interval]:
+                self._write(flush_key, self._pending.pop(flush_key))
+
+    def _write(self, key: SessionKey, batch: _Batch):
+        actor_id, session_id = key
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._get_registry().call(
+                    "create_event",
+                    memory_id=batch.memory_id,
+                    create=True,
+                    actor_id=actor_id,
+                    session_id=session_id,
+                    messages=batch.messages
+                )
+                self.stats["written"] += len(batch.messages)
+                self.stats["batches"] += 1
+                logger.debug(f"✅ MEMORY DEBUG: Stored {len(batch.messages)} messages for {actor_id}")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.stats["failed"] += len(batch.messages)
+                    # The cached turns now include messages memory never received
+                    recent_turns_cache.invalidate((batch.memory_id, actor_id, session_id))
+                    logger.error(f"❌ MEMORY DEBUG: Failed to store {len(batch.messages)} messages for {actor_id}: {e}")
+                    return
+                self.stats["retries"] += 1
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"⚠️ Memory write failed for {actor_id} ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+
+_memory_writer: Optional[MemoryWriter] = None
+_memory_writer_lock = threading.Lock()
+
+
+def get_memory_writer() -> MemoryWriter:
+    """Process-wide memory writer (started on first use, flushed at exit)"""
+    global _memory_writer
+    if _memory_writer is None:
+        with _memory_writer_lock:
+            if _memory_writer is None:
+                _memory_writer = MemoryWriter()
+                atexit.register(_memory_writer.shutdown)
+    return _memory_writer
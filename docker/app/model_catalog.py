@@ -0,0 +1,130 @@
+"""
+Model catalog backed by llm-config.json.
+
+The catalog is parsed once when the service starts and indexed by model id.
+It is only re-read when the file's mtime changes, and the mtime itself is
+checked at most every MODEL_CATALOG_CHECK_INTERVAL seconds, so lookups from
+the streaming loop are in-memory dictionary reads.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Local copy first (container), then the UI directory for local development
+DEFAULT_CONFIG_PATHS = [
+    os.path.join(os.path.dirname(__file__), 'llm-config.json'),
+    os.path.join(os.path.dirname(__file__), '../../ui/static/llm-config.json'),
+]
+
+
+class ModelCatalog:
+    """Chat and image model metadata indexed by model id"""
+
+    def __init__(self, paths: Optional[List[str]] = None, check_interval: Optional[float] = None):
+        self.paths = paths or DEFAULT_CONFIG_PATHS
+        if check_interval is None:
+            check_interval = float(os.getenv("MODEL_CATALOG_CHECK_INTERVAL", "5"))
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._path = None
+        self._mtime = None
+        self._next_check = 0.0
+        self._chat_models: Dict[str, dict] = {}
+        self._image_models: Dict[str, dict] = {}
+        self.defaults: Dict[str, str] = {}
+        self.reload()
+
+    def _find_config(self) -> Optional[str]:
+        for path in self.paths:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def reload(self):
+        """Parse the config file and rebuild the indexes"""
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        path = self._find_config()
+        self._next_check = time.monotonic() + self.check_interval
+        if path is None:
+            logger.warning("llm-config.json not found, model display names will fall back to ids")
+            return
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, 'r') as f:
+                config = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading model config: {e}")
+            return
+
+        self._chat_models = {model['id']: model for model in config.get('models', [])}
+        self._image_models = {model['id']: model for model in config.get('image_models', [])}
+        self.defaults = config.get('defaults', {})
+        self._path = path
+        self._mtime = mtime
+        logger.info(f"Loaded model catalog from {path}: {len(self._chat_models)} chat, {len(self._image_models)} image models")
+
+    def _refresh(self):
+        """Reload if the config file changed since it was last read"""
+        if time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_check:
+                return
+            path = self._find_config()
+            try:
+                mtime = os.path.getmtime(path) if path else None
+            except OSError:
+                mtime = None
+            if path != self._path or mtime != self._mtime:
+                self._load()
+            else:
+                self._next_check = time.monotonic() + self.check_interval
+
+    def get(self, model_id: str) -> Optional[dict]:
+        """Catalog entry for a chat or image model"""
+        self._refresh()
+        return self._chat_models.get(model_id) or self._image_models.get(model_id)
+
+    def display_name(self, model_id: str) -> str:
+        """Display name for a model id, falling back to the id itself"""
+        model = self.get(model_id)
+        return model['name'] if model else model_id
+
+    @property
+    def loaded(self) -> bool:
+        self._refresh()
+        return bool(self._chat_models or self._image_models)
+
+    def is_chat_model(self, model_id: str) -> bool:
+        self._refresh()
+        return model_id in self._chat_models or model_id in (self.defaults.get('chat'), self.defaults.get('neptune'))
+
+    def is_image_model(self, model_id: str) -> bool:
+        self._refresh()
+        return model_id in self._image_models or model_id == self.defaults.get('image')
+
+    def validate_selection(self, chat_model: str = None, neptune_model: str = None,
+                           image_model: str = None) -> List[str]:
+        """Return error messages for model ids the catalog does not know about"""
+        if not self.loaded:
+            return []  # Nothing to validate against
+        errors = []
+        if chat_model and not self.is_chat_model(chat_model):
+            errors.append(f"Unknown chat model: {chat_model}")
+        if neptune_model and not self.is_chat_model(neptune_model):
+            errors.append(f"Unknown Neptune model: {neptune_model}")
+        if image_model and not self.is_image_model(image_model):
+            errors.append(f"Unknown image model: {image_model}")
+        return errors
+
+
+model_catalog = ModelCatalog()
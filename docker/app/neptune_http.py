@@ -0,0 +1,229 @@
+"""
+SigV4-signed HTTP client for the Neptune REST endpoints.
+
+Statistics, bulk load status and the loader used to build a boto3 session,
+resolve credentials and create a urllib3.PoolManager for every call, paying
+credential resolution and a TLS handshake each time. NeptuneHttpClient keeps one
+keep-alive connection pool and the session's refreshable credentials, and signs
+every request in one place. GET requests are retried on connection errors and
+throttling/5xx responses; the loader POST is not, as it is not idempotent.
+
+AsyncNeptuneClient is the asyncio counterpart for the /openCypher endpoint:
+it signs the same way, keeps an httpx connection pool per event loop and
+decodes the "results" array incrementally, so the first rows of a large result
+can be used before the whole response has arrived.
+
+The module is shared with the data loader Lambda (bundled into its asset by
+the graph DB stack), so it only depends on boto3 and urllib3; httpx is
+imported when an async client is created.
+"""
+
+import asyncio
+import codecs
+import json
+import logging
+import os
+import re
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlencode
+
+import boto3
+import urllib3
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+
+logger = logging.getLogger(__name__)
+
+
+class _NeptuneSigner:
+    """Endpoint, credentials and SigV4 signing shared by the sync and async clients"""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[str] = None, region: Optional[str] = None,
+                 session: Any = None):
+        host = host or os.environ.get('NEPTUNE_HOST')
+        if not host:
+            raise ValueError("Neptune host not configured. Set NEPTUNE_HOST environment variable.")
+        port = port or os.environ.get('NEPTUNE_PORT', '8182')
+        self.base_url = f"https://{host}:{port}"
+        self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
+        self._session = session or boto3.Session()
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    def credentials(self):
+        """Session credentials, resolved once; botocore refreshes them before they expire"""
+        if self._credentials is None:
+            with self._lock:
+                if self._credentials is None:
+                    credentials = self._session.get_credentials()
+                    if credentials is None:
+                        raise RuntimeError("No AWS credentials available to sign Neptune requests")
+                    self._credentials = credentials
+        return self._credentials
+
+    def sign(self, method: str, path: str, body: Optional[str] = None,
+             content_type: str = 'application/json') -> AWSRequest:
+        """Signed request for path (relative to the endpoint, e.g. "/loader", or a full URL)"""
+        url = path if path.startswith('https://') else self.base_url + path
+        request = AWSRequest(method=method, url=url, data=body, headers={'Content-Type': content_type})
+        SigV4Auth(self.credentials(), 'neptune-db', self.region).add_auth(request)
+        return request
+
+
+class NeptuneHttpClient(_NeptuneSigner):
+    """Pooled, SigV4-signing client for one Neptune endpoint"""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[str] = None, region: Optional[str] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 retries: Optional[int] = None, pool_size: Optional[int] = None, session: Any = None):
+        super().__init__(host, port, region, session)
+        retries = retries if retries is not None else int(os.getenv('NEPTUNE_HTTP_RETRIES', '3'))
+        self.http = urllib3.PoolManager(
+            maxsize=pool_size or int(os.getenv('NEPTUNE_HTTP_POOL_SIZE', '10')),
+            timeout=urllib3.Timeout(
+                connect=connect_timeout or float(os.getenv('NEPTUNE_HTTP_CONNECT_TIMEOUT', '5')),
+                read=read_timeout or float(os.getenv('NEPTUNE_HTTP_READ_TIMEOUT', '60')),
+            ),
+            retries=urllib3.Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({'GET', 'HEAD'}),
+                raise_on_status=False,
+            ),
+        )
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> urllib3.HTTPResponse:
+        """Send a signed request; path is relative to the endpoint (e.g. "/loader") or a full URL"""
+        request = self.sign(method, path, json.dumps(payload) if payload is not None else None)
+        return self.http.request(method, request.url, body=request.body, headers=dict(request.headers))
+
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes], key: str) -> AsyncIterator[Any]:
+    """Yield the items of the top-level array at key in a JSON object, decoding them as the bytes arrive.
+
+    Only the text of items not yet yielded is buffered. Items must not be split across keys, which holds for
+    Neptune's {"results": [...]} responses.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ''
+    in_array = False
+    done = False
+
+    async def more() -> bool:
+        nonlocal buffer, done
+        async for chunk in chunks:
+            buffer += utf8.decode(chunk)
+            return True
+        buffer += utf8.decode(b'', final=True)
+        done = True
+        return False
+
+    while True:
+        if not in_array:
+            match = start.search(buffer)
+            if match is None:
+                if not await more():
+                    return  # No such key
+                continue
+            buffer = buffer[match.end():]
+            in_array = True
+
+        position = _WHITESPACE.match(buffer).end()
+        if position < len(buffer) and buffer[position] == ',':
+            position = _WHITESPACE.match(buffer, position + 1).end()
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            end = None
+        # An item ending exactly at the end of the buffer may be a truncated number
+        if end is None or (end == len(buffer) and not done):
+            if not await more():
+                if end is None:
+                    raise ValueError(f"Truncated JSON in {key!r} array")
+            continue
+        buffer = buffer[end:]
+        yield item
+
+
+class AsyncNeptuneClient(_NeptuneSigner):
+    """asyncio client for Neptune's openCypher HTTP endpoint with streamed result decoding"""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[str] = None, region: Optional[str] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 pool_size: Optional[int] = None, session: Any = None, transport: Any = None):
+        import httpx
+
+        super().__init__(host, port, region, session)
+        pool_size = pool_size or int(os.getenv('NEPTUNE_HTTP_POOL_SIZE', '10'))
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                read_timeout or float(os.getenv('NEPTUNE_HTTP_READ_TIMEOUT', '60')),
+                connect=connect_timeout or float(os.getenv('NEPTUNE_HTTP_CONNECT_TIMEOUT', '5')),
+            ),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None):
+        """Send a signed request and return the httpx response"""
+        request = self.sign(method, path, json.dumps(payload) if payload is not None else None)
+        return await self.http.request(method, request.url, content=request.body, headers=dict(request.headers))
+
+    async def stream_opencypher(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> AsyncIterator[dict]:
+        """Run an openCypher query, yielding result rows as they are decoded"""
+        form = {'query': query}
+        if parameters:
+            form['parameters'] = json.dumps(parameters)
+        request = self.sign('POST', '/openCypher', urlencode(form), 'application/x-www-form-urlencoded')
+        async with self.http.stream('POST', request.url, content=request.body,
+                                    headers=dict(request.headers)) as response:
+            if response.status_code != 200:
+                detail = (await response.aread()).decode('utf-8', errors='replace')
+                raise RuntimeError(f"openCypher query failed (HTTP {response.status_code}): {detail}")
+            async for row in iter_json_array(response.aiter_bytes(), 'results'):
+                yield row
+
+    async def opencypher(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[dict]:
+        """Run an openCypher query and return all result rows"""
+        return [row async for row in self.stream_opencypher(query, parameters)]
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+_client: Optional[NeptuneHttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_neptune_client() -> NeptuneHttpClient:
+    """Process-wide client for NEPTUNE_HOST, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = NeptuneHttpClient()
+                logger.info(f"Neptune HTTP client created for {_client.base_url}")
+    return _client
+
+
+# httpx pools belong to the event loop they were created on; strands runs nested agents on their own loops
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncNeptuneClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_neptune_client() -> AsyncNeptuneClient:
+    """Async client for NEPTUNE_HOST on the running event loop, created on first use"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncNeptuneClient()
+    return client
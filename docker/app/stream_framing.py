@@ -0,0 +1,143 @@
+"""
+SSE framing for /query-streaming-with-events.
+
+Model tokens used to become one `data: {...}` frame each. SSEFramer batches
+content deltas (and the matching text_generation events) inside a small time
+or size window, serializes with orjson when it is installed, and writes events
+in a compact form: no whitespace, no empty fields, millisecond timestamps and
+no agent name for the default supervisor. The wire format the UI parses
+(`type`, `data`, `event`, `message`) is unchanged.
+"""
+
+import json
+import os
+import time
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+TEXT_GENERATION_EVENT = "📟 text_generation"
+DEFAULT_AGENT = "supervisor"
+
+
+def dumps(payload: Any) -> str:
+    """Serialize a frame payload to compact JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload).decode("utf-8")
+        except TypeError:
+            pass  # Non-JSON types (e.g. sets) fall back to the stdlib encoder below
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def compact_event(event: Any) -> Any:
+    """Drop empty fields and redundant metadata from a callback event"""
+    if not isinstance(event, dict):
+        return event
+    compact = {}
+    for key, value in event.items():
+        if value is None or value == "" or value == {}:
+            continue
+        if key == "agent" and value == DEFAULT_AGENT:
+            continue
+        if key == "timestamp" and isinstance(value, float):
+            value = round(value, 3)
+        elif key == "data" and isinstance(value, dict):
+            value = {k: v for k, v in value.items() if v is not None and v != ""}
+        compact[key] = value
+    return compact
+
+
+class SSEFramer:
+    """Turns content deltas and callback events into batched SSE frames"""
+
+    def __init__(self, window_ms: Optional[float] = None, max_bytes: Optional[int] = None,
+                 compact: Optional[bool] = None):
+        if window_ms is None:
+            window_ms = float(os.getenv("STREAM_COALESCE_MS", "20"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("STREAM_COALESCE_BYTES", "1024"))
+        if compact is None:
+            compact = os.getenv("STREAM_COMPACT_EVENTS", "true").lower() == "true"
+        self.window = max(0.0, window_ms) / 1000
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self._content = []
+        self._content_size = 0
+        self._text_event = None
+        self._window_start = None
+
+    @staticmethod
+    def frame(payload: dict) -> str:
+        return f"data: {dumps(payload)}\n\n"
+
+    @property
+    def pending(self) -> bool:
+        return self._window_start is not None
+
+    def time_until_flush(self) -> Optional[float]:
+        """Seconds until the open batch must be flushed, or None if nothing is buffered"""
+        if self._window_start is None:
+            return None
+        return max(0.0, self._window_start + self.window - time.monotonic())
+
+    def _open_window(self):
+        if self._window_start is None:
+            self._window_start = time.monotonic()
+
+    def _due(self) -> bool:
+        return (self._content_size >= self.max_bytes or
+                time.monotonic() - self._window_start >= self.window)
+
+    def content(self, text: str) -> str:
+        """Buffer a content delta; returns frames when the batch is full or its window elapsed"""
+        self._content.append(text)
+        self._content_size += len(text)
+        self._open_window()
+        return self.flush() if self._due() else ""
+
+    def event(self, event: Any) -> str:
+        """Frame a callback event, merging consecutive text_generation events of one agent into the batch"""
+        if isinstance(event, dict) and event.get("type") == TEXT_GENERATION_EVENT and self.window:
+            text = (event.get("data") or {}).get("text", "")
+            frames = ""
+            if self._text_event is not None and self._text_event.get("agent") != event.get("agent"):
+                # Nested sub-agents stream alongside the supervisor - text is only merged per agent
+                frames = self.flush()
+            if self._text_event is None:
+                self._text_event = {**event, "data": {**(event.get("data") or {}), "text": text}}
+            else:
+                self._text_event["data"]["text"] += text
+            self._open_window()
+            return frames + (self.flush() if self._due() else "")
+
+        # Anything else closes the batch so ordering relative to content is kept
+        if self.compact:
+            event = compact_event(event)
+        return self.flush() + self.frame({"type": "event", "event": event})
+
+    def error(self, message: str) -> str:
+        return self.flush() + self.frame({"type": "error", "message": message})
+
+    def flush(self) -> str:
+        """Emit everything buffered"""
+        frames = ""
+        if self._content:
+            frames += self.frame({"type": "content", "data": "".join(self._content)})
+            self._content = []
+            self._content_size = 0
+        if self._text_event is not None:
+            event = compact_event(self._text_event) if self.compact else self._text_event
+            frames += self.frame({"type": "event", "event": event})
+            self._text_event = None
+        self._window_start = None
+        return frames
+
+    def tick(self) -> str:
+        """Flush the batch if its window has elapsed"""
+        if self._window_start is not None and self._due():
+            return self.flush()
+        return ""
@@ -1,83 +1,155 @@
+import os
 import time
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, Optional
 import logging
+from artifact_store import artifact_registry, get_artifact_store
 logger = logging.getLogger(__name__)
 
+# Per-event diagnostics (formerly printed to stdout) - enable with CALLBACK_LOG_LEVEL=DEBUG
+event_logger = logging.getLogger(f"{__name__}.events")
+event_logger.setLevel(os.getenv("CALLBACK_LOG_LEVEL", "WARNING").upper())
+
+# Event types that are never streamed or logged
+FILTERED_EVENT_TYPES = {"contentBlockDelta"}
+# Event types that are streamed but too frequent to log
+UNLOGGED_EVENT_TYPES = {"contentBlockDelta", "📟 text_generation"}
+UNKNOWN_EVENT_TYPE = "❓ unknown"
+
+
+# Raw model stream events, keyed by the event's top-level key
+RAW_EVENT_TYPES = {
+    "messageStart": "🚀 messageStart",
+    "messageStop": "🏁 messageStop",
+    "contentBlockStart": "📄 contentBlockStart",
+    "contentBlockStop": "📄 contentBlockStop",
+    "contentBlockDelta": "contentBlockDelta",
+    "metadata": "📊 usage",  # Use "usage" as the title for metadata events
+}
+
+
+def _truncate(text: str, limit: int = 100) -> str:
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def raw_event_type(event: Any) -> str:
+    """Event type for a raw model stream event such as {"messageStop": {...}}"""
+    if not isinstance(event, dict) or not event:
+        return "raw_event"
+    key = next(iter(event))
+    return RAW_EVENT_TYPES.get(key, key)
+
+
+def _format_single_key_event(event: dict) -> Dict[str, Any]:
+    """Show the body of a {key: body} event as "name: value" lines"""
+    inner_content = next(iter(event.values()))
+    if isinstance(inner_content, dict):
+        return {"formatted_content": "\n".join(f"{k}: {v}" for k, v in inner_content.items())}
+    return {"formatted_content": str(inner_content)}
+
+
+RAW_EVENT_FORMATTERS = {
+    "metadata": lambda event: {},  # Usage is formatted with the other metadata
+}
+
+
+def format_raw_event(event: Any) -> Dict[str, Any]:
+    """Format a raw model stream event for UI display"""
+    if isinstance(event, dict) and len(event) == 1:
+        formatter = RAW_EVENT_FORMATTERS.get(next(iter(event)), _format_single_key_event)
+        return formatter(event)
+    if isinstance(event, dict) and "metadata" in event:
+        return {}
+    return {"raw_event": _truncate(str(event))}
+
+
+class EventLogSampler:
+    """Lets through one in every 1/rate diagnostic log records"""
+    
+    def __init__(self, rate: float = None):
+        if rate is None:
+            rate = float(os.getenv("CALLBACK_LOG_SAMPLE_RATE", "1.0"))
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = 0
+    
+    def __call__(self) -> bool:
+        if not self.every:
+            return False
+        self._count += 1
+        return self._count % self.every == 1 or self.every == 1
+
 class StreamingCallbackHandler:
-    """Callback handler that captures Strands events for streaming to UI"""
+    """Callback handler that captures Strands events for streaming to UI
     
-    def __init__(self, event_callback: Optional[callable] = None, agent_name: str = "unknown"):
+    Events are classified before anything else is done with them: filtered types
+    return immediately, and event data is only formatted when there is a consumer
+    (event_callback, or get_events when keep_events is set). Per-event diagnostics go
+    to the leveled, sampled streaming_callback_handler.events logger.
+    """
+    
+    def __init__(self, event_callback: Optional[callable] = None, agent_name: str = "unknown",
+                 keep_events: Optional[bool] = None, store_images: bool = True):
         self.event_callback = event_callback
         self.events = []
+        # Without a callback, get_events() is the only consumer
+        self.keep_events = event_callback is None if keep_events is None else keep_events
         self.current_tool_use = None  # Track current tool use for consolidation
         self.agent_name = agent_name
+        # Nested handlers leave tool-result images to the specialist, which returns them as markers
+        self.store_images = store_images
+        self._sample_log = EventLogSampler()
         
     def __call__(self, **kwargs):
         """Handle callback events from Strands agents"""
-        timestamp = time.time()
-        
-        # Create event object
-        event = {
-            "timestamp": timestamp,
-            "agent": self.agent_name,
-            "type": self._get_event_type(kwargs),
-            "data": self._format_event_data(kwargs)
-        }
-        
-        # print(f"Event captured: {event['type']} at {timestamp}")
-
-
-        # Filter out contentBlockDelta and text_generation events
-        if event["type"] != "contentBlockDelta" and event["type"] != "📟 text_generation":
-            # Print event to console
-            print(f"Event: {event['type']}")
-            print(f"Agent: {event['agent']}")
-            print(f"Data: {event['data']}")
-            print("---")
-
-
-        # Log unknown events to help debug what we're missing
-        if event["type"] == "unknown":
-            print(f"Unknown event kwargs: {kwargs}")
+        event_type = self._get_event_type(kwargs)
         
-        # Filter out unknown events with empty data
-        if event["type"] == "unknown" and not event["data"]:
-            return
-            
-        # Filter out contentBlockDelta raw events (too noisy)
-        if (event["type"] == "raw_event" and 
-            event["data"].get("raw_event", "").startswith("{'contentBlockDelta'")):
-            return
-            
         # Filter out contentBlockDelta events by type name
-        if event["type"] == "contentBlockDelta":
+        if event_type in FILTERED_EVENT_TYPES:
             return
-            
+        
         # Special handling for tool use events - consolidate incremental updates
-        if event["type"].startswith("🔧 tool_use"):
-            tool_name = kwargs["current_tool_use"].get("name", "unknown")
+        if event_type.startswith("🔧 tool_use"):
             tool_input = kwargs["current_tool_use"].get("input", "")
-            
             # Only show if input looks complete (has both opening and closing braces)
-            if tool_input and "{" in tool_input and "}" in tool_input:
-                # Remove any previous incomplete tool use events for this tool
-                self.events = [e for e in self.events if not (
-                    e["type"].startswith("🔧 tool_use") and 
-                    e["data"].get("tool") == tool_name
-                )]
-                # Continue to show this complete event
-            else:
+            if not (tool_input and "{" in tool_input and "}" in tool_input):
                 # Skip incomplete tool use events
                 return
         
-        # Special handling for metadata events - don't treat as raw_event
-        if (event["type"] == "raw_event" and 
-            "event" in kwargs and 
-            isinstance(kwargs["event"], dict) and 
-            "metadata" in kwargs["event"]):
-            event["type"] = "📊 usage"
+        log_event = (event_type not in UNLOGGED_EVENT_TYPES and
+                     event_logger.isEnabledFor(logging.DEBUG) and self._sample_log())
+        if not (self.event_callback or self.keep_events or log_event or event_type == UNKNOWN_EVENT_TYPE):
+            return  # Nobody needs the formatted event
+        
+        data = self._format_event_data(kwargs)
+        
+        if event_type == UNKNOWN_EVENT_TYPE:
+            # Log unknown events to help debug what we're missing
+            if event_logger.isEnabledFor(logging.DEBUG):
+                event_logger.debug("Unknown event kwargs: %s", kwargs)
+            # Filter out unknown events with empty data
+            if not data:
+                return
+        
+        if log_event:
+            event_logger.debug("Event: %s | Agent: %s | Data: %s", event_type, self.agent_name, data)
+        
+        event = {
+            "timestamp": time.time(),
+            "agent": self.agent_name,
+            "type": event_type,
+            "data": data
+        }
         
-        self.events.append(event)
+        if self.keep_events:
+            if event_type.startswith("🔧 tool_use"):
+                # Remove any previous tool use events for this tool
+                tool_name = data.get("tool")
+                self.events = [e for e in self.events if not (
+                    e["type"].startswith("🔧 tool_use") and 
+                    e["data"].get("tool") == tool_name
+                )]
+            self.events.append(event)
         
         # Stream event if callback provided
         if self.event_callback:
@@ -110,6 +182,8 @@ class StreamingCallbackHandler:
         elif "current_tool_use" in kwargs:
             tool_name = kwargs["current_tool_use"].get("name", "unknown")
             return f"🔧 tool_use ({tool_name})"
+        elif "tool_stream_event" in kwargs:
+            return "📡 tool_stream"
         elif "data" in kwargs:
             return "📟 text_generation"
         elif kwargs.get("reasoning"):
@@ -117,33 +191,7 @@ class StreamingCallbackHandler:
         elif "metadata" in kwargs:
             return "📊 usage"
         elif "event" in kwargs:
-            # Check if event contains metadata
-            event = kwargs["event"]
-            if isinstance(event, dict) and "metadata" in event:
-                return "📊 usage"  # Use "usage" as the title for metadata events
-            # Extract event type from raw event string
-            event_str = str(event)
-            if "'" in event_str and ":" in event_str:
-                try:
-                    # Extract the first key from the event dict string
-                    start = event_str.find("'") + 1
-                    end = event_str.find("'", start)
-                    if start > 0 and end > start:
-                        event_type = event_str[start:end]
-                        # Add emojis for common event types
-                        if event_type == "messageStart":
-                            return "🚀 messageStart"
-                        elif event_type == "messageStop":
-                            return "🏁 messageStop"
-                        elif event_type == "contentBlockStart":
-                            return "📄 contentBlockStart"
-                        elif event_type == "contentBlockStop":
-                            return "📄 contentBlockStop"
-                        else:
-                            return event_type
-                except Exception:
-                    logger.debug("Event parsing failed")
-            return "raw_event"
+            return raw_event_type(kwargs["event"])
         elif "result" in kwargs:
             return "🎯 result"
         elif "delta" in kwargs:
@@ -184,6 +232,12 @@ class StreamingCallbackHandler:
                 except:
                     data["input"] = tool_use["input"]
         
+        # Progress yielded by streaming tools
+        if "tool_stream_event" in kwargs:
+            stream_event = kwargs["tool_stream_event"]
+            data["tool"] = stream_event.get("tool_use", {}).get("name")
+            data["text"] = _truncate(str(stream_event.get("data", "")), 300)
+        
         # Messages - format content cleanly
         if "message" in kwargs:
             message = kwargs["message"]
@@ -218,22 +272,24 @@ class StreamingCallbackHandler:
                                 if isinstance(result_content, list) and len(result_content) > 0:
                                     # Check for image content first
                                     has_image = any(isinstance(item, dict) and "image" in item for item in result_content)
-                                    if has_image:
-                                        # Convert image to HTML format for UI display
+                                    if has_image and self.store_images:
+                                        # Store image bytes out of band - the event only carries a reference
                                         for item in result_content:
                                             if isinstance(item, dict) and "image" in item:
-                                                import base64
                                                 image_data = item["image"]
                                                 if "source" in image_data and "bytes" in image_data["source"]:
-                                                    # Convert bytes to base64 string
-                                                    image_bytes = image_data["source"]["bytes"]
-                                                    if isinstance(image_bytes, bytes):
-                                                        b64_string = base64.b64encode(image_bytes).decode('utf-8')
-                                                    else:
-                                                        b64_string = image_bytes  # Already base64 string
-                                                    
-                                                    image_format = image_data.get("format", "png")
-                                                    image_html = f'<img src="data:image/{image_format};base64,{b64_string}" style="max-width: 500px; height: auto; border-radius: 8px; margin: 10px 0;">'
+                                                    try:
+                                                        artifact = get_artifact_store().put(
+                                                            image_data["source"]["bytes"],
+                                                            image_data.get("format", "png")
+                                                        )
+                                                    except Exception as e:
+                                                        logger.warning(f"Error storing tool result image: {e}")
+                                                        continue
+                                                    artifact.kind = "tool_result"
+                                                    artifact_registry.register(artifact)
+                                                    data.setdefault("artifacts", []).append(artifact.to_event())
+                                                    image_html = f'<img src="{artifact.url}" style="max-width: 500px; height: auto; border-radius: 8px; margin: 10px 0;">'
                                                     text_parts.append(image_html)
                                     
                                     # Also extract text content
@@ -254,7 +310,8 @@ class StreamingCallbackHandler:
                                                 image_path = os.path.join(output_dir, filename)
                                                 
                                                 try:
-                                                    if os.path.exists(image_path):
+                                                    # Registered artifacts are known to exist - no stat needed
+                                                    if artifact_registry.get(filename) or os.path.exists(image_path):
                                                         # Use relative URL that works with both HTTP and HTTPS
                                                         image_url = f"/query-get-image/{filename}"
                                                         found_image_urls.append(image_url)
@@ -262,7 +319,7 @@ class StreamingCallbackHandler:
                                                         # Return empty string to remove marker from tool result text
                                                         return ""
                                                 except Exception as e:
-                                                    print(f"Error loading image {filename}: {e}")
+                                                    logger.warning(f"Error loading image {filename}: {e}")
                                                 
                                                 return f"[Generated image: {filename}]"
                                             
@@ -326,30 +383,9 @@ class StreamingCallbackHandler:
         if kwargs.get("reasoning"):
             data["reasoning_text"] = kwargs.get("reasoningText", "")[:100] + "..." if len(kwargs.get("reasoningText", "")) > 100 else kwargs.get("reasoningText", "")
         
-        # Raw events - already handled by _get_event_type extraction
+        # Raw model stream events - formatted from the event dict itself
         if "event" in kwargs:
-            # Skip if this is a metadata event
-            if isinstance(kwargs["event"], dict) and "metadata" in kwargs["event"]:
-                pass  # Skip raw event processing for metadata
-            else:
-                event_str = str(kwargs["event"])
-                try:
-                    import ast
-                    event_dict = ast.literal_eval(event_str)
-                    if isinstance(event_dict, dict) and len(event_dict) == 1:
-                        inner_content = list(event_dict.values())[0]
-                        if isinstance(inner_content, dict):
-                            # Format as key: value pairs
-                            formatted_pairs = []
-                            for k, v in inner_content.items():
-                                formatted_pairs.append(f"{k}: {v}")
-                            data["formatted_content"] = "\n".join(formatted_pairs)
-                        else:
-                            data["formatted_content"] = str(inner_content)
-                    else:
-                        data["raw_event"] = event_str[:100] + "..." if len(event_str) > 100 else event_str
-                except:
-                    data["raw_event"] = event_str[:100] + "..." if len(event_str) > 100 else event_str
+            data.update(format_raw_event(kwargs["event"]))
         
         # Results - show truncated result
         if "result" in kwargs:
@@ -384,3 +420,50 @@ class StreamingCallbackHandler:
     def clear_events(self):
         """Clear captured events"""
         self.events = []
+
+
+# Event callback of the response being streamed; nested sub-agents forward their events to it
+_event_stream: ContextVar[Optional[Callable]] = ContextVar("event_stream", default=None)
+
+
+@contextmanager
+def use_event_stream(event_callback: Callable):
+    """Stream the events of sub-agents run in the enclosed work (including tool threads) to event_callback"""
+    token = _event_stream.set(event_callback)
+    try:
+        yield event_callback
+    finally:
+        _event_stream.reset(token)
+
+
+@contextmanager
+def detachable_event_stream():
+    """Stream sub-agent events of the enclosed work until the yielded detach() is called.
+
+    Work that is abandoned (e.g. a timed-out tool's worker thread) keeps running; once
+    detached, its late events are dropped instead of reaching the response.
+    """
+    event_callback = _event_stream.get()
+    attached = True
+
+    def forward(event):
+        if attached:
+            event_callback(event)
+
+    def detach():
+        nonlocal attached
+        attached = False
+
+    if event_callback is None:
+        yield detach
+        return
+    with use_event_stream(forward):
+        yield detach
+
+
+def nested_callback_handler(agent_name: str) -> Optional[StreamingCallbackHandler]:
+    """Handler forwarding a sub-agent's events, tagged with agent_name, to the current stream"""
+    event_callback = _event_stream.get()
+    if event_callback is None:
+        return None
+    return StreamingCallbackHandler(event_callback, agent_name, store_images=False)
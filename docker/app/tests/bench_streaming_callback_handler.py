@@ -0,0 +1,64 @@
+"""
+Microbenchmark for raw model stream events in StreamingCallbackHandler.
+
+Compares the per-event cost of classifying and formatting raw events the old
+way (repr the event, scan the string for its first key, parse it back with
+ast.literal_eval) with the structured dispatch now used by the handler.
+
+Run from docker/app:  python tests/bench_streaming_callback_handler.py
+"""
+
+import ast
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming_callback_handler import StreamingCallbackHandler, format_raw_event, raw_event_type
+
+EVENTS = [
+    {"messageStart": {"role": "assistant"}},
+    {"contentBlockStart": {"start": {"toolUse": {"toolUseId": "tooluse_abc123", "name": "graph_assistant"}}, "contentBlockIndex": 1}},
+    {"contentBlockDelta": {"delta": {"text": "The supply chain graph contains 42 suppliers"}, "contentBlockIndex": 0}},
+    {"contentBlockStop": {"contentBlockIndex": 0}},
+    {"messageStop": {"stopReason": "end_turn"}},
+]
+
+
+def legacy(event):
+    """Classification and formatting as done before the dispatch table"""
+    event_str = str(event)
+    start = event_str.find("'") + 1
+    end = event_str.find("'", start)
+    event_type = event_str[start:end]
+    data = {}
+    event_str = str(event)
+    event_dict = ast.literal_eval(event_str)
+    if isinstance(event_dict, dict) and len(event_dict) == 1:
+        inner_content = list(event_dict.values())[0]
+        if isinstance(inner_content, dict):
+            data["formatted_content"] = "\n".join(f"{k}: {v}" for k, v in inner_content.items())
+        else:
+            data["formatted_content"] = str(inner_content)
+    return event_type, data
+
+
+def structured(event):
+    return raw_event_type(event), format_raw_event(event)
+
+
+def main(number: int = 20000):
+    handler = StreamingCallbackHandler(lambda event: None, "supervisor")
+    cases = {
+        "legacy classify+format": lambda: [legacy(event) for event in EVENTS],
+        "dispatch classify+format": lambda: [structured(event) for event in EVENTS],
+        "handler end to end": lambda: [handler(event=event) for event in EVENTS],
+    }
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=number, repeat=3))
+        print(f"{name:28s} {seconds / (number * len(EVENTS)) * 1e6:8.2f} us/event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+from unittest.mock import patch, MagicMock
+
+from agents.agent_pool import AgentPool
+
+
+def test_pool_reuses_agent_for_same_key():
+    """Test that the factory only runs once per key."""
+    pool = AgentPool(max_size=4)
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = pool.get(("user", "session-1", "model"), factory)
+    second = pool.get(("user", "session-1", "model"), factory)
+
+    assert first is second
+    assert factory.call_count == 1
+    assert pool.stats()["hits"] == 1
+    assert pool.stats()["misses"] == 1
+
+
+def test_pool_evicts_least_recently_used():
+    """Test that the oldest entry is evicted when the pool is full."""
+    pool = AgentPool(max_size=2)
+    pool.get("a", object)
+    pool.get("b", object)
+    pool.get("a", object)  # touch a so b becomes the oldest
+    pool.get("c", object)
+
+    assert "a" in pool
+    assert "b" not in pool
+    assert "c" in pool
+    assert pool.stats()["evictions"] == 1
+
+
+def test_pool_evicts_idle_entries():
+    """Test that entries idle longer than the TTL are dropped."""
+    pool = AgentPool(max_size=4, idle_ttl_seconds=10)
+    with patch('agents.agent_pool.time.monotonic', return_value=100.0):
+        pool.get("old", object)
+    with patch('agents.agent_pool.time.monotonic', return_value=200.0):
+        pool.get("new", object)
+
+    assert "old" not in pool
+    assert "new" in pool
+
+
+def test_pool_serializes_requests_for_same_key():
+    """Test that concurrent leases for one key never overlap."""
+    pool = AgentPool(max_size=4)
+    active = []
+    overlaps = []
+
+    async def use(key):
+        async with pool.lease(key, object):
+            active.append(key)
+            if active.count(key) > 1:
+                overlaps.append(key)
+            await asyncio.sleep(0.01)
+            active.remove(key)
+
+    async def run():
+        await asyncio.gather(use("same"), use("same"), use("other"))
+
+    asyncio.run(run())
+    assert overlaps == []
+
+
+def test_waiting_leases_pin_their_entry():
+    """Test that an entry with a queued lease is not evicted between the holder's release and the waiter's turn."""
+    pool = AgentPool(max_size=1)
+    active = []
+    overlaps = []
+
+    async def use(key):
+        async with pool.lease(key, object):
+            active.append(key)
+            if active.count(key) > 1:
+                overlaps.append(key)
+            await asyncio.sleep(0.01)
+            active.remove(key)
+
+    async def first():
+        await use("a")
+        # The queued lease has not run yet; filling the pool must not drop its entry
+        pool.get("b", object)
+        await use("a")
+
+    async def run():
+        await asyncio.gather(first(), use("a"))
+
+    asyncio.run(run())
+    assert overlaps == []
+
+
+def test_pool_discard_matching_keys():
+    """Test that discard only removes matching entries."""
+    pool = AgentPool(max_size=4)
+    pool.get(("alice", "s1", "m"), object)
+    pool.get(("bob", "s1", "m"), object)
+
+    pool.discard(lambda key: key[0] == "alice")
+
+    assert ("alice", "s1", "m") not in pool
+    assert ("bob", "s1", "m") in pool
+
+
+@patch('agents.supervisor_agent.create_supervisor_agent')
+def test_get_supervisor_agent_is_pooled(mock_create):
+    """Test that the supervisor is built once per user session and model."""
+    from agents import supervisor_agent as supervisor_module
+
+    mock_create.side_effect = lambda *args: MagicMock()
+    supervisor_module._supervisor_agents.clear()
+
+    first = supervisor_module.get_supervisor_agent("pool@test.com", "abc")
+    second = supervisor_module.get_supervisor_agent("pool@test.com", "abc")
+    other = supervisor_module.get_supervisor_agent("pool@test.com", "xyz")
+
+    assert first is second
+    assert other is not first
+    assert mock_create.call_count == 2
+    supervisor_module._supervisor_agents.clear()
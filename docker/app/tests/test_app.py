@@ -1,4 +1,5 @@
 import pytest
+from contextlib import asynccontextmanager
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app import app
@@ -59,18 +60,27 @@ def test_query_streaming_endpoint_missing_prompt():
     response = client.post("/query-streaming-with-events", json={})
     assert response.status_code == 422  # Validation error
 
-@patch('app.supervisor_agent')
-def test_streaming_endpoint_success(mock_supervisor):
+def test_streaming_endpoint_success():
     """Test successful streaming response."""
-    mock_stream = MagicMock()
-    mock_stream.stream_async.return_value = [
-        {"data": "Hello "},
-        {"data": "world!"}
-    ]
-    mock_supervisor.return_value = mock_stream
+    async def stream_async(prompt):
+        for chunk in [{"data": "Hello "}, {"data": "world!"}]:
+            yield chunk
     
-    with patch('app.supervisor_agent', mock_stream):
+    @asynccontextmanager
+    async def supervisor_session(user_id, session_id):
+        yield MagicMock(stream_async=stream_async)
+    
+    with patch('agents.supervisor_agent.supervisor_session', supervisor_session):
         response = client.post("/query-streaming-with-events", json={"prompt": "test"})
     
     assert response.status_code == 200
     assert response.headers["content-type"] == "text/plain; charset=utf-8"
+
+def test_streaming_endpoint_rejects_unknown_model_override():
+    """Test that per-request model overrides are validated like /set-models."""
+    with patch('app.model_catalog.validate_selection', return_value=["Unknown chat model: nope"]) as validate:
+        response = client.post("/query-streaming-with-events", json={"prompt": "test", "chat_model": "nope"})
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown chat model: nope"
+    validate.assert_called_once_with(chat_model="nope", neptune_model=None, image_model=None)
@@ -0,0 +1,81 @@
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from artifact_janitor import ArtifactJanitor
+from artifact_store import ArtifactRegistry
+
+
+def _write(path, size, age=0):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_sweep_removes_only_expired_files(tmp_path):
+    """Test that the startup scan indexes files and the sweep expires old ones."""
+    old = _write(tmp_path / "chart_old.png", 10, age=7200)
+    new = _write(tmp_path / "chart_new.png", 10)
+    janitor = ArtifactJanitor(str(tmp_path), retention_seconds=3600, max_bytes=0)
+
+    assert janitor.scan() == 2
+    assert janitor.sweep() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+    assert len(janitor) == 1
+    assert janitor.stats["removed_bytes"] == 10
+
+
+def test_quota_removes_oldest_first(tmp_path):
+    """Test that the size quota evicts the oldest artifacts."""
+    janitor = ArtifactJanitor(str(tmp_path), retention_seconds=3600, max_bytes=25)
+    paths = [_write(tmp_path / f"image_{i}.png", 10) for i in range(3)]
+    for i, path in enumerate(paths):
+        janitor.track(path, created=time.time() - 100 + i)
+
+    assert janitor.sweep() == 1
+    assert not os.path.exists(paths[0])
+    assert all(os.path.exists(path) for path in paths[1:])
+    assert janitor.tracked_bytes == 20
+    assert janitor.stats["quota_removed"] == 1
+
+
+def test_retracking_extends_expiry(tmp_path):
+    """Test that refreshing an artifact supersedes its earlier expiry entry."""
+    path = _write(tmp_path / "same.png", 5)
+    janitor = ArtifactJanitor(str(tmp_path), retention_seconds=60, max_bytes=0)
+    janitor.track(path, created=time.time() - 120)
+    janitor.track(path)
+
+    assert janitor.sweep() == 0
+    assert os.path.exists(path)
+    assert janitor.tracked_bytes == 5
+
+
+def test_registered_artifacts_are_tracked_and_discarded(tmp_path):
+    """Test that registry registrations feed the janitor and removals clear the registry."""
+    registry = ArtifactRegistry()
+    janitor = ArtifactJanitor(str(tmp_path), retention_seconds=0, max_bytes=0, on_remove=registry.discard)
+    registry.add_listener(janitor.track_artifact)
+    path = _write(tmp_path / "chart_1.png", 3)
+
+    registry.register_file(path, kind="chart")
+    assert registry.get("chart_1.png") is not None
+
+    assert janitor.sweep() == 1
+    assert registry.get("chart_1.png") is None
+
+
+def test_app_runs_the_janitor_only_for_its_lifespan():
+    """Test that importing the app does not start the janitor; the app's startup and shutdown do."""
+    import app as app_module
+
+    janitor = MagicMock()
+    with patch.object(app_module, "get_artifact_janitor", return_value=janitor):
+        with TestClient(app_module.app) as client:
+            janitor.start.assert_called_once()
+            assert client.get("/health").status_code == 200
+        janitor.stop.assert_called_once()
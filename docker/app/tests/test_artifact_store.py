@@ -0,0 +1,51 @@
+import base64
+
+from artifact_store import ArtifactStore, media_type_for
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    """Test that artifacts are content addressed."""
+    store = ArtifactStore(str(tmp_path))
+
+    first = store.put(b"image-bytes", "png")
+    second = store.put(base64.b64encode(b"image-bytes").decode(), "PNG")
+    other = store.put(b"other-bytes", "png")
+
+    assert first.id == second.id
+    assert first.id != other.id
+    assert first.url == f"/query-get-image/{first.id}.png"
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first.filename, other.filename])
+
+
+def test_media_types():
+    """Test that media types follow the file extension."""
+    assert media_type_for("chart.png") == "image/png"
+    assert media_type_for("photo.JPEG") == "image/jpeg"
+    assert media_type_for("data.bin") == "application/octet-stream"
+
+
+def test_registry_attributes_artifacts_to_requests(tmp_path):
+    """Test that artifacts are indexed by request and collected per block."""
+    import threading
+    from artifact_store import ArtifactRegistry, collect_artifacts, use_artifact_request
+
+    registry = ArtifactRegistry()
+    chart = tmp_path / "chart_1.png"
+    other = tmp_path / "chart_2.png"
+    chart.write_bytes(b"one")
+    other.write_bytes(b"two")
+
+    with use_artifact_request("request-a"), collect_artifacts() as created:
+        # Tools run in worker threads that inherit the caller's context
+        import contextvars
+        ctx = contextvars.copy_context()
+        worker = threading.Thread(target=ctx.run, args=(registry.register_file, str(chart)))
+        worker.start()
+        worker.join()
+    with use_artifact_request("request-b"):
+        registry.register_file(str(other))
+
+    assert [a.filename for a in created] == ["chart_1.png"]
+    assert [a.filename for a in registry.for_request("request-a")] == ["chart_1.png"]
+    assert registry.get("chart_2.png").request_id == "request-b"
+    assert registry.get("chart_1").size == 3
@@ -0,0 +1,129 @@
+from unittest.mock import MagicMock, patch
+
+from agents.cypher_cache import CypherResultCache, CypherTranslationCache, is_read_only, near_duplicate_key
+
+CYPHER = "MATCH (s:Supplier)--(d:Defect) RETURN s.name, count(d) ORDER BY count(d) DESC LIMIT 10"
+
+
+def test_exact_and_near_duplicate_hits():
+    """Test that normalized and reworded questions reuse a translation."""
+    cache = CypherTranslationCache()
+    cache.put("Top suppliers by defect rate?", "v1", CYPHER)
+
+    assert cache.get("top suppliers by defect rate", "v1") == CYPHER
+    assert cache.get("What are the top supplier by defect rate", "v1") == CYPHER
+    assert cache.get("Machines on line 7", "v1") is None
+    assert cache.stats() == {"entries": 1, "exact_hits": 1, "near_hits": 1, "misses": 1,
+                             "invalidations": 0, "hit_rate": 0.667}
+
+
+def test_near_duplicates_keep_word_order():
+    """Test that questions with the same words in a different role do not collide."""
+    assert near_duplicate_key("suppliers of parts") != near_duplicate_key("parts of suppliers")
+
+
+def test_schema_change_invalidates_translations():
+    """Test that a new schema fingerprint drops every cached translation."""
+    cache = CypherTranslationCache()
+    cache.put("machines on line X", "v1", "MATCH (m:Machine) RETURN m")
+    assert cache.get("machines on line X", "v2") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.get("machines on line X", "v1") is None
+
+
+def test_lru_bound_and_discard():
+    """Test that the cache is bounded and failed translations can be dropped."""
+    cache = CypherTranslationCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"question {i}", "v1", f"RETURN {i}")
+    assert cache.get("question 0", "v1") is None
+    cache.discard("Question 2?")
+    assert cache.get("question 2", "v1") is None
+    assert cache.get("question 1", "v1") == "RETURN 1"
+
+
+def test_hit_skips_cypher_generation():
+    """Test that execute_neptune_query answers a cached question without the generation chain."""
+    from agents import neptune_tools
+
+    qa_chain = MagicMock()
+    qa_chain.invoke.return_value = {"result": "Acme", "intermediate_steps": [{"query": CYPHER}, {"context": []}]}
+    graph = MagicMock()
+    graph.query.return_value = [{"s.name": "Acme", "count(d)": 3}]
+    answer_chain = MagicMock()
+    answer_chain.invoke.return_value = MagicMock(content="Acme has the most defects")
+
+    with patch.object(neptune_tools, "cypher_translation_cache", CypherTranslationCache()), \
+         patch.object(neptune_tools, "schema_fingerprint", return_value="v1"), \
+         patch.object(neptune_tools, "get_qa_chain", return_value=qa_chain), \
+         patch.object(neptune_tools, "get_graph_connection", return_value=graph), \
+         patch.object(neptune_tools, "get_answer_chain", return_value=answer_chain):
+        neptune_tools.execute_neptune_query("Top suppliers by defect rate")
+        result = neptune_tools.execute_neptune_query("top suppliers by defect rate?")
+
+    qa_chain.invoke.assert_called_once()
+    graph.query.assert_called_once_with(CYPHER)
+    assert "Acme has the most defects" in result and "cached translation" in result
+
+
+def test_result_cache_keys_on_normalized_cypher_and_drops_on_new_generation():
+    """Test that results are shared across formatting differences until the graph changes."""
+    cache = CypherResultCache()
+    cache.put("MATCH (m:Machine)\n  RETURN m.name;", [{"m.name": "Lathe"}])
+    assert cache.get("MATCH (m:Machine) RETURN m.name") == [{"m.name": "Lathe"}]
+
+    cache.bump_generation("bulk load")
+    assert cache.get("MATCH (m:Machine) RETURN m.name") is None
+    # A result read before the load finished is not cached afterwards
+    cache.put("MATCH (m:Machine) RETURN m.name", [], generation=0)
+    assert cache.stats()["entries"] == 0
+
+
+def test_result_cache_bounds_and_writes():
+    """Test entry, byte and TTL bounds, and that write statements are never cached."""
+    cache = CypherResultCache(max_entries=2, max_bytes=4000)
+    for i in range(3):
+        cache.put(f"MATCH (n) RETURN n LIMIT {i}", [i])
+    assert cache.get("MATCH (n) RETURN n LIMIT 0") is None
+    cache.put("MATCH (n) RETURN n", ["x" * 2000])
+    assert cache.get("MATCH (n) RETURN n") is None
+
+    assert not is_read_only("MATCH (s:Supplier {id: 1}) SET s.rating = 5")
+    assert is_read_only("MATCH (s:Supplier) WHERE s.note = 'CREATE' RETURN s")
+    cache.put("MERGE (s:Supplier {id: 1})", [])
+    assert cache.get("MERGE (s:Supplier {id: 1})") is None
+
+    expiring = CypherResultCache(ttl_seconds=0)
+    expiring.put("MATCH (n) RETURN count(n)", [{"count(n)": 1}])
+    assert expiring.get("MATCH (n) RETURN count(n)") is None
+
+
+def test_graph_queries_go_through_result_cache_and_bulk_loads_invalidate():
+    """Test the wrapped graph query serves repeats locally until a bulk load completes."""
+    from agents import neptune_tools
+
+    run_query = MagicMock(return_value=[{"count": 3}])
+    response = MagicMock(status=200, data=b'{"payload": {"overallStatus": {"status": "LOAD_COMPLETED"}}}')
+    with patch.object(neptune_tools, "cypher_result_cache", CypherResultCache()) as cache, \
+         patch.object(neptune_tools, "_finished_loads", set()), \
+         patch.dict("os.environ", {"NEPTUNE_HOST": "neptune.local"}), \
+         patch.object(neptune_tools, "get_neptune_client") as get_client:
+        get_client.return_value.request.return_value = response
+        query = neptune_tools._with_result_cache(run_query)
+
+        query("MATCH (n) RETURN count(n) AS count")
+        query("MATCH (n)  RETURN count(n) AS count")
+        assert run_query.call_count == 1
+
+        neptune_tools.get_bulk_load_status("load-1")
+        assert cache.generation == 1
+        query("MATCH (n) RETURN count(n) AS count")
+        assert run_query.call_count == 2
+
+        # Seeing the same finished load again does not drop the cache
+        neptune_tools.get_bulk_load_status("load-1")
+        query("MATCH (n) RETURN count(n) AS count")
+        assert run_query.call_count == 2
+
+        query("CREATE (n:Note {text: 'hi'})")
+        assert cache.generation == 2
@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock, patch
+
+from agents.cypher_cache import CypherResultCache
+from agents.cypher_governor import CypherGovernor
+
+
+def test_limit_is_added_or_capped_on_the_final_return():
+    """Test that read queries get a page-sized LIMIT, respecting their own SKIP/LIMIT and literals."""
+    governor = CypherGovernor(max_rows=100, page_rows=10)
+    assert governor.govern("MATCH (n) RETURN n").cypher == "MATCH (n) RETURN n LIMIT 11"
+    capped = governor.govern("MATCH (s:Supplier) RETURN s.name ORDER BY s.name LIMIT 5000;")
+    assert (capped.cypher, capped.limit) == ("MATCH (s:Supplier) RETURN s.name ORDER BY s.name LIMIT 11", 100)
+    assert governor.govern("MATCH (s) RETURN s SKIP 5 LIMIT 3 // top three").cypher == "MATCH (s) RETURN s SKIP 5 LIMIT 3"
+    assert governor.govern("MATCH (s {note: 'LIMIT 2'}) RETURN s", skip=95).cypher == \
+        "MATCH (s {note: 'LIMIT 2'}) RETURN s SKIP 95 LIMIT 5"
+
+
+def test_unpageable_queries_run_unchanged():
+    """Test that writes, UNIONs and parameterized limits are not rewritten."""
+    governor = CypherGovernor()
+    for cypher in ("CREATE (n:Note)", "MATCH (a) RETURN a UNION MATCH (b) RETURN b", "MATCH (n) RETURN n LIMIT $n"):
+        governed = governor.govern(cypher)
+        assert governed.cypher == cypher and governed.limit is None
+
+
+def test_pages_respect_row_and_byte_budgets():
+    """Test that a page keeps at most page_rows rows within max_bytes and opens a cursor for the rest."""
+    governor = CypherGovernor(max_rows=100, page_rows=10, max_bytes=200)
+    query = governor.govern("MATCH (n) RETURN n")
+    page = governor.page(query, [{"name": "x" * 30}] * 11)
+    assert len(page.rows) == 4 and page.has_more
+    assert governor.resume(page.cursor) == ("MATCH (n) RETURN n", 4)
+    assert f"`{page.cursor}`" in page.note()
+
+    huge = governor.page(query, [{"blob": "x" * 1000}])
+    assert len(huge.rows[0]) == 203 and huge.rows[0].endswith("...")
+    assert not governor.page(query, [{"name": "a"}]).has_more
+
+
+def test_cursor_fetches_the_next_page_of_the_same_query():
+    """Test that execute_neptune_query with a cursor runs the next SKIP/LIMIT page without generating Cypher."""
+    from agents import neptune_tools
+
+    governor = CypherGovernor(max_rows=100, page_rows=2)
+    run_query = MagicMock(side_effect=lambda cypher: [{"n": i} for i in range(3)])
+    graph = MagicMock()
+    graph.query = neptune_tools._with_result_cache(run_query)
+    answer_chain = MagicMock()
+    answer_chain.invoke.return_value = MagicMock(content="Page answer")
+
+    with patch.object(neptune_tools, "cypher_governor", governor), \
+         patch.object(neptune_tools, "cypher_result_cache", CypherResultCache()), \
+         patch.object(neptune_tools, "get_graph_connection", return_value=graph), \
+         patch.object(neptune_tools, "get_answer_chain", return_value=answer_chain):
+        with neptune_tools._governed_queries():
+            assert graph.query("MATCH (n) RETURN n") == [{"n": 0}, {"n": 1}]
+        cursor = neptune_tools._last_page.get().cursor
+        result = neptune_tools.execute_neptune_query("List nodes", cursor)
+
+    run_query.assert_called_with("MATCH (n) RETURN n SKIP 2 LIMIT 3")
+    assert "Page answer" in result and "rows 3-4" in result
+    assert "unknown or has expired" in neptune_tools.execute_neptune_query("List nodes", "nope")
+
+
+def test_schema_queries_are_not_governed():
+    """Test that NeptuneGraph's own queries keep their LIMIT and rows outside governed call sites."""
+    from agents import neptune_tools
+
+    rows = [{"props": {"id": i}} for i in range(100)]
+    run_query = MagicMock(return_value=rows)
+    query = neptune_tools._with_result_cache(run_query)
+    with patch.object(neptune_tools, "cypher_result_cache", CypherResultCache()):
+        neptune_tools._last_page.set(None)
+        assert query("MATCH (a:`Supplier`) RETURN properties(a) AS props LIMIT 100") == rows
+
+    run_query.assert_called_once_with("MATCH (a:`Supplier`) RETURN properties(a) AS props LIMIT 100")
+    assert neptune_tools._last_page.get() is None
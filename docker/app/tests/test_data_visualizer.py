@@ -14,6 +14,7 @@ from agents.data_visualizer_assistant import (
     wordcloud_tool,
     table_tool
 )
+from artifact_store import register_artifact
 
 
 class TestDataVisualizerAssistant:
@@ -68,25 +69,39 @@ class TestDataVisualizerAssistant:
         assert 'table_tool' in tool_names
 
     @patch('agents.data_visualizer_assistant.Agent')
-    @patch('agents.data_visualizer_assistant.os.path.exists')
-    @patch('agents.data_visualizer_assistant.os.listdir')
-    @patch('agents.data_visualizer_assistant.os.path.getmtime')
-    def test_data_visualizer_handles_chart_output(self, mock_getmtime, mock_listdir, mock_exists, mock_agent_class):
+    def test_data_visualizer_handles_chart_output(self, mock_agent_class):
         """Test that data visualizer handles visualization file output correctly."""
-        mock_agent_instance = Mock()
-        mock_agent_instance.return_value = "Chart created successfully."
-        mock_agent_class.return_value = mock_agent_instance
-        
-        # Mock file system calls - ensure timestamp is recent
-        mock_exists.return_value = True
-        mock_listdir.return_value = ["chart_20240830_120000.png", "other_file.txt"]
-        mock_getmtime.return_value = time.time() + 1  # Future timestamp to ensure it's after start_time
-        
-        result = data_visualizer_assistant("Create a pie chart")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            chart_path = os.path.join(temp_dir, "chart_20240830_120000.png")
+            
+            def run_agent(query):
+                # Simulate chart_tool writing and registering its output
+                with open(chart_path, 'wb') as f:
+                    f.write(b"png")
+                register_artifact(chart_path, kind="chart")
+                return "Chart created successfully."
+            
+            mock_agent_class.return_value = Mock(side_effect=run_agent)
+            
+            result = data_visualizer_assistant("Create a pie chart")
         
         # Should contain the chart marker for UI processing
         assert "[Generated chart: chart_20240830_120000.png]" in result
 
+    @patch('agents.data_visualizer_assistant.Agent')
+    def test_data_visualizer_ignores_other_requests_charts(self, mock_agent_class):
+        """Test that charts registered outside this call are not attributed to it."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            other_chart = os.path.join(temp_dir, "chart_other_user.png")
+            with open(other_chart, 'wb') as f:
+                f.write(b"png")
+            register_artifact(other_chart, kind="chart")
+            mock_agent_class.return_value = Mock(return_value="No chart needed.")
+            
+            result = data_visualizer_assistant("Summarize this data")
+        
+        assert "chart_other_user.png" not in result
+
     def test_cleanup_old_visualizations(self):
         """Test that old visualization files are properly cleaned up."""
         with tempfile.TemporaryDirectory() as temp_dir:
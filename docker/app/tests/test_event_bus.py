@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+
+from event_bus import StreamEventBus
+
+
+def test_content_and_events_keep_order():
+    """Test that content and events arrive in the order they were produced."""
+    async def run():
+        bus = StreamEventBus(maxsize=8)
+
+        async def producer():
+            await bus.put_content("Hello ")
+            bus.publish({"type": "🔧 tool_use (weather)", "data": {"tool": "weather"}})
+            await bus.put_content("world")
+
+        return [item async for item in bus.stream(producer())]
+
+    items = asyncio.run(run())
+    assert items == [
+        ("content", "Hello "),
+        ("event", {"type": "🔧 tool_use (weather)", "data": {"tool": "weather"}}),
+        ("content", "world"),
+    ]
+
+
+def test_events_flush_without_model_chunks():
+    """Test that tool events reach the consumer while the model is silent."""
+    async def run():
+        bus = StreamEventBus(maxsize=8)
+        received = asyncio.Event()
+        seen = []
+
+        async def producer():
+            bus.publish({"type": "🔧 tool_use (slow_tool)", "data": {}})
+            # Simulate a long tool call: no content until the consumer saw the event
+            await asyncio.wait_for(received.wait(), timeout=1)
+            await bus.put_content("done")
+
+        async for kind, item in bus.stream(producer()):
+            seen.append(kind)
+            received.set()
+        return seen
+
+    assert asyncio.run(run()) == ["event", "content"]
+
+
+def test_low_priority_events_are_coalesced_when_full():
+    """Test that a full queue summarizes low-priority events instead of growing."""
+    async def run():
+        bus = StreamEventBus(maxsize=2)
+
+        async def producer():
+            for _ in range(10):
+                bus.publish({"type": "📟 text_generation", "data": {"text": "x"}})
+            bus.publish({"type": "📊 usage", "data": {}})
+
+        return [item async for item in bus.stream(producer())]
+
+    items = asyncio.run(run())
+    types = [item["type"] for kind, item in items if kind == "event"]
+    assert types.count("📟 text_generation") == 2
+    assert "📉 events_coalesced" in types
+    assert types[-1] == "📊 usage"
+
+
+def test_usage_and_message_stop_survive_a_full_overflow():
+    """Test that the events the stream loop needs are never dropped, even when every buffer is full."""
+    async def run():
+        bus = StreamEventBus(maxsize=2)
+
+        async def producer():
+            for i in range(10):
+                bus.publish({"type": "🔧 tool_use (weather)", "data": {"i": i}})
+            bus.publish({"type": "🏁 messageStop", "data": {}})
+            bus.publish({"type": "📊 usage", "data": {}})
+
+        return [item async for item in bus.stream(producer())]
+
+    types = [item["type"] for kind, item in asyncio.run(run()) if kind == "event"]
+    assert types.count("🔧 tool_use (weather)") == 4
+    assert types[-2:] == ["🏁 messageStop", "📊 usage"]
+    assert "📉 events_coalesced" in types
+
+
+def test_producer_errors_are_raised_to_consumer():
+    """Test that a failing agent stream surfaces in the response generator."""
+    async def run():
+        bus = StreamEventBus(maxsize=2)
+
+        async def producer():
+            raise RuntimeError("boom")
+
+        return [item async for item in bus.stream(producer())]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run())
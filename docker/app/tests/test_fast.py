@@ -1,4 +1,5 @@
 import pytest
+from contextlib import asynccontextmanager
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock, AsyncMock
 from app import app
@@ -80,17 +81,18 @@ def test_streaming_endpoint_validation():
     response = client.post("/query-streaming-with-events", json={})
     assert response.status_code == 422
 
-@patch('app.supervisor_agent')
-def test_query_endpoint_mock_success(mock_supervisor):
+def test_query_endpoint_mock_success():
     """Test successful query with mocked supervisor."""
     # Mock the streaming response
     async def mock_stream_async(prompt):
         yield "Mocked response"
     
-    mock_supervisor.stream_async = mock_stream_async
-    mock_supervisor.callback_handler = None
+    @asynccontextmanager
+    async def supervisor_session(user_id, session_id):
+        yield MagicMock(stream_async=mock_stream_async)
     
-    response = client.post("/query-streaming-with-events", json={"prompt": "test query"})
+    with patch('agents.supervisor_agent.supervisor_session', supervisor_session):
+        response = client.post("/query-streaming-with-events", json={"prompt": "test query"})
     
     assert response.status_code == 200
     # For streaming responses, check that we get some content
@@ -233,3 +235,64 @@ def test_data_analyzer_system_prompt():
     
     for element in required_elements:
         assert element in DATA_ANALYZER_SYSTEM_PROMPT
+
+def test_set_models_is_scoped_to_user():
+    """Test that one user's model selection does not change another user's."""
+    response = client.post("/set-models", json={"user_id": "alice@test.com", "chat_model": "us.amazon.nova-pro-v1:0"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+    
+    alice = client.get("/get-models", params={"user_id": "alice@test.com"}).json()
+    bob = client.get("/get-models", params={"user_id": "bob@test.com"}).json()
+    
+    assert alice["chat_model"] == "us.amazon.nova-pro-v1:0"
+    assert bob["chat_model"] != "us.amazon.nova-pro-v1:0"
+    assert alice["neptune_model"] == bob["neptune_model"]
+
+def test_set_models_rejects_unknown_model():
+    """Test that /set-models only accepts models from the catalog."""
+    response = client.post("/set-models", json={"user_id": "carol@test.com", "image_model": "not-a-model"})
+    assert response.status_code == 400
+    assert "not-a-model" in response.json()["detail"]
+    
+    carol = client.get("/get-models", params={"user_id": "carol@test.com"}).json()
+    assert carol["image_model"] != "not-a-model"
+
+def test_model_selection_is_request_scoped():
+    """Test that the active model selection only applies inside its context."""
+    from agents.model_utils import (
+        default_model_selection, use_model_selection, get_current_model, get_current_image_model
+    )
+    
+    selection = default_model_selection().with_overrides(chat_model="scoped-chat", image_model="scoped-image")
+    with use_model_selection(selection):
+        assert get_current_model() == "scoped-chat"
+        assert get_current_image_model() == "scoped-image"
+    
+    assert get_current_model() == default_model_selection().chat_model
+
+def test_get_image_conditional_and_range_requests(tmp_path, monkeypatch):
+    """Test image ETags, immutable caching, 304 revalidation and byte ranges."""
+    from artifact_store import ArtifactStore
+    monkeypatch.chdir(tmp_path)
+    artifact = ArtifactStore(str(tmp_path / "output")).put(b"0123456789", "png")
+    (tmp_path / "output" / "chart_1.png").write_bytes(b"chart-bytes")
+    
+    response = client.get(f"/query-get-image/{artifact.filename}")
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{artifact.id}"'
+    assert "immutable" in response.headers["cache-control"]
+    
+    response = client.get(f"/get-image/{artifact.filename}", headers={"If-None-Match": f'"{artifact.id}"'})
+    assert response.status_code == 304
+    
+    response = client.get(f"/get-image/{artifact.filename}", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    
+    chart = client.get("/get-image/chart_1.png")
+    assert chart.headers["cache-control"] == "private, no-cache"
+    revalidated = client.get("/get-image/chart_1.png", headers={"If-None-Match": chart.headers["etag"]})
+    assert revalidated.status_code == 304
+    
+    assert client.get("/get-image/missing.png").status_code == 404
@@ -0,0 +1,108 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from guardrails import NotifyOnlyGuardrailsHook, ShadowGuardrailEvaluator
+
+
+def make_hook(evaluator):
+    with patch("guardrails.bedrock_guardrails.boto3.client") as client:
+        hook = NotifyOnlyGuardrailsHook("gr-123", "1", evaluator=evaluator)
+    return hook, client.return_value
+
+
+def user_message(text):
+    return MagicMock(message={"role": "user", "content": [{"text": text}]})
+
+
+def test_shadow_evaluation_runs_off_the_request_path():
+    """Test that the hook returns before apply_guardrail completes."""
+    evaluator = ShadowGuardrailEvaluator(max_workers=1, max_pending=4)
+    hook, client = make_hook(evaluator)
+    release = threading.Event()
+    done = threading.Event()
+
+    def apply_guardrail(**kwargs):
+        release.wait(5)
+        done.set()
+        return {"action": "NONE"}
+
+    client.apply_guardrail.side_effect = apply_guardrail
+    hook.check_user_input(user_message("Hello"))
+    assert not done.is_set()
+
+    release.set()
+    assert done.wait(5)
+    assert evaluator.stats["submitted"] == 1
+
+
+def test_overload_drops_evaluations():
+    """Test that checks beyond the pending limit are dropped instead of queued."""
+    evaluator = ShadowGuardrailEvaluator(max_workers=1, max_pending=1)
+    release = threading.Event()
+    evaluator.submit(lambda content, source: release.wait(5), "first", "INPUT")
+
+    assert not evaluator.submit(lambda content, source: None, "second", "INPUT")
+    assert evaluator.stats["dropped"] == 1
+    release.set()
+
+
+def test_sample_rate_zero_skips_evaluation():
+    """Test that sampling can turn shadow evaluation off for a fraction of traffic."""
+    evaluator = ShadowGuardrailEvaluator(sample_rate=0.0)
+    hook, client = make_hook(evaluator)
+
+    hook.check_user_input(user_message("Hello"))
+
+    client.apply_guardrail.assert_not_called()
+    assert evaluator.stats["sampled_out"] == 1
+
+
+def test_intervention_result_is_structured():
+    """Test that an intervention is reported with its policies."""
+    hook, client = make_hook(evaluator=None)
+    hook.evaluator = None
+    client.apply_guardrail.return_value = {
+        "action": "GUARDRAIL_INTERVENED",
+        "assessments": [{"topicPolicy": {"topics": [{"name": "Finance", "action": "BLOCKED"}]}}],
+    }
+
+    result = hook.evaluate_content("Which stocks should I buy?", "INPUT")
+
+    assert result["action"] == "GUARDRAIL_INTERVENED"
+    assert result["topics"] == [{"name": "Finance", "action": "BLOCKED"}]
+    assert result["source"] == "INPUT"
+
+
+def test_repeated_content_uses_cached_verdict():
+    """Test that identical content is only sent to ApplyGuardrail once."""
+    from guardrails import verdict_cache
+    verdict_cache.clear()
+    hook, client = make_hook(evaluator=None)
+    hook.evaluator = None
+    client.apply_guardrail.return_value = {"action": "NONE", "assessments": [], "usage": {"topicPolicyUnits": 1}}
+
+    first = hook.evaluate_content("Show me the supply chain graph", "INPUT")
+    second = hook.evaluate_content("Show me the supply chain graph", "INPUT")
+    hook.evaluate_content("Show me the supply chain graph", "OUTPUT")
+
+    assert client.apply_guardrail.call_count == 2
+    assert first["cached"] is False
+    assert second["cached"] is True
+
+
+def test_verdict_cache_bounds_and_ttl():
+    """Test that the verdict cache evicts old entries and expires stale ones."""
+    from guardrails import GuardrailVerdictCache
+    cache = GuardrailVerdictCache(max_entries=1, ttl_seconds=60)
+    first = cache.key("gr-123", "1", "INPUT", "one")
+    second = cache.key("gr-123", "1", "INPUT", "two")
+
+    cache.put(first, {"action": "NONE"})
+    cache.put(second, {"action": "GUARDRAIL_INTERVENED"})
+    assert cache.get(first) is None
+    assert cache.get(second)["action"] == "GUARDRAIL_INTERVENED"
+    assert cache.stats()["evictions"] == 1
+
+    expired = GuardrailVerdictCache(ttl_seconds=0)
+    expired.put(first, {"action": "NONE"})
+    assert expired.get(first) is None
@@ -97,3 +97,59 @@ class TestImageAssistant:
         """Test cleanup handles non-existent directory gracefully."""
         # Should not raise exception
         cleanup_old_images("/nonexistent/directory")
+
+    def test_generated_images_are_registered(self):
+        """Test that generate_image output is picked up from its tool result, not by scanning output/."""
+        from agents.image_assistant import GeneratedImageRegistrar
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "a_cat.png")
+            with open(image_path, 'wb') as f:
+                f.write(b"png")
+            
+            def run_agent(query):
+                event = Mock(tool_use={"name": "generate_image"}, result={
+                    "status": "success",
+                    "content": [{"text": f"The generated image has been saved locally to {image_path}. "}]
+                })
+                GeneratedImageRegistrar().register_image(event)
+                return "Here is your cat."
+            
+            with patch('agents.image_assistant.Agent') as mock_agent_class:
+                mock_agent_class.return_value = Mock(side_effect=run_agent)
+                result = image_assistant("Generate an image of a cat")
+        
+        assert "[Generated image: a_cat.png]" in result
+
+    def test_streamed_image_results_are_not_registered_twice(self):
+        """Test that a generated image streamed through the nested handler yields one artifact and marker."""
+        import artifact_store
+        from agents.image_assistant import GeneratedImageRegistrar
+        from streaming_callback_handler import use_event_stream
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, "a_cat.png")
+            with open(image_path, 'wb') as f:
+                f.write(b"png")
+            image_agent = Mock()
+            
+            def run_agent(query):
+                # generate_image returns the bytes as well as the saved path
+                result = {"status": "success", "content": [
+                    {"text": f"The generated image has been saved locally to {image_path}. "},
+                    {"image": {"format": "png", "source": {"bytes": b"png"}}},
+                ]}
+                image_agent.callback_handler(message={"role": "user", "content": [{"toolResult": result}]})
+                GeneratedImageRegistrar().register_image(Mock(tool_use={"name": "generate_image"}, result=result))
+                return "Here is your cat."
+            
+            image_agent.side_effect = run_agent
+            events = []
+            with patch('agents.image_assistant.Agent', return_value=image_agent), \
+                    patch.object(artifact_store, "_artifact_store", artifact_store.ArtifactStore(temp_dir)), \
+                    artifact_store.collect_artifacts() as created, use_event_stream(events.append):
+                result = image_assistant("Generate an image of a cat")
+            
+            assert result.count("[Generated image:") == 1
+            assert [artifact.filename for artifact in created] == ["a_cat.png"]
+            assert events and all("artifacts" not in event["data"] for event in events)
@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock
+
+from bedrock_agentcore.memory import MemoryClient
+
+from memory_cache import RecentTurnsCache
+
+KEY = ("memory-1", "alice", "s1")
+
+
+def turn(question, answer):
+    return [{"role": "USER", "content": {"text": question}},
+            {"role": "ASSISTANT", "content": {"text": answer}}]
+
+
+def test_repeated_reads_hit_the_cache():
+    """Test that only the first read of a session calls the memory service."""
+    cache = RecentTurnsCache(max_turns=20)
+    calls = []
+
+    def loader(k):
+        calls.append(k)
+        return [turn("Hi", "Hello")]
+
+    assert cache.get_last_k_turns(KEY, 10, loader) == [turn("Hi", "Hello")]
+    assert cache.get_last_k_turns(KEY, 20, loader) == [turn("Hi", "Hello")]
+    assert calls == [20]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_writes_update_cached_turns():
+    """Test that appended messages are visible without reloading."""
+    cache = RecentTurnsCache(max_turns=20)
+    cache.get_last_k_turns(KEY, 10, lambda k: [turn("Hi", "Hello")])
+
+    cache.append(KEY, "What is the weather?", "user")
+    cache.append(KEY, "It is sunny.", "assistant")
+
+    turns = cache.get_last_k_turns(KEY, 10, lambda k: None)
+    assert turns[-1] == turn("What is the weather?", "It is sunny.")
+    assert len(turns) == 2
+
+
+def test_partial_entries_reload_for_larger_requests():
+    """Test that an entry holding fewer turns than requested goes back to memory."""
+    cache = RecentTurnsCache(max_turns=2)
+    history = [turn(f"q{i}", f"a{i}") for i in range(5)]
+    cache.get_last_k_turns(KEY, 2, lambda k: history[:k])
+
+    assert cache.get_last_k_turns(KEY, 2, lambda k: None) == history[:2]
+    assert cache.get_last_k_turns(KEY, 4, lambda k: history[:k]) == history[:4]
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_and_ttl():
+    """Test that old sessions are evicted and expired entries are reloaded."""
+    cache = RecentTurnsCache(max_sessions=1, ttl_seconds=0)
+    cache.get_last_k_turns(KEY, 10, lambda k: [])
+    cache.get_last_k_turns(("memory-1", "bob", "s1"), 10, lambda k: [])
+    assert cache.stats()["sessions"] == 1
+
+    cache.get_last_k_turns(KEY, 10, lambda k: [])
+    assert cache.stats()["hits"] == 0
+
+
+def test_cached_turns_match_the_uncached_sdk_call():
+    """Test that a k=10 read after a k=20 preload returns what MemoryClient.get_last_k_turns returns."""
+    history = [turn(f"q{i}", f"a{i}") for i in range(15)]
+    client = MemoryClient.__new__(MemoryClient)
+    client.gmdp_client = MagicMock()
+    client.gmdp_client.list_events.return_value = {"events": [
+        {"payload": [{"conversational": message}]} for messages in history for message in messages
+    ]}
+
+    def load(k):
+        return client.get_last_k_turns(memory_id="memory-1", actor_id="alice", session_id="s1", k=k)
+
+    cache = RecentTurnsCache(max_turns=20)
+    assert cache.get_last_k_turns(KEY, 20, load) == load(20)
+    assert cache.get_last_k_turns(KEY, 10, lambda k: None) == load(10)
+
+    # New messages only show up in entries that hold the whole session
+    cache.append(KEY, "q15", "user")
+    assert cache.get_last_k_turns(KEY, 20, lambda k: None)[-1] == [{"role": "USER", "content": {"text": "q15"}}]
+    cache = RecentTurnsCache(max_turns=10)
+    cache.get_last_k_turns(KEY, 10, load)
+    cache.append(KEY, "q15", "user")
+    assert cache.get_last_k_turns(KEY, 10, lambda k: None) == load(10)
@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+from memory_hooks import MemoryRegistry, SharedMemoryHook
+
+
+def make_registry(memory_ids):
+    """Registry with a fake client whose list_memories returns memory_ids in turn."""
+    client = MagicMock()
+    client.list_memories.side_effect = [[{"id": memory_id}] for memory_id in memory_ids]
+    registry = MemoryRegistry()
+    registry._client = client
+    return registry, client
+
+
+def not_found():
+    return ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": "gone"}}, "GetLastKTurns")
+
+
+def test_memory_id_is_resolved_once():
+    """Test that repeated lookups reuse the cached memory id and client."""
+    registry, client = make_registry(["AIDataExplorer_STM-abc"])
+
+    for _ in range(5):
+        assert registry.get_memory_id() == "AIDataExplorer_STM-abc"
+        registry.call("get_last_k_turns", actor_id="user", session_id="s", k=20)
+
+    assert client.list_memories.call_count == 1
+    assert client.get_last_k_turns.call_count == 5
+
+
+def test_not_found_refreshes_memory_id():
+    """Test that a deleted memory resource is resolved again and the call retried."""
+    registry, client = make_registry(["AIDataExplorer_STM-old", "AIDataExplorer_STM-new"])
+    client.get_last_k_turns.side_effect = [not_found(), [["turn"]]]
+
+    assert registry.get_memory_id() == "AIDataExplorer_STM-old"
+    assert registry.call("get_last_k_turns", actor_id="user", session_id="s") == [["turn"]]
+    assert registry.get_memory_id() == "AIDataExplorer_STM-new"
+    assert client.get_last_k_turns.call_args.kwargs["memory_id"] == "AIDataExplorer_STM-new"
+
+
+def test_other_errors_do_not_refresh():
+    """Test that only not-found errors trigger a new lookup."""
+    registry, client = make_registry(["AIDataExplorer_STM-abc"])
+    client.create_event.side_effect = RuntimeError("throttled")
+    hook = SharedMemoryHook(client, registry.get_memory_id(), "user", "s", registry=registry)
+
+    try:
+        hook._call_memory("create_event", actor_id="user", session_id="s", messages=[("hi", "user")])
+    except RuntimeError:
+        pass
+
+    assert client.list_memories.call_count == 1
+    assert registry.get_memory_id() == "AIDataExplorer_STM-abc"
+
+
+def test_failed_lookup_is_not_retried_immediately():
+    """Test that a missing memory resource is not looked up on every request."""
+    registry, client = make_registry([])
+    client.list_memories.side_effect = None
+    client.list_memories.return_value = []
+
+    assert registry.get_memory_id() is None
+    assert registry.get_memory_id() is None
+    assert client.list_memories.call_count == 1
+
+
+def test_failed_find_does_not_back_off_creation():
+    """Test that an empty find (e.g. from /conversation) does not stop the supervisor from creating memory."""
+    registry, client = make_registry([])
+    client.list_memories.side_effect = None
+    client.list_memories.return_value = []
+
+    def create_memory_and_wait(**kwargs):
+        # The registry lock is free while the resource is being created
+        assert registry._lock.acquire(blocking=False)
+        registry._lock.release()
+        return {"id": "AIDataExplorer_STM-created"}
+
+    client.create_memory_and_wait.side_effect = create_memory_and_wait
+
+    assert registry.get_memory_id() is None
+    assert registry.get_memory_id(create=True) == "AIDataExplorer_STM-created"
+    assert registry.get_memory_id() == "AIDataExplorer_STM-created"
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+from memory_cache import RecentTurnsCache
+from memory_hooks import SharedMemoryHook
+from memory_writer import MemoryWriter
+
+
+class FakeRegistry:
+    """Records create_event calls made through MemoryRegistry.call."""
+
+    def __init__(self, failures=0):
+        self.calls = []
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def get_memory_id(self, create=False):
+        return "memory-1"
+
+    def call(self, method, memory_id=None, create=False, **kwargs):
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("throttled")
+            self.calls.append((method, memory_id, kwargs))
+
+
+def test_messages_are_batched_per_session():
+    """Test that a session's messages are written as one event on flush."""
+    registry = FakeRegistry()
+    writer = MemoryWriter(registry=registry, batch_size=10, flush_interval=60)
+
+    writer.submit("memory-1", "alice", "s1", "What is the weather?", "user")
+    writer.submit("memory-1", "bob", "s1", "Hello", "user")
+    writer.submit("memory-1", "alice", "s1", "It is sunny.", "assistant")
+    assert writer.flush_session("alice", "s1", timeout=5)
+
+    assert len(registry.calls) == 1
+    method, memory_id, kwargs = registry.calls[0]
+    assert method == "create_event"
+    assert kwargs["actor_id"] == "alice"
+    assert kwargs["messages"] == [("What is the weather?", "user"), ("It is sunny.", "assistant")]
+
+    writer.shutdown(timeout=5)
+    assert [call[2]["actor_id"] for call in registry.calls] == ["alice", "bob"]
+
+
+def test_full_batch_is_written_without_flush():
+    """Test that reaching the batch size writes immediately."""
+    registry = FakeRegistry()
+    writer = MemoryWriter(registry=registry, batch_size=2, flush_interval=60)
+
+    writer.submit("memory-1", "alice", "s1", "one", "user")
+    writer.submit("memory-1", "alice", "s1", "two", "assistant")
+    writer.flush(timeout=5)
+
+    assert len(registry.calls) == 1
+    assert writer.stats["written"] == 2
+    writer.shutdown(timeout=5)
+
+
+def test_failed_writes_are_retried():
+    """Test that transient write errors are retried with backoff."""
+    registry = FakeRegistry(failures=2)
+    writer = MemoryWriter(registry=registry, flush_interval=60, max_retries=3, retry_backoff=0.001)
+
+    writer.submit("memory-1", "alice", "s1", "hello", "user")
+    writer.flush(timeout=5)
+
+    assert len(registry.calls) == 1
+    assert writer.stats["retries"] == 2
+    assert writer.stats["failed"] == 0
+    writer.shutdown(timeout=5)
+
+
+def test_hook_does_not_write_inline():
+    """Test that the memory hook hands messages to the writer instead of the client."""
+    client = MagicMock()
+    writer = MagicMock()
+    hook = SharedMemoryHook(client, "memory-1", "alice", "s1", writer=writer)
+
+    hook.on_message_added(MagicMock(message={"role": "user", "content": [{"text": "Hi there"}]}))
+
+    client.create_event.assert_not_called()
+    writer.submit.assert_called_once_with("memory-1", "alice", "s1", "Hi there", "user")
+
+
+def test_history_waits_for_the_writer_only_when_read_from_memory():
+    """Test that cached history needs no flush, and a memory read flushes off the event loop first."""
+    client = MagicMock()
+    writer = MagicMock()
+    hook = SharedMemoryHook(client, "memory-1", "alice", "s1", writer=writer)
+    reader_threads = []
+
+    def get_last_k_turns(**kwargs):
+        reader_threads.append(threading.current_thread())
+        writer.flush_session.assert_called_once_with("alice", "s1", timeout=hook.flush_wait)
+        return [[{"role": "USER", "content": {"text": "Hi there"}}]]
+
+    client.get_last_k_turns.side_effect = get_last_k_turns
+    agent = MagicMock(system_prompt="You are helpful.")
+
+    with patch('memory_hooks.recent_turns_cache', RecentTurnsCache(max_turns=20, ttl_seconds=60)):
+        asyncio.run(hook.before_invocation(MagicMock(agent=agent)))
+        asyncio.run(hook.before_invocation(MagicMock(agent=agent)))
+
+    assert reader_threads and reader_threads[0] is not threading.main_thread()
+    assert client.get_last_k_turns.call_count == 1
+    assert writer.flush_session.call_count == 1
+    assert "User: Hi there" in agent.system_prompt
@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+from model_catalog import ModelCatalog
+
+
+def write_config(path, chat_name="Chat Model", mtime=None):
+    config = {
+        "models": [{"id": "chat-model", "name": chat_name}],
+        "image_models": [{"id": "image-model", "name": "Image Model"}],
+        "defaults": {"chat": "default-chat", "neptune": "default-chat", "image": "image-model"}
+    }
+    with open(path, "w") as f:
+        json.dump(config, f)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_display_names_are_indexed_by_id(tmp_path):
+    """Test that chat and image models resolve to their display names."""
+    path = tmp_path / "llm-config.json"
+    write_config(path)
+    catalog = ModelCatalog(paths=[str(path)], check_interval=0)
+
+    assert catalog.display_name("chat-model") == "Chat Model"
+    assert catalog.display_name("image-model") == "Image Model"
+    assert catalog.display_name("unknown-model") == "unknown-model"
+
+
+def test_catalog_reloads_only_when_file_changes(tmp_path):
+    """Test that the config is re-read after an mtime change and not before."""
+    path = tmp_path / "llm-config.json"
+    write_config(path, mtime=time.time() - 60)
+    catalog = ModelCatalog(paths=[str(path)], check_interval=0)
+    assert catalog.display_name("chat-model") == "Chat Model"
+
+    write_config(path, chat_name="Renamed Model")
+    assert catalog.display_name("chat-model") == "Renamed Model"
+
+    throttled = ModelCatalog(paths=[str(path)], check_interval=3600)
+    write_config(path, chat_name="Changed Again", mtime=time.time() + 60)
+    assert throttled.display_name("chat-model") == "Renamed Model"
+
+
+def test_validate_selection(tmp_path):
+    """Test that unknown ids are reported and configured defaults are accepted."""
+    path = tmp_path / "llm-config.json"
+    write_config(path)
+    catalog = ModelCatalog(paths=[str(path)], check_interval=0)
+
+    assert catalog.validate_selection(chat_model="chat-model", neptune_model="default-chat",
+                                      image_model="image-model") == []
+    errors = catalog.validate_selection(chat_model="image-model", image_model="chat-model")
+    assert len(errors) == 2
+
+
+def test_missing_config_falls_back_to_ids(tmp_path):
+    """Test that a missing config neither fails lookups nor blocks model selection."""
+    catalog = ModelCatalog(paths=[str(tmp_path / "missing.json")], check_interval=0)
+
+    assert catalog.display_name("chat-model") == "chat-model"
+    assert catalog.validate_selection(chat_model="anything") == []
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+from botocore.credentials import Credentials
+
+from agents.cypher_cache import CypherResultCache, CypherTranslationCache
+from neptune_http import AsyncNeptuneClient, iter_json_array
+
+ROWS = [{"s.name": "Acmé", "count": 3}, {"s.name": "Globex \"West\"", "count": -1.5e2}, {"s.name": None, "count": 10}]
+BODY = json.dumps({"results": ROWS}, ensure_ascii=False).encode("utf-8")
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    def __init__(self, data: bytes, size: int):
+        self.data, self.size = data, size
+
+    async def __aiter__(self):
+        async for chunk in chunked(self.data, self.size):
+            yield chunk
+
+
+def fake_session():
+    session = MagicMock()
+    session.get_credentials.return_value = Credentials("AKIDEXAMPLE", "secret")
+    return session
+
+
+def test_results_are_decoded_across_chunk_boundaries():
+    """Test that rows split mid-token, mid-number and mid-character decode at every chunk size."""
+    async def decode(size):
+        return [row async for row in iter_json_array(chunked(BODY, size), "results")]
+
+    for size in (1, 2, 3, 7, len(BODY)):
+        assert asyncio.run(decode(size)) == ROWS
+
+
+def test_async_client_signs_and_streams_opencypher():
+    """Test the openCypher request is SigV4 signed, form encoded and streamed row by row."""
+    seen = {}
+
+    def handler(request):
+        seen["request"] = request
+        return httpx.Response(200, stream=ChunkedStream(BODY, 5))
+
+    async def run():
+        client = AsyncNeptuneClient(host="neptune.local", session=fake_session(),
+                                    transport=httpx.MockTransport(handler))
+        rows = await client.opencypher("MATCH (s) RETURN s LIMIT $n", {"n": 3})
+        await client.aclose()
+        return rows
+
+    assert asyncio.run(run()) == ROWS
+    request = seen["request"]
+    assert str(request.url) == "https://neptune.local:8182/openCypher"
+    assert request.headers["Authorization"].startswith("AWS4-HMAC-SHA256")
+    form = parse_qs(request.content.decode())
+    assert form["query"] == ["MATCH (s) RETURN s LIMIT $n"] and json.loads(form["parameters"][0]) == {"n": 3}
+
+    failing = AsyncNeptuneClient(host="neptune.local", session=fake_session(),
+                                 transport=httpx.MockTransport(lambda request: httpx.Response(400, text="bad query")))
+    with pytest.raises(RuntimeError, match="HTTP 400.*bad query"):
+        asyncio.run(failing.opencypher("MATCH"))
+
+
+def test_stream_neptune_query_yields_rows_before_the_answer():
+    """Test the async query tool reports the Cypher and rows, then answers and caches the result."""
+    from agents import neptune_tools
+
+    async def stream_opencypher(cypher, parameters=None):
+        for row in ROWS:
+            yield row
+
+    client = MagicMock(stream_opencypher=stream_opencypher)
+    cypher_chain = MagicMock(ainvoke=AsyncMock(return_value=MagicMock(content="```cypher\nMATCH (s) RETURN s\n```")))
+    answer_chain = MagicMock(ainvoke=AsyncMock(return_value=MagicMock(content="Acmé leads")))
+
+    async def run():
+        return [message async for message in neptune_tools.stream_neptune_query("Which supplier leads?")]
+
+    with patch.object(neptune_tools, "cypher_translation_cache", CypherTranslationCache()) as translations, \
+         patch.object(neptune_tools, "cypher_result_cache", CypherResultCache()) as results, \
+         patch.object(neptune_tools, "schema_fingerprint", return_value="v1"), \
+         patch.object(neptune_tools, "get_graph_connection"), \
+         patch.object(neptune_tools, "get_cypher_chain", return_value=cypher_chain), \
+         patch.object(neptune_tools, "get_answer_chain", return_value=answer_chain), \
+         patch.object(neptune_tools, "get_async_neptune_client", return_value=client):
+        messages = asyncio.run(run())
+
+        assert messages[0] == "Generated Cypher: MATCH (s) RETURN s"
+        assert messages[1] == f"Row 1: {json.dumps(ROWS[0])}" and len(messages) == 2 + len(ROWS)
+        assert "Acmé leads" in messages[-1]
+        assert translations.get("which supplier leads", "v1") == "MATCH (s) RETURN s"
+        assert results.get("MATCH (s) RETURN s LIMIT 11") == ROWS
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.credentials import Credentials
+
+from neptune_http import NeptuneHttpClient
+
+
+def _client(**kwargs):
+    session = MagicMock()
+    session.get_credentials.return_value = Credentials("AKIDEXAMPLE", "secret")
+    return NeptuneHttpClient(host="neptune.local", port="8182", region="us-east-1", session=session, **kwargs), session
+
+
+def test_requests_are_signed_and_share_one_pool():
+    """Test that requests reuse the pool and credentials and carry a SigV4 signature."""
+    client, session = _client()
+    with patch.object(client.http, "request", return_value=MagicMock(status=200)) as send:
+        client.request("GET", "/loader")
+        client.request("POST", "/loader", {"source": "s3://bucket/output"})
+
+    session.get_credentials.assert_called_once()
+    method, url = send.call_args_list[0].args
+    headers = send.call_args_list[0].kwargs["headers"]
+    assert (method, url) == ("GET", "https://neptune.local:8182/loader")
+    assert headers["Authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/")
+    assert "/neptune-db/aws4_request" in headers["Authorization"]
+    assert send.call_args_list[1].kwargs["body"] == b'{"source": "s3://bucket/output"}'
+
+
+def test_timeouts_and_retries_are_configurable():
+    """Test the pool's timeout and that only idempotent requests are retried."""
+    client, _ = _client(connect_timeout=2, read_timeout=30, retries=5)
+    timeout = client.http.connection_pool_kw["timeout"]
+    retries = client.http.connection_pool_kw["retries"]
+    assert (timeout.connect_timeout, timeout.read_timeout) == (2, 30)
+    assert retries.total == 5
+    assert retries.is_retry("GET", 503) and not retries.is_retry("POST", 503)
+
+
+def test_missing_host_is_reported():
+    """Test that an unconfigured endpoint raises a clear error."""
+    with patch.dict("os.environ", {}, clear=True), pytest.raises(ValueError, match="NEPTUNE_HOST"):
+        NeptuneHttpClient(session=MagicMock())
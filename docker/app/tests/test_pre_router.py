@@ -0,0 +1,93 @@
+import asyncio
+
+from strands import tool
+from strands.hooks import HookProvider, HookRegistry, MessageAddedEvent
+
+from agents.pre_router import PreRouter, TfidfRouter, dispatch_to_specialist
+
+EXAMPLES = [
+    ("What's the weather in Seattle?", "supply_chain_assistant"),
+    ("What is the status of SAP order 12345?", "sap_order_assistant"),
+    ("How many products are in the catalog?", "product_analyst"),
+    ("What is machine learning?", "general_assistant"),
+]
+
+
+def test_rules_route_unambiguous_queries():
+    """Test that single keyword rule matches are dispatched in dispatch mode."""
+    router = PreRouter(mode="dispatch", examples=EXAMPLES)
+    decision = router.route("What's the HTS code for coffee beans?")
+    assert (decision.tool, decision.source, decision.dispatch) == ("tariff_assistant", "rule", True)
+
+
+def test_compound_and_follow_up_queries_fall_back():
+    """Test that compound questions and follow-ups are left to the supervisor."""
+    router = PreRouter(mode="dispatch", examples=EXAMPLES)
+    assert router.route("Weather in Boston and the tariff on steel").reason == "multiple_rules"
+    assert router.route("Can you chart that again?").reason == "follow_up"
+    assert not router.route("Can you chart that again?").dispatch
+
+
+def test_classifier_confidence_and_routable_tools():
+    """Test classifier decisions below the threshold or for non-routable tools are not dispatched."""
+    router = PreRouter(mode="dispatch", examples=EXAMPLES, min_confidence=0.5, min_margin=0.1)
+    low = router.route("Something completely unrelated to anything")
+    assert low.reason == "low_confidence" and not low.dispatch
+    sap = router.route("Status of SAP order 999")
+    assert sap.tool == "sap_order_assistant" and sap.reason == "not_routable"
+    assert TfidfRouter(EXAMPLES).classify("catalog products")[0][0] == "product_analyst"
+
+
+def test_shadow_mode_records_agreement():
+    """Test that shadow mode never dispatches and measures agreement with the supervisor."""
+    router = PreRouter(mode="shadow", examples=EXAMPLES)
+    decision = router.route("Show me a bar chart of revenue")
+    assert decision.tool == "data_visualizer_assistant" and not decision.dispatch
+    router.record(decision, "Show me a bar chart of revenue", {"data_visualizer_assistant"})
+    router.record(router.route("Forecast for Denver"), "Forecast for Denver", {"general_assistant"})
+    stats = router.stats()
+    assert (stats["decisions"], stats["compared"], stats["agreed"], stats["agreement"]) == (2, 2, 1, 0.5)
+    assert PreRouter(mode="off", examples=EXAMPLES).route("weather in Paris").reason == "disabled"
+
+
+def test_enforced_guardrails_keep_prompts_on_the_supervisor(monkeypatch):
+    """Test that nothing is dispatched while guardrails are enforced on the supervisor's model."""
+    monkeypatch.setenv("BEDROCK_GUARDRAIL_ID", "gr-123")
+    monkeypatch.setenv("GUARDRAIL_MODE", "enforce")
+    decision = PreRouter(mode="dispatch", examples=EXAMPLES).route("What's the HTS code for coffee beans?")
+    assert decision.tool == "tariff_assistant"
+    assert decision.reason == "guardrail_enforce" and not decision.dispatch
+    monkeypatch.setenv("GUARDRAIL_MODE", "shadow")
+    assert PreRouter(mode="dispatch", examples=EXAMPLES).route("What's the HTS code for coffee beans?").dispatch
+
+
+def test_dispatch_to_specialist_streams_and_records_the_turn():
+    """Test direct dispatch reports the tool use to the callback handler and runs message hooks."""
+    @tool
+    def image_assistant(query: str) -> str:
+        """Fake image specialist."""
+        return f"Here is your image. [Generated image: cat-1234.png] ({query})"
+
+    class Recorder(HookProvider):
+        def __init__(self):
+            self.messages = []
+
+        def register_hooks(self, registry, **kwargs):
+            registry.add_callback(MessageAddedEvent, lambda event: self.messages.append(event.message))
+
+    class FakeAgent:
+        def __init__(self):
+            self.messages = []
+            self.hooks = HookRegistry()
+
+    agent, recorder, calls = FakeAgent(), Recorder(), []
+    agent.hooks.add_hook(recorder)
+    response = asyncio.run(dispatch_to_specialist(
+        agent, image_assistant, "draw a cat", lambda **kwargs: calls.append(kwargs)
+    ))
+
+    assert response == "Here is your image.  (draw a cat)"
+    assert calls[0]["current_tool_use"]["name"] == "image_assistant"
+    assert "toolResult" in calls[2]["message"]["content"][0]
+    assert [m["role"] for m in recorder.messages] == ["user", "assistant"]
+    assert agent.messages == recorder.messages
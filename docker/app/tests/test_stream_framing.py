@@ -0,0 +1,89 @@
+import json
+from unittest.mock import patch
+
+from stream_framing import SSEFramer, compact_event, dumps
+
+
+def parse_frames(frames):
+    return [json.loads(line[len("data: "):]) for line in frames.split("\n") if line.startswith("data: ")]
+
+
+def test_content_deltas_are_batched_until_size_limit():
+    """Test that small deltas are merged into one frame once the byte budget is reached."""
+    framer = SSEFramer(window_ms=1000, max_bytes=10)
+
+    assert framer.content("Hello") == ""
+    frames = framer.content(" world")
+
+    assert parse_frames(frames) == [{"type": "content", "data": "Hello world"}]
+    assert not framer.pending
+
+
+def test_content_is_flushed_when_window_elapses():
+    """Test that a tick after the time window flushes buffered content."""
+    framer = SSEFramer(window_ms=20, max_bytes=1024)
+    with patch('stream_framing.time.monotonic', return_value=100.0):
+        assert framer.content("Hi") == ""
+        assert framer.tick() == ""
+    with patch('stream_framing.time.monotonic', return_value=100.05):
+        frames = framer.tick()
+
+    assert parse_frames(frames) == [{"type": "content", "data": "Hi"}]
+
+
+def test_event_flushes_pending_content_first():
+    """Test that events never overtake content that was produced before them."""
+    framer = SSEFramer(window_ms=1000, max_bytes=1024, compact=False)
+    framer.content("partial answer")
+    frames = parse_frames(framer.event({"type": "🔧 tool_use (chart_tool)", "data": {"tool": "chart_tool"}}))
+
+    assert frames[0] == {"type": "content", "data": "partial answer"}
+    assert frames[1]["type"] == "event"
+    assert frames[1]["event"]["data"]["tool"] == "chart_tool"
+
+
+def test_text_generation_events_are_merged():
+    """Test that per-token text_generation events collapse into one event."""
+    framer = SSEFramer(window_ms=1000, max_bytes=1024)
+    framer.event({"type": "📟 text_generation", "agent": "supervisor", "timestamp": 1.0, "data": {"text": "a"}})
+    framer.event({"type": "📟 text_generation", "agent": "supervisor", "timestamp": 1.1, "data": {"text": "b"}})
+
+    frames = parse_frames(framer.flush())
+    assert len(frames) == 1
+    assert frames[0]["event"]["data"]["text"] == "ab"
+
+
+def test_text_generation_events_are_merged_per_agent():
+    """Test that interleaved text from the supervisor and a sub-agent is never merged across agents."""
+    framer = SSEFramer(window_ms=1000, max_bytes=1024)
+    frames = ""
+    for agent, text in [("supervisor", "a"), ("supervisor", "b"), ("image_assistant", "x"),
+                        ("image_assistant", "y"), ("supervisor", "c")]:
+        frames += framer.event({"type": "📟 text_generation", "agent": agent, "data": {"text": text}})
+    frames += framer.flush()
+
+    events = [frame["event"] for frame in parse_frames(frames)]
+    assert [(event.get("agent"), event["data"]["text"]) for event in events] == [
+        (None, "ab"), ("image_assistant", "xy"), (None, "c")]
+
+
+def test_disabled_window_frames_every_delta():
+    """Test that a zero window keeps per-token framing."""
+    framer = SSEFramer(window_ms=0, max_bytes=1024)
+    assert parse_frames(framer.content("a")) == [{"type": "content", "data": "a"}]
+
+
+def test_compact_event_drops_empty_fields():
+    """Test the compact event schema."""
+    event = compact_event({
+        "timestamp": 1700000000.123456,
+        "agent": "supervisor",
+        "type": "📊 usage",
+        "data": {"tokens": "10", "latency": None},
+    })
+    assert event == {"timestamp": 1700000000.123, "type": "📊 usage", "data": {"tokens": "10"}}
+
+
+def test_dumps_is_compact_and_keeps_unicode():
+    """Test that serialization has no padding and does not escape emoji."""
+    assert dumps({"type": "content", "data": "🔧 é"}) == '{"type":"content","data":"🔧 é"}'
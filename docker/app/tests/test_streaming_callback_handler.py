@@ -0,0 +1,121 @@
+import logging
+from unittest.mock import MagicMock, patch
+
+from streaming_callback_handler import StreamingCallbackHandler, EventLogSampler
+
+
+def test_filtered_events_are_not_formatted():
+    """Test that filtered events return before any formatting work."""
+    callback = MagicMock()
+    handler = StreamingCallbackHandler(callback, "supervisor")
+
+    with patch.object(handler, "_format_event_data") as format_data:
+        handler(current_tool_use={"name": "weather", "input": '{"cit'})
+        handler(event={"contentBlockDelta": {"delta": {"text": "Hi"}}})
+
+    format_data.assert_not_called()
+    callback.assert_not_called()
+
+
+def test_handler_does_not_print(capsys):
+    """Test that events go to the callback, not stdout."""
+    callback = MagicMock()
+    handler = StreamingCallbackHandler(callback, "supervisor")
+
+    handler(init_event_loop=True)
+    handler(current_tool_use={"name": "weather", "input": '{"city": "Seattle"}'})
+
+    assert capsys.readouterr().out == ""
+    events = [call.args[0] for call in callback.call_args_list]
+    assert [event["type"] for event in events] == ["🔄 init_event_loop", "🔧 tool_use (weather)"]
+    assert events[1]["data"] == {"tool": "weather", "query": "Seattle"}
+
+
+def test_events_are_only_formatted_for_a_consumer():
+    """Test that without a callback or event list nothing is formatted."""
+    handler = StreamingCallbackHandler(None, "supervisor", keep_events=False)
+
+    with patch.object(handler, "_format_event_data") as format_data:
+        handler(message={"role": "user", "content": [{"text": "Hello"}]})
+
+    format_data.assert_not_called()
+
+
+def test_unknown_events_without_data_are_dropped():
+    """Test that unrecognized callbacks with nothing to show are not streamed."""
+    callback = MagicMock()
+    handler = StreamingCallbackHandler(callback, "supervisor")
+
+    handler(request_state={})
+
+    callback.assert_not_called()
+
+
+def test_diagnostics_are_sampled(caplog):
+    """Test that the diagnostic logger only records the sampled share of events."""
+    handler = StreamingCallbackHandler(MagicMock(), "supervisor")
+    handler._sample_log = EventLogSampler(rate=0.5)
+    events_logger = logging.getLogger("streaming_callback_handler.events")
+    events_logger.setLevel(logging.DEBUG)
+    try:
+        with caplog.at_level(logging.DEBUG, logger="streaming_callback_handler.events"):
+            for _ in range(4):
+                handler(start_event_loop=True)
+    finally:
+        events_logger.setLevel(logging.WARNING)
+
+    assert len([r for r in caplog.records if r.name == "streaming_callback_handler.events"]) == 2
+
+
+def test_raw_events_are_classified_by_top_level_key():
+    """Test that raw stream events are typed from their structure, not their repr."""
+    from streaming_callback_handler import raw_event_type
+
+    assert raw_event_type({"messageStart": {"role": "assistant"}}) == "🚀 messageStart"
+    assert raw_event_type({"messageStop": {"stopReason": "end_turn"}}) == "🏁 messageStop"
+    assert raw_event_type({"metadata": {"usage": {}}}) == "📊 usage"
+    assert raw_event_type({"redactContent": {}}) == "redactContent"
+    assert raw_event_type("not a dict") == "raw_event"
+
+
+def test_raw_event_formatting_matches_previous_output():
+    """Test that structured formatting produces the same text as the literal_eval version."""
+    callback = MagicMock()
+    handler = StreamingCallbackHandler(callback, "supervisor")
+
+    with patch("ast.literal_eval") as literal_eval:
+        handler(event={"messageStop": {"stopReason": "end_turn", "additionalModelResponseFields": None}})
+        handler(event={"contentBlockDelta": {"delta": {"text": "Hi"}}})
+
+    literal_eval.assert_not_called()
+    event = callback.call_args.args[0]
+    assert callback.call_count == 1
+    assert event["type"] == "🏁 messageStop"
+    assert event["data"]["formatted_content"] == "stopReason: end_turn\nadditionalModelResponseFields: None"
+
+
+def test_tool_result_images_are_stored_out_of_band(tmp_path):
+    """Test that image bytes become an artifact reference instead of inline base64."""
+    import artifact_store
+    from artifact_store import ArtifactStore
+
+    callback = MagicMock()
+    handler = StreamingCallbackHandler(callback, "supervisor")
+    image_bytes = b"\x89PNG\r\n\x1a\n" + b"\x00" * 4096
+    message = {"role": "user", "content": [{"toolResult": {"content": [
+        {"image": {"format": "png", "source": {"bytes": image_bytes}}},
+        {"text": "chart"},
+    ]}}]}
+
+    with patch.object(artifact_store, "_artifact_store", ArtifactStore(str(tmp_path))):
+        handler(message=message)
+        handler(message=message)
+
+    first, second = [call.args[0]["data"] for call in callback.call_args_list]
+    assert "base64" not in first["content"]
+    assert first["artifacts"] == second["artifacts"]
+    artifact = first["artifacts"][0]
+    assert artifact["url"] in first["content"]
+    assert artifact["size"] == len(image_bytes)
+    assert (tmp_path / f"{artifact['id']}.png").read_bytes() == image_bytes
+    assert len(list(tmp_path.iterdir())) == 1
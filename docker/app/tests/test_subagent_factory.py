@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from agents.subagent_factory import SubAgentFactory
+
+
+def _build(**kwargs):
+    agent = MagicMock()
+    agent.system_prompt = kwargs.get("system_prompt")
+    agent.messages = []
+    return agent
+
+
+def test_agents_are_reused_with_a_clean_conversation():
+    """Test that a returned agent is reset and handed to the next caller."""
+    factory = SubAgentFactory(max_idle_per_key=2)
+    build = MagicMock(side_effect=_build)
+
+    with factory.lease("general", build, system_prompt="prompt") as first:
+        first.messages.append({"role": "user", "content": [{"text": "hi"}]})
+    with factory.lease("general", build, system_prompt="prompt") as second:
+        assert second is first
+        assert second.messages == []
+
+    build.assert_called_once_with(system_prompt="prompt")
+    assert factory.stats()["hits"] == 1
+
+
+def test_concurrent_leases_get_separate_agents():
+    """Test that an agent in use is never handed out twice."""
+    factory = SubAgentFactory()
+    with factory.lease("general", _build) as first, factory.lease("general", _build) as second:
+        assert first is not second
+
+
+def test_system_prompt_is_applied_to_reused_agents():
+    """Test that per-request prompts replace the pooled agent's prompt."""
+    factory = SubAgentFactory()
+    with factory.lease("help", _build, system_prompt="first"):
+        pass
+    with factory.lease("help", _build, system_prompt="second") as agent:
+        assert agent.system_prompt == "second"
+
+
+def test_failed_agents_are_not_returned_to_the_pool():
+    """Test that an agent whose run raised is discarded."""
+    factory = SubAgentFactory()
+    with pytest.raises(RuntimeError):
+        with factory.lease("tariff", _build) as failed:
+            raise RuntimeError("model error")
+    with factory.lease("tariff", _build) as agent:
+        assert agent is not failed
+
+
+def test_keys_separate_builders_and_models():
+    """Test that different builders and models never share agents."""
+    factory = SubAgentFactory()
+    factory.model_client = MagicMock(side_effect=lambda model_id: f"client:{model_id}")
+    with factory.lease("general", _build, model="model-a") as agent_a:
+        assert agent_a is not None
+    with factory.lease("general", _build, model="model-b") as agent_b:
+        assert agent_b is not agent_a
+    with factory.lease("general", _build, model="model-a", variant="patched") as other:
+        assert other is not agent_a
+
+
+def test_leased_agents_stream_events_tagged_with_the_specialist():
+    """Test that sub-agent events reach the current stream, including from tool threads."""
+    import asyncio
+    from streaming_callback_handler import use_event_stream
+
+    factory = SubAgentFactory()
+    events = []
+
+    def run_tool():
+        with factory.lease("tariff_assistant", _build) as agent:
+            agent.callback_handler(data="Duty is ")
+            return agent
+
+    async def stream():
+        with use_event_stream(events.append):
+            return await asyncio.to_thread(run_tool)
+
+    agent = asyncio.run(stream())
+    assert [(e["agent"], e["type"], e["data"]["text"]) for e in events] == [
+        ("tariff_assistant", "📟 text_generation", "Duty is ")
+    ]
+
+    # Outside a stream the agent's own handler is left in place
+    with factory.lease("tariff_assistant", _build) as reused:
+        assert reused is agent
+        reused.callback_handler(data="quiet")
+    assert len(events) == 1
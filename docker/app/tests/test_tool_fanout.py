@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import pytest
+from strands import Agent
+from strands.hooks import AfterToolCallEvent, HookProvider, HookRegistry
+from strands.tools.executors._executor import ToolExecutor
+from strands.types._events import ToolResultEvent
+
+from agents.tool_fanout import FanOutToolExecutor, _parse_timeouts
+from streaming_callback_handler import nested_callback_handler, use_event_stream
+
+DELAYS = {"supply_chain_assistant": 0.3, "tariff_assistant": 0.1, "product_analyst": 0.2, "neptune_bulk_load": 0.1}
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    """Replace tool execution with sleeps of known length."""
+    running = {"now": 0, "peak": 0}
+
+    async def stream_with_trace(agent, tool_use, tool_results, *args):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        try:
+            await asyncio.sleep(DELAYS[tool_use["name"]])
+        finally:
+            running["now"] -= 1
+        result = {"toolUseId": tool_use["toolUseId"], "status": "success", "content": [{"text": tool_use["name"]}]}
+        tool_results.append(result)
+        yield ToolResultEvent(result)
+
+    monkeypatch.setattr(ToolExecutor, "_stream_with_trace", staticmethod(stream_with_trace))
+    return running
+
+
+class AfterToolCallRecorder(HookProvider):
+    def __init__(self):
+        self.events = []
+
+    def register_hooks(self, registry: HookRegistry) -> None:
+        registry.add_callback(AfterToolCallEvent, self.events.append)
+
+
+def _run(executor, names, agent=None):
+    tool_uses = [{"toolUseId": f"id-{i}", "name": name, "input": {}} for i, name in enumerate(names)]
+    tool_results = []
+
+    async def consume():
+        return [event async for event in executor._execute(agent, tool_uses, tool_results, None, None, {})]
+
+    started = time.monotonic()
+    events = asyncio.run(consume())
+    return tool_results, events, time.monotonic() - started
+
+
+def test_independent_tools_run_concurrently_in_order(fake_tools):
+    """Test that a compound turn takes about as long as its slowest tool and keeps request order."""
+    executor = FanOutToolExecutor(max_concurrency=4, default_timeout=5, timeouts={}, sequential_tools=[])
+    results, events, elapsed = _run(executor, ["supply_chain_assistant", "tariff_assistant", "product_analyst"])
+
+    assert elapsed < 0.5
+    assert fake_tools["peak"] == 3
+    assert [r["content"][0]["text"] for r in results] == ["supply_chain_assistant", "tariff_assistant", "product_analyst"]
+    assert len(events) == 3
+
+
+def test_concurrency_is_bounded(fake_tools):
+    """Test that no more than max_concurrency tools run at once."""
+    executor = FanOutToolExecutor(max_concurrency=2, default_timeout=5, timeouts={}, sequential_tools=[])
+    _run(executor, ["supply_chain_assistant", "tariff_assistant", "product_analyst"])
+    assert fake_tools["peak"] == 2
+
+
+def test_turns_with_side_effects_run_sequentially(fake_tools):
+    """Test that a sequential tool makes the whole turn run one call at a time."""
+    executor = FanOutToolExecutor(max_concurrency=4, default_timeout=5, timeouts={}, sequential_tools=["neptune_bulk_load"])
+    _run(executor, ["neptune_bulk_load", "tariff_assistant"])
+    assert fake_tools["peak"] == 1
+
+
+def test_slow_tools_time_out_with_an_error_result(fake_tools):
+    """Test that a tool exceeding its timeout returns an error without holding up the others."""
+    executor = FanOutToolExecutor(max_concurrency=4, default_timeout=5,
+                                  timeouts={"supply_chain_assistant": 0.05}, sequential_tools=[])
+    recorder = AfterToolCallRecorder()
+    agent = Agent(hooks=[recorder], callback_handler=None)
+    results, _, elapsed = _run(executor, ["supply_chain_assistant", "tariff_assistant"], agent)
+
+    assert elapsed < 0.3
+    assert results[0]["status"] == "error"
+    assert "did not finish" in results[0]["content"][0]["text"]
+    assert results[1]["status"] == "success"
+    # Hooks see the synthesized result, e.g. for metrics and guardrails
+    [after] = recorder.events
+    assert after.result is results[0] and isinstance(after.exception, TimeoutError)
+
+
+def test_timed_out_tools_stop_streaming_events(monkeypatch):
+    """Test that sub-agent events a timed-out tool emits after its timeout never reach the stream."""
+    async def stream_with_trace(agent, tool_use, tool_results, *args):
+        handler = nested_callback_handler(tool_use["name"])
+
+        def work():
+            handler(data="early")
+            time.sleep(0.2)
+            handler(data="late")
+
+        await asyncio.to_thread(work)
+        yield ToolResultEvent({"toolUseId": tool_use["toolUseId"], "status": "success", "content": []})
+
+    monkeypatch.setattr(ToolExecutor, "_stream_with_trace", staticmethod(stream_with_trace))
+    executor = FanOutToolExecutor(max_concurrency=4, default_timeout=0.05, timeouts={}, sequential_tools=[])
+    streamed = []
+    with use_event_stream(streamed.append):
+        results, _, _ = _run(executor, ["supply_chain_assistant"], Agent(callback_handler=None))
+
+    assert results[0]["status"] == "error"
+    assert [event["data"]["text"] for event in streamed] == ["early"]
+
+
+def test_parse_timeouts():
+    """Test parsing of SUPERVISOR_TOOL_TIMEOUTS."""
+    assert _parse_timeouts("image_assistant=180, tariff_assistant=60,bad=x") == {
+        "image_assistant": 180.0, "tariff_assistant": 60.0
+    }
@@ -375,6 +375,14 @@ def handler(event, context):
       }),
     );
 
+    // Read bulk load completions to invalidate cached Cypher results
+    taskRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["dynamodb:Scan"],
+        resources: [`arn:aws:dynamodb:${this.region}:${this.account}:table/AI-Data-Explorer-Bulk-Load-Log`],
+      }),
+    );
+
     // Add X-Ray permissions for tracing
     taskRole.addToPolicy(
       new iam.PolicyStatement({
@@ -437,6 +445,7 @@ def handler(event, context):
         SCHEMA_TRANSLATOR_LOG_TABLE: this.node.tryGetContext("withGraphDb")
           ? Fn.importValue("GraphDbSchemaTranslatorLogTableName")
           : "",
+        BULK_LOAD_LOG: this.node.tryGetContext("withGraphDb") ? Fn.importValue("GraphDbBulkLoadLogTableName") : "",
       },
       portMappings: [
         {
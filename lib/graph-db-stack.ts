@@ -598,12 +598,32 @@ export class GraphDbStack extends cdk.Stack {
     const dataLoaderRole = createLambdaExecRole(this, 'DataLoaderRole', dataLoaderName, vpc.vpcId);
     dataLoaderRole.addToPolicy(createNeptunePolicy());
 
+    const dataLoaderDir = path.join(__dirname, 'lambda/dl');
+    const neptuneHttpClient = path.join(__dirname, '../docker/app/neptune_http.py');
     const dataLoaderLambda = new lambda.Function(this, 'DxDataLoaderLambda', {
       functionName: dataLoaderName,
       role: dataLoaderRole,
       runtime: lambda.Runtime.PYTHON_3_12,
       handler: 'data-loader-lambda.lambda_handler',
-      code: lambda.Code.fromAsset(path.join(__dirname, 'lambda/dl')),
+      code: lambda.Code.fromAsset(dataLoaderDir, {
+        // The SigV4 Neptune HTTP client is shared with the agent service; copy it in beside the handler
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          volumes: [{ hostPath: path.dirname(neptuneHttpClient), containerPath: '/shared' }],
+          command: ['bash', '-c', 'cp -r /asset-input/. /asset-output/ && cp /shared/neptune_http.py /asset-output/'],
+          local: {
+            tryBundle(outputDir: string) {
+              for (const file of fs.readdirSync(dataLoaderDir)) {
+                if (file.endsWith('.py')) {
+                  fs.copyFileSync(path.join(dataLoaderDir, file), path.join(outputDir, file));
+                }
+              }
+              fs.copyFileSync(neptuneHttpClient, path.join(outputDir, 'neptune_http.py'));
+              return true;
+            },
+          },
+        },
+      }),
       memorySize: 128,
       timeout: cdk.Duration.minutes(5),
       vpc,
@@ -1,16 +1,14 @@
 import json
-import urllib3
 import boto3
 import os
 import base64
-from botocore.auth import SigV4Auth
-from botocore.awsrequest import AWSRequest
 from datetime import datetime
 import time
 import logging
 from urllib import parse
 from decimal import Decimal
 from boto3.dynamodb.types import Binary
+from neptune_http import get_neptune_client
 
 # Set up logging
 logger = logging.getLogger()
@@ -54,34 +52,20 @@ def truncate_errors_in_payload(payload, max_errors=10):
     
     return payload
 
-def make_neptune_request(method, url, payload=None, credentials=None, region=None):
+def make_neptune_request(method, url, payload=None):
     """
-    Make a signed request to Neptune endpoint
+    Make a signed request to Neptune endpoint over the shared, pooled client
+    (reused across invocations of a warm Lambda)
     """
-    request = AWSRequest(method=method, url=url, data=json.dumps(payload) if payload else None)
-    SigV4Auth(credentials, 'neptune-db', region).add_auth(request)
-    
-    http = urllib3.PoolManager()
-    request.headers['Content-Type'] = 'application/json'
-    
-    response = http.request(
-        method,
-        request.url,
-        body=request.data,
-        headers=dict(request.headers)
-    )
-    
-    return response
+    return get_neptune_client().request(method, url, payload or None)
 
-def get_load_status(neptune_endpoint, load_id, credentials, region):
+def get_load_status(neptune_endpoint, load_id):
     """
     Check the status of a bulk load job
     """
     response = make_neptune_request(
         'GET',
-        f"{neptune_endpoint}/{load_id}?details=true&errors=true&page=1&errorsPerPage=1000",
-        credentials=credentials,
-        region=region
+        f"{neptune_endpoint}/{load_id}?details=true&errors=true&page=1&errorsPerPage=1000"
     )
     
     load = json.loads(response.data.decode("utf-8"))['payload']
@@ -211,12 +195,8 @@ def lambda_handler(event, context):
         'userProvidedEdgeIds': 'FALSE',
     }
     
-    # Get AWS credentials
-    session = boto3.Session()
-    credentials = session.get_credentials()
-
     # Start bulk load
-    response = make_neptune_request('POST', neptune_endpoint, payload, credentials, region)
+    response = make_neptune_request('POST', neptune_endpoint, payload)
 
     # Initialize DynamoDB (moved up to handle both success and failure cases)
     dynamodb = boto3.resource('dynamodb')
@@ -292,14 +272,14 @@ def lambda_handler(event, context):
     )
 
     # Check load status
-    load_info = get_load_status(neptune_endpoint, load_id, credentials, region)
+    load_info = get_load_status(neptune_endpoint, load_id)
     logger.info(f'Load Status: {load_info["status"]} | Total Records: {load_info["total_records"]}')
     
     while load_info['status'] in ['LOAD_IN_PROGRESS', 'LOAD_NOT_STARTED']:
         # INTENTIONAL: Sleep required to poll Neptune Bulk Loader which doesn't publish events
         time.sleep(5)  # nosemgrep: arbitrary-sleep
         # Check load status
-        load_info = get_load_status(neptune_endpoint, load_id, credentials, region)
+        load_info = get_load_status(neptune_endpoint, load_id)
         logger.info(f'Load Status: {load_info["status"]} | Total Records: {load_info["total_records"]}')
 
     # Update final status in DynamoDB
@@ -1,10 +1,13 @@
-from flask import Flask, render_template, request, jsonify, Response, send_from_directory, redirect, session, url_for
+from flask import Flask, render_template, request, jsonify, Response, send_file, send_from_directory, redirect, session, url_for
 import requests
 import json
 import time
 import os
 import tempfile
 import hashlib
+import heapq
+import threading
+from collections import OrderedDict
 import base64
 import uuid
 from datetime import datetime, timezone
@@ -49,22 +52,99 @@ def safe_error_response(e: Exception, status_code: int = 500):
     logger.error(f"Error: {str(e)}", exc_info=True)
     return jsonify({'error': 'An internal error occurred'}), status_code
 
-def cleanup_old_temp_files():
-    """Clean up temporary upload files older than 1 hour"""
-    try:
-        temp_dir = tempfile.gettempdir()
-        current_time = time.time()
-        
-        for filename in os.listdir(temp_dir):
-            if filename.startswith('upload_'):
-                file_path = os.path.join(temp_dir, filename)
-                if os.path.isfile(file_path):
-                    file_age = current_time - os.path.getmtime(file_path)
-                    if file_age > 3600:  # 1 hour in seconds
-                        os.remove(file_path)
-    except Exception:
-        # Ignore cleanup errors to not break the main functionality
-        logger.debug("Cleanup error ignored")
+class TempUploadJanitor:
+    """Expire uploaded temp files from a background thread.
+    
+    Uploads are indexed by expiry time as they are written, so /upload-file no
+    longer walks the system temp directory. The directory is scanned once when the
+    janitor starts to pick up uploads left behind by a previous process, and
+    UPLOAD_MAX_BYTES removes the oldest uploads first when exceeded.
+    """
+    
+    def __init__(self, temp_dir=None, retention_seconds=None, max_bytes=None, interval_seconds=None):
+        self.temp_dir = temp_dir or tempfile.gettempdir()
+        self.retention = retention_seconds if retention_seconds is not None else float(os.environ.get('UPLOAD_RETENTION_SECONDS', '3600'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get('UPLOAD_MAX_BYTES', str(512 * 1024 * 1024)))
+        self.interval = interval_seconds or float(os.environ.get('UPLOAD_JANITOR_INTERVAL_SECONDS', '60'))
+        self._heap = []  # (expires_at, path), may hold entries superseded by a re-upload
+        self._files = {}  # path -> (expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+    
+    def track(self, path, created=None):
+        """Index an upload for expiry, starting the janitor on first use"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        expires_at = (created if created is not None else time.time()) + self.retention
+        with self._lock:
+            previous = self._files.get(path)
+            if previous:
+                self._bytes -= previous[1]
+            self._files[path] = (expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._heap, (expires_at, path))
+            over_quota = self.max_bytes and self._bytes > self.max_bytes
+        self.start()
+        if over_quota:
+            self._wake.set()
+    
+    def scan(self):
+        """Index existing upload_* files by mtime (run once at startup)"""
+        try:
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith('upload_') and entry.is_file(follow_symlinks=False):
+                        with self._lock:
+                            known = entry.path in self._files
+                        if not known:
+                            self.track(entry.path, created=entry.stat(follow_symlinks=False).st_mtime)
+        except OSError:
+            logger.debug("Upload scan error ignored")
+    
+    def sweep(self, now=None):
+        """Remove expired uploads, then the oldest while over quota; returns files removed"""
+        now = now if now is not None else time.time()
+        doomed = []
+        with self._lock:
+            while self._heap and (self._heap[0][0] <= now or (self.max_bytes and self._bytes > self.max_bytes)):
+                expires_at, path = heapq.heappop(self._heap)
+                entry = self._files.get(path)
+                if entry is None or entry[0] != expires_at:
+                    continue  # Superseded by a later upload of the same file
+                del self._files[path]
+                self._bytes -= entry[1]
+                doomed.append(path)
+        removed = 0
+        for path in doomed:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                # Ignore cleanup errors to not break the main functionality
+                logger.debug("Cleanup error ignored")
+        return removed
+    
+    def _run(self):
+        self.scan()
+        while True:
+            self.sweep()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='upload-janitor', daemon=True)
+        self._thread.start()
+
+upload_janitor = TempUploadJanitor()
 
 # Agent service URL - use same load balancer for internal communication
 AGENT_SERVICE_URL = os.getenv('AGENT_SERVICE_URL', 'http://localhost:8000')
@@ -608,8 +688,8 @@ def upload_file_with_actions():
         # Explicitly mark session as modified
         session.modified = True
         
-        # Clean up old temp files (older than 1 hour)
-        cleanup_old_temp_files()
+        # Expired by the upload janitor (after UPLOAD_RETENTION_SECONDS)
+        upload_janitor.track(temp_file_path)
         
         # Determine file type and available actions
         file_ext = filename.lower().split('.')[-1] if '.' in filename else ''
@@ -1414,14 +1494,86 @@ def upload_file():
     except Exception as e:
         return safe_error_response(e)
 
+class ImageProxyCache:
+    """Small on-disk LRU of images proxied from the agent service.
+    
+    Entries keep the upstream ETag and Cache-Control. Immutable (content-addressed)
+    images are served straight from disk, others are revalidated upstream with
+    If-None-Match, so a re-render costs at most a 304.
+    """
+    
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'image_proxy_cache')
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get('IMAGE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+        self._entries = OrderedDict()  # filename -> {'etag', 'content_type', 'cache_control', 'size'}
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def path_for(self, filename):
+        return os.path.join(self.cache_dir, filename)
+    
+    def get(self, filename):
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None:
+                return None
+            if not os.path.exists(self.path_for(filename)):
+                self._bytes -= self._entries.pop(filename)['size']
+                return None
+            self._entries.move_to_end(filename)
+            return entry
+    
+    def writer(self, filename):
+        """Return (file, tmp_path) to stream a new entry into"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        return os.fdopen(fd, 'wb'), tmp_path
+    
+    def commit(self, filename, tmp_path, entry):
+        if not self.max_bytes or entry['size'] > self.max_bytes:
+            os.remove(tmp_path)
+            return
+        os.replace(tmp_path, self.path_for(filename))
+        with self._lock:
+            previous = self._entries.pop(filename, None)
+            if previous:
+                self._bytes -= previous['size']
+            self._entries[filename] = entry
+            self._bytes += entry['size']
+            while self._bytes > self.max_bytes:
+                evicted, old = self._entries.popitem(last=False)
+                self._bytes -= old['size']
+                try:
+                    os.remove(self.path_for(evicted))
+                except OSError:
+                    pass
+
+image_cache = ImageProxyCache()
+
+def _send_cached_image(filename, entry):
+    """Serve a cached image, honouring the client's If-None-Match and Range headers"""
+    response = send_file(
+        image_cache.path_for(filename),
+        mimetype=entry['content_type'],
+        etag=entry['etag'].strip('"') if entry['etag'] else False,
+        conditional=True
+    )
+    if entry['cache_control']:
+        response.headers['Cache-Control'] = entry['cache_control']
+    return response
+
 @app.route('/get-image/<filename>')
 def proxy_get_image(filename):
-    """Proxy image requests to the agent service"""
+    """Proxy image requests to the agent service, streaming the body through a disk cache"""
     try:
         # Validate filename to prevent path traversal
         import re
-        if not re.match(r'^[a-zA-Z0-9_.-]+$', filename):
+        if not re.match(r'^[a-zA-Z0-9_.-]+$', filename) or '..' in filename:
             return "Invalid filename", 400
+        
+        cached = image_cache.get(filename)
+        if cached and 'immutable' in cached['cache_control']:
+            return _send_cached_image(filename, cached)
             
         # Only allow requests to pre-configured trusted agent service URL
         agent_service_url = os.getenv('AGENT_SERVICE_URL', 'http://127.0.0.1:8000')
@@ -1438,7 +1590,6 @@ def proxy_get_image(filename):
             r'^http://.*\.ap-southeast-2\.elb\.amazonaws\.com$'
         ]
         
-        import re
         if not any(re.match(pattern, agent_service_url) for pattern in allowed_patterns):
             return "Invalid agent service URL", 400
             
@@ -1447,22 +1598,57 @@ def proxy_get_image(filename):
             timeout = 60  # Much longer timeout for AWS
         else:
             timeout = 10  # Local development
-            
-        print(f"Using agent URL: {agent_service_url}")
-        print(f"Proxying image request to: {agent_service_url}/query-get-image/{filename}")
+        
+        # Revalidate what we have, otherwise pass the browser's validator through
+        upstream_headers = {}
+        if cached and cached['etag']:
+            upstream_headers['If-None-Match'] = cached['etag']
+        elif request.headers.get('If-None-Match'):
+            upstream_headers['If-None-Match'] = request.headers['If-None-Match']
         
         # Use query-get-image path that routes to agent service via existing /query* pattern
         agent_image_url = f"{agent_service_url}/query-get-image/{filename}"
-        response = requests.get(agent_image_url, timeout=timeout) # nosemgrep: python.flask.security.injection.ssrf-requests.ssrf-requests
-        print(f"Agent service response: {response.status_code}")
+        upstream = requests.get(agent_image_url, headers=upstream_headers, timeout=timeout, stream=True) # nosemgrep: python.flask.security.injection.ssrf-requests.ssrf-requests
+        
+        if upstream.status_code == 304:
+            upstream.close()
+            if cached:
+                return _send_cached_image(filename, cached)
+            return Response(status=304, headers={k: v for k, v in upstream.headers.items() if k.lower() in ('etag', 'cache-control')})
+        
+        if upstream.status_code != 200:
+            logger.warning(f"Agent service returned {upstream.status_code} for image {filename}")
+            upstream.close()
+            return f"Agent service returned {upstream.status_code}", upstream.status_code
+        
+        entry = {
+            'etag': upstream.headers.get('ETag'),
+            'content_type': upstream.headers.get('content-type', 'application/octet-stream'),
+            'cache_control': upstream.headers.get('Cache-Control', ''),
+            'size': 0
+        }
         
-        if response.status_code == 200:
-            # Return the image with proper content type
-            content_type = response.headers.get('content-type', 'application/octet-stream')
-            return Response(response.content, mimetype=content_type)
-        else:
-            print(f"Agent service error: {response.text}")
-            return f"Agent service returned {response.status_code}", response.status_code
+        def stream_and_cache():
+            # Tee the body to the client and the cache; only complete downloads are cached
+            cache_file, tmp_path = image_cache.writer(filename)
+            complete = False
+            try:
+                for chunk in upstream.iter_content(chunk_size=65536):
+                    cache_file.write(chunk)
+                    entry['size'] += len(chunk)
+                    yield chunk
+                complete = True
+            finally:
+                cache_file.close()
+                upstream.close()
+                if complete:
+                    image_cache.commit(filename, tmp_path, entry)
+                else:
+                    os.remove(tmp_path)
+        
+        headers = {k: v for k, v in (('ETag', entry['etag']), ('Cache-Control', entry['cache_control']),
+                                     ('Content-Length', upstream.headers.get('Content-Length'))) if v}
+        return Response(stream_and_cache(), mimetype=entry['content_type'], headers=headers)
             
     except Exception as e:
         logger.error(f"Error proxying image request: {str(e)}")
@@ -1652,7 +1838,11 @@ def get_schema_translator_detail(result_id):
 def set_models():
     """Proxy endpoint to set multiple models on agent service."""
     try:
+        user = session.get('user', {})
         data = request.get_json()
+        # Model selection is per user on the agent service - use the same id as queries
+        if user:
+            data['user_id'] = user.get('sub') or user.get('email', 'local@dev')
         response = requests.post(f"{AGENT_SERVICE_URL}/set-models", json=data, timeout=10)
         return response.json(), response.status_code
     except Exception as e:
@@ -1663,7 +1853,11 @@ def set_models():
 def get_models():
     """Proxy endpoint to get current models from agent service."""
     try:
-        response = requests.get(f"{AGENT_SERVICE_URL}/get-models", timeout=10)
+        user = session.get('user', {})
+        params = {}
+        if user:
+            params['user_id'] = user.get('sub') or user.get('email', 'local@dev')
+        response = requests.get(f"{AGENT_SERVICE_URL}/get-models", params=params, timeout=10)
         return response.json(), response.status_code
     except Exception as e:
         return safe_error_response(e)
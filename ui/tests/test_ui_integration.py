@@ -443,5 +443,52 @@ class TestUIIntegration:
         response = client.get('/static/suggestions.json')
         assert response.status_code == 200
 
+    def test_upload_janitor_expires_old_uploads(self, tmp_path):
+        """Test that uploads are expired from the index without scanning the temp dir."""
+        import time
+        from app import TempUploadJanitor
+        
+        janitor = TempUploadJanitor(str(tmp_path), retention_seconds=3600, max_bytes=0)
+        janitor.start = lambda: None  # Sweep synchronously
+        old_upload = tmp_path / "upload_old"
+        new_upload = tmp_path / "upload_new"
+        old_upload.write_text("old")
+        new_upload.write_text("new")
+        janitor.track(str(old_upload), created=time.time() - 7200)
+        janitor.track(str(new_upload))
+        
+        assert janitor.sweep() == 1
+        assert not old_upload.exists()
+        assert new_upload.exists()
+
+    @responses.activate
+    def test_image_proxy_streams_and_caches_immutable_images(self, client, tmp_path, monkeypatch):
+        """Test that content-addressed images are fetched once and then served from the proxy cache."""
+        from app import ImageProxyCache
+        monkeypatch.setenv('AGENT_SERVICE_URL', 'http://127.0.0.1:8000')
+        monkeypatch.setattr('app.image_cache', ImageProxyCache(str(tmp_path)))
+        filename = 'a' * 32 + '.png'
+        responses.add(
+            responses.GET,
+            f"http://127.0.0.1:8000/query-get-image/{filename}",
+            body=b"png-bytes",
+            status=200,
+            content_type="image/png",
+            headers={"ETag": '"' + 'a' * 32 + '"', "Cache-Control": "private, max-age=31536000, immutable"}
+        )
+        
+        first = client.get(f'/get-image/{filename}')
+        assert first.status_code == 200
+        assert first.data == b"png-bytes"
+        
+        second = client.get(f'/get-image/{filename}')
+        assert second.data == b"png-bytes"
+        assert "immutable" in second.headers["Cache-Control"]
+        assert len(responses.calls) == 1
+        
+        revalidated = client.get(f'/get-image/{filename}', headers={"If-None-Match": first.headers["ETag"]})
+        assert revalidated.status_code == 304
+        assert len(responses.calls) == 1
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])